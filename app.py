@@ -1,12 +1,14 @@
 import streamlit as st
 import os
+import hashlib
 import logging
-from typing import List, Tuple, Optional
-import cv2
-from utils.preprocessing import preprocess_image
-from utils.ocr_extraction import extract_text_from_image, filter_text
-from utils.data_export import export_to_json, export_to_csv
+from typing import Any, Dict, List, Tuple, Optional
+from config import Config
+from utils.data_export import export_to_json, export_to_csv, save_upload_async
+from utils.ocr_extraction import filter_text
 from utils.visualisation import visualise_text_regions
+from utils.batch_engine import BatchEngine
+from utils.pipeline import Pipeline, default_stages
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,6 +22,74 @@ os.makedirs(EXTRACTED_FOLDER, exist_ok=True)
 # Streamlit app with session state
 if 'batch_results' not in st.session_state:
     st.session_state.batch_results = []
+if 'saved_uploads' not in st.session_state:
+    st.session_state.saved_uploads = set()
+
+def persist_upload_once(filename: str, image_bytes: bytes):
+    """Save an upload in the background the first time this session sees its content."""
+    upload_id = (filename, hashlib.sha256(image_bytes).hexdigest())
+    if upload_id not in st.session_state.saved_uploads:
+        st.session_state.saved_uploads.add(upload_id)
+        save_upload_async(filename, image_bytes, UPLOAD_FOLDER)
+
+@st.cache_data(
+    max_entries=Config.UI_CONFIG['stage_cache_entries'],
+    ttl=Config.UI_CONFIG['stage_cache_ttl_seconds'],
+    show_spinner=False
+)
+def extract_upload(
+    filename: str,
+    image_bytes: bytes,
+    preprocessing_mode: str,
+    resize_width: Optional[int],
+    denoise: bool
+) -> Dict[str, Any]:
+    """
+    Decode, preprocess, detect regions and OCR an upload, memoized across
+    reruns by file content and the settings those stages depend on.
+    Filtering by confidence is left to the caller, so moving the slider
+    does not OCR the image again. The result cache keeps the texts under
+    the default threshold.
+    """
+    settings = {
+        'preprocessing_mode': preprocessing_mode,
+        'resize_width': resize_width,
+        'denoise': denoise,
+        'min_confidence': Config.OCR_CONFIG['min_confidence']
+    }
+    stages = [stage for stage in default_stages() if stage.name != 'export']
+    record = Pipeline(settings=settings, stages=stages).process(
+        (filename, image_bytes), keep_intermediate=True
+    )
+    
+    if record.get('regions'):
+        region_stats = record['region_stats']
+        logging.info(
+            f"Detected {region_stats['regions_before']} text regions, "
+            f"{region_stats['regions_after']} after merging."
+        )
+    if record.get('ocr_report'):
+        ocr_report = record['ocr_report']
+        logging.info(
+            f"OCR used {ocr_report['ocr_calls']} calls, "
+            f"saved {ocr_report['calls_saved']} of {ocr_report['exhaustive_calls']} "
+            f"({ocr_report['regions_gated']} non-text regions gated, "
+            f"{ocr_report['regions_reused']} reused from the full-image pass; "
+            f"{ocr_report['parallel_speedup']:.1f}x region speedup "
+            f"on {ocr_report['region_workers']} threads)."
+        )
+    
+    # Keep only what the page shows, so cached entries stay small
+    result = {key: record.get(key) for key in (
+        'status', 'cached', 'extracted_texts', 'confidence_scores', 'region_stats',
+        'ocr_report', 'denoise_report', 'profile'
+    )}
+    result['regions'] = list(record.get('regions') or [])
+    result['visualisation'] = (
+        visualise_text_regions(record['original'], result['regions'])
+        if result['regions'] and record.get('original') is not None else None
+    )
+    return result
 
 st.title("Product Information Extractor")
 st.write("Upload an image of a product to extract relevant details.")
@@ -50,64 +120,56 @@ if process_mode == "Single Image":
         progress_text = st.empty()
         
         try:
-            # Save uploaded image
-            progress_text.text("Saving image...")
+            # Read the upload once; it is decoded from memory and optionally
+            # persisted in the background instead of round-tripping via disk
+            progress_text.text("Reading image...")
             progress_bar.progress(10)
             
-            image_path = os.path.join(UPLOAD_FOLDER, uploaded_file.name)
-            with open(image_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+            image_bytes = uploaded_file.getvalue()
+            if Config.UI_CONFIG['persist_uploads']:
+                persist_upload_once(uploaded_file.name, image_bytes)
             st.success("Image uploaded successfully!")
 
             # Display the uploaded image
             col1, col2 = st.columns(2)
             with col1:
-                st.image(image_path, caption="Uploaded Image", use_column_width=True)
+                st.image(image_bytes, caption="Uploaded Image", use_column_width=True)
 
-            # Preprocess image
-            progress_text.text("Preprocessing image...")
+            # Run the heavy stages once per upload and settings; reruns from
+            # widget changes (or the export buttons) are served from memory
+            progress_text.text("Extracting text...")
             progress_bar.progress(30)
-            
-            processed_image, original_image = preprocess_image(
-                image_path,
-                preprocessing_mode=preprocessing_mode,
-                resize_width=resize_width if resize_width > 0 else None,
-                denoise=denoise
+            record = extract_upload(
+                uploaded_file.name, image_bytes, preprocessing_mode,
+                resize_width if resize_width > 0 else None, denoise
             )
-
-            # Detect text regions (contours)
-            progress_text.text("Detecting text regions...")
-            progress_bar.progress(50)
+            if record['status'].startswith('error'):
+                raise RuntimeError(record['status'][len('error: '):])
             
-            contours, _ = cv2.findContours(processed_image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            text_regions = [cv2.boundingRect(c) for c in contours if cv2.contourArea(c) > 100]
-
-            if text_regions or preprocessing_mode == "text_optimised":
-                if text_regions:
-                    logging.info(f"Detected {len(text_regions)} text regions.")
-                else:
-                    # Use whole image as single region for text_optimised mode
-                    h, w = original_image.shape[:2]
-                    text_regions = [(0, 0, w, h)]
-                
-                # Visualise detected regions
-                if show_visualisation:
-                    with col2:
-                        visualisation = visualise_text_regions(original_image, text_regions)
-                        st.image(visualisation, caption="Detected Text Regions", use_column_width=True)
-
-                # Extract text
-                progress_text.text("Extracting text...")
-                progress_bar.progress(70)
-                
-                extracted_texts, confidence_scores = extract_text_from_image(original_image, text_regions)
-                
-                # Enhanced filtering
-                progress_text.text("Analysing extracted text...")
-                progress_bar.progress(90)
-                
-                product_info = filter_text(extracted_texts, confidence_scores, min_confidence=min_confidence)
+            # Visualise detected regions
+            if show_visualisation and record['visualisation'] is not None:
+                with col2:
+                    st.image(
+                        record['visualisation'],
+                        caption="Detected Text Regions",
+                        use_column_width=True,
+                    )
+            
+            # Only the confidence filter depends on the slider, so it runs every time
+            progress_text.text("Analysing extracted text...")
+            progress_bar.progress(90)
+            product_info = None
+            if record['status'] != 'no_text_detected':
+                product_info = filter_text(
+                    record['extracted_texts'] or [],
+                    record['confidence_scores'] or [],
+                    min_confidence=min_confidence,
+                )
+            
+            cached = record.get('cached', False)
+            confidence_scores = record.get('confidence_scores') or []
 
+            if product_info is not None:
                 # Display extracted information
                 st.subheader("Extracted Product Information")
                 
@@ -177,6 +239,37 @@ if process_mode == "Single Image":
                 if confidence_scores:
                     avg_confidence = sum(confidence_scores) / len(confidence_scores)
                     st.metric("Average Confidence", f"{avg_confidence:.1f}%")
+                if not cached and record.get('profile'):
+                    with st.expander("Stage Timings"):
+                        st.json(record['profile'])
+                
+                if cached:
+                    st.caption("Loaded from the result cache.")
+                elif record.get('regions'):
+                    region_stats = record['region_stats']
+                    ocr_report = record['ocr_report']
+                    # Tiled images are denoised tile by tile: no whole-image report
+                    denoise_report = record.get('denoise_report')
+                    denoise_summary = (
+                        f" Denoising: {denoise_report['tier']} "
+                        f"({denoise_report['seconds']:.2f}s)"
+                        if denoise_report
+                        else ""
+                    )
+                    st.caption(
+                        f"Text regions: {region_stats['regions_before']} detected, "
+                        f"{region_stats['regions_after']} after merging. "
+                        f"OCR calls: {ocr_report['ocr_calls']} "
+                        f"({ocr_report['calls_saved']} saved, "
+                        f"{ocr_report['ocr_calls_pruned']} of them by skipping "
+                        f"{ocr_report['regions_gated']} non-text regions; "
+                        f"{ocr_report['regions_reused']} regions reused "
+                        f"full-image words). "
+                        f"Region OCR: {ocr_report['region_workers']} threads, "
+                        f"{ocr_report['parallel_speedup']:.1f}x faster than "
+                        f"one at a time."
+                        f"{denoise_summary}"
+                    )
                 
                 # Export options
                 st.subheader("Export Options")
@@ -212,46 +305,41 @@ else:  # Batch Processing
     if uploaded_files:
         st.write(f"Processing {len(uploaded_files)} images...")
         
-        batch_results = []
         batch_progress = st.progress(0)
         
-        for idx, uploaded_file in enumerate(uploaded_files):
-            result = {
-                "filename": uploaded_file.name,
-                "status": "processing"
-            }
-            
-            try:
-                # Save uploaded image
-                image_path = os.path.join(UPLOAD_FOLDER, uploaded_file.name)
-                with open(image_path, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
-                
-                # Process image
-                processed_image, original_image = preprocess_image(
-                    image_path,
-                    preprocessing_mode=preprocessing_mode,
-                    resize_width=resize_width if resize_width > 0 else None,
-                    denoise=denoise
-                )
-                contours, _ = cv2.findContours(processed_image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                text_regions = [cv2.boundingRect(c) for c in contours if cv2.contourArea(c) > 100]
-                
-                if text_regions:
-                    extracted_texts, confidence_scores = extract_text_from_image(original_image, text_regions)
-                    product_info = filter_text(extracted_texts, confidence_scores, min_confidence=min_confidence)
-                    
-                    result["status"] = "success"
-                    result["product_info"] = product_info
-                else:
-                    result["status"] = "no_text_detected"
-                    
-            except Exception as e:
-                result["status"] = f"error: {str(e)}"
-                logging.error(f"Error processing {uploaded_file.name}: {str(e)}")
-            
-            batch_results.append(result)
-            batch_progress.progress((idx + 1) / len(uploaded_files))
+        batch_settings = {
+            'preprocessing_mode': preprocessing_mode,
+            'resize_width': resize_width if resize_width > 0 else None,
+            'denoise': denoise,
+            'min_confidence': min_confidence
+        }
+        
+        # Hand the upload bytes straight to the process pool; saving a copy
+        # to the upload folder happens in the background
+        image_sources = []
+        batch_digest = hashlib.sha256(
+            repr(sorted(batch_settings.items())).encode('utf-8')
+        )
+        for uploaded_file in uploaded_files:
+            image_bytes = uploaded_file.getvalue()
+            if Config.UI_CONFIG['persist_uploads']:
+                persist_upload_once(uploaded_file.name, image_bytes)
+            image_sources.append((uploaded_file.name, image_bytes))
+            batch_digest.update(uploaded_file.name.encode('utf-8'))
+            batch_digest.update(hashlib.sha256(image_bytes).digest())
+        
+        # Reruns from widget changes or the export button reuse the results
+        # while the uploads and settings are unchanged
+        if st.session_state.get('batch_key') != batch_digest.hexdigest():
+            batch_results = []
+            with BatchEngine(settings=batch_settings) as engine:
+                for result in engine.run(image_sources, ordered=True):
+                    batch_results.append(result)
+                    batch_progress.progress(len(batch_results) / len(image_sources))
+            st.session_state.batch_results = batch_results
+            st.session_state.batch_key = batch_digest.hexdigest()
+        batch_results = st.session_state.batch_results
+        batch_progress.progress(1.0)
         
         # Display batch results
         st.subheader("Batch Processing Results")
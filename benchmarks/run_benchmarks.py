@@ -0,0 +1,343 @@
+# benchmarks/run_benchmarks.py
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Tuple, cast
+
+import numpy as np
+
+from benchmarks.synthetic_labels import (
+    DEFAULT_DENSITIES, DEFAULT_RESOLUTIONS, TRUTH_FIELDS, generate_corpus, load_corpus
+)
+from config import Config
+from utils.ocr_backend import get_ocr_backend
+from utils.ocr_extraction import extract_text_from_image, filter_text
+from utils.preprocessing import ImageTransform, preprocess_image
+from utils.profiling import profile_image
+from utils.strategy_scheduler import StrategyScheduler
+from utils.text_regions import consolidate_regions, detect_text_regions
+
+PREPROCESSING_MODES = [
+    "adaptive_threshold",
+    "otsu",
+    "morphological",
+    "edge_detection",
+    "combined",
+    "text_optimised",
+]
+
+# Regressions beyond these relative/absolute margins fail a comparison;
+# stages faster than min_stage_seconds are too noisy to compare
+DEFAULT_TOLERANCES = {
+    'images_per_second': 0.10,
+    'stage_seconds': 0.20,
+    'accuracy': 0.02,
+    'min_stage_seconds': 0.005,
+}
+
+
+def _normalise(value: str) -> str:
+    return ''.join(value.lower().split())
+
+
+def score_extraction(
+    entry: Dict[str, Any], texts: List[str], product_info: Dict[str, List[str]]
+) -> Dict[str, float]:
+    """
+    Compare one extraction with its ground truth: character similarity of the
+    full text, and recall/precision of the structured fields.
+    """
+    expected_text = _normalise(' '.join(entry['lines']))
+    actual_text = _normalise(' '.join(texts))
+    text_similarity = (
+        SequenceMatcher(None, expected_text, actual_text, autojunk=False).ratio()
+        if expected_text
+        else 0.0
+    )
+
+    expected, found = 0, 0
+    predicted, correct = 0, 0
+    for field in TRUTH_FIELDS:
+        truth = {_normalise(value) for value in entry['fields'].get(field, [])}
+        values = {_normalise(value) for value in product_info.get(field, [])}
+        expected += len(truth)
+        found += len(truth & values)
+        predicted += len(values)
+        correct += len(values & truth)
+
+    return {
+        'text_similarity': text_similarity,
+        'field_recall': found / expected if expected else 1.0,
+        'field_precision': correct / predicted if predicted else 1.0,
+    }
+
+
+def benchmark_image(
+    path: str, entry: Dict[str, Any], mode: str, settings: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Run the full pipeline on one image and return its stage timings and scores."""
+    # A fresh scheduler per image keeps runs independent of learned strategy stats
+    scheduler = StrategyScheduler()
+    started = time.perf_counter()
+    with profile_image(entry['filename'], enabled=True) as profile:
+        processed, original, transform = cast(
+            Tuple[np.ndarray, np.ndarray, ImageTransform],
+            preprocess_image(
+                path, preprocessing_mode=mode, resize_width=settings['resize_width'],
+                denoise=settings['denoise'], return_transform=True
+            )
+        )
+        regions, _ = consolidate_regions(detect_text_regions(processed))
+        regions = transform.to_original(regions)
+        texts, scores = cast(
+            Tuple[List[str], List[float]],
+            extract_text_from_image(original, regions, scheduler=scheduler)
+        )
+        product_info = filter_text(texts, scores, settings['min_confidence'])
+    elapsed = time.perf_counter() - started
+
+    assert profile is not None
+    data = profile.to_dict()
+    return {
+        'filename': entry['filename'],
+        'width': entry['width'],
+        'density': entry['density'],
+        'seconds': elapsed,
+        'stages': {
+            stage: values['seconds'] for stage, values in data['stages'].items()
+        },
+        'ocr_calls': data['counters'].get('ocr_calls', 0),
+        'peak_array_bytes': data['peak_array_bytes'],
+        **score_extraction(entry, texts, product_info),
+    }
+
+
+def summarise(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Aggregate per-image results into throughput, latency percentiles and mean accuracy.
+    """
+    seconds = np.array([result['seconds'] for result in results])
+    stages: Dict[str, List[float]] = {}
+    for result in results:
+        for stage, value in result['stages'].items():
+            stages.setdefault(stage, []).append(value)
+
+    return {
+        'images': len(results),
+        'total_seconds': round(float(seconds.sum()), 6),
+        'images_per_second': (
+            round(len(results) / float(seconds.sum()), 4) if seconds.sum() > 0 else 0.0
+        ),
+        'latency_p50': round(float(np.percentile(seconds, 50)), 6),
+        'latency_p95': round(float(np.percentile(seconds, 95)), 6),
+        'stage_seconds': {
+            stage: round(float(np.mean(values)), 6)
+            for stage, values in sorted(stages.items())
+        },
+        'ocr_calls': round(
+            float(np.mean([result['ocr_calls'] for result in results])), 2
+        ),
+        'peak_array_bytes': int(max(result['peak_array_bytes'] for result in results)),
+        'accuracy': {
+            metric: round(float(np.mean([result[metric] for result in results])), 4)
+            for metric in ('text_similarity', 'field_recall', 'field_precision')
+        },
+    }
+
+
+def run_benchmarks(
+    corpus_dir: str,
+    modes: Optional[List[str]] = None,
+    settings: Optional[Dict[str, Any]] = None,
+    repeat: int = 1
+) -> Dict[str, Any]:
+    """
+    Benchmark every preprocessing mode over the corpus. Each image is run
+    `repeat` times and the fastest run is kept, to reduce timer noise.
+    """
+    modes = modes or PREPROCESSING_MODES
+    settings = {
+        'resize_width': Config.PREPROCESSING_CONFIG['resize_width'],
+        'denoise': Config.PREPROCESSING_CONFIG['denoise'],
+        'min_confidence': Config.OCR_CONFIG['min_confidence'],
+        **(settings or {})
+    }
+    entries = load_corpus(corpus_dir)
+
+    report: Dict[str, Any] = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'ocr_engine': get_ocr_backend().version(),
+        },
+        'settings': settings,
+        'corpus': {'images': len(entries), 'dir': os.path.abspath(corpus_dir)},
+        'modes': {}
+    }
+
+    for mode in modes:
+        results = []
+        for entry in entries:
+            path = os.path.join(corpus_dir, entry['filename'])
+            runs = [
+                benchmark_image(path, entry, mode, settings)
+                for _ in range(max(1, repeat))
+            ]
+            results.append(min(runs, key=lambda result: result['seconds']))
+        report['modes'][mode] = {'summary': summarise(results), 'images': results}
+
+    return report
+
+
+def compare_reports(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    tolerances: Optional[Dict[str, float]] = None
+) -> List[str]:
+    """
+    List regressions of `current` against `baseline`: lower images/sec or
+    higher per-stage latency beyond a relative margin, or lower accuracy
+    beyond an absolute margin.
+    """
+    tolerances = {**DEFAULT_TOLERANCES, **(tolerances or {})}
+    regressions = []
+
+    for mode, data in current['modes'].items():
+        if mode not in baseline['modes']:
+            continue
+        before = baseline['modes'][mode]['summary']
+        after = data['summary']
+
+        if after['images_per_second'] < before['images_per_second'] * (
+            1 - tolerances['images_per_second']
+        ):
+            regressions.append(
+                f"{mode}: images/sec {before['images_per_second']} "
+                f"-> {after['images_per_second']}"
+            )
+
+        for stage, seconds in after['stage_seconds'].items():
+            previous = before['stage_seconds'].get(stage)
+            if (
+                previous is None
+                or max(previous, seconds) < tolerances['min_stage_seconds']
+            ):
+                continue
+            if seconds > previous * (1 + tolerances['stage_seconds']):
+                regressions.append(
+                    f"{mode}: stage {stage} {previous:.4f}s -> {seconds:.4f}s"
+                )
+
+        for metric, value in after['accuracy'].items():
+            previous = before['accuracy'].get(metric)
+            if previous is not None and value < previous - tolerances['accuracy']:
+                regressions.append(f"{mode}: {metric} {previous:.4f} -> {value:.4f}")
+
+    return regressions
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description='Benchmark preprocessing modes on a synthetic label corpus.'
+    )
+    parser.add_argument(
+        '-o',
+        '--output',
+        default='benchmark_results.json',
+        help='JSON file to write results to',
+    )
+    parser.add_argument(
+        '--corpus',
+        help='Corpus directory (generated into a temporary directory if omitted)',
+    )
+    parser.add_argument(
+        '--regenerate',
+        action='store_true',
+        help='Regenerate the corpus even if it exists',
+    )
+    parser.add_argument(
+        '--modes',
+        nargs='+',
+        choices=PREPROCESSING_MODES,
+        help='Preprocessing modes to benchmark',
+    )
+    parser.add_argument(
+        '--resolutions',
+        nargs='+',
+        type=int,
+        default=DEFAULT_RESOLUTIONS,
+        help='Label widths',
+    )
+    parser.add_argument(
+        '--per-combination',
+        type=int,
+        default=2,
+        help='Labels per resolution and density',
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--repeat', type=int, default=1, help='Runs per image; the fastest is kept'
+    )
+    parser.add_argument(
+        '--baseline', help='Earlier results JSON to check for regressions'
+    )
+    parser.add_argument(
+        '--quick',
+        action='store_true',
+        help='Smallest corpus and two modes, for smoke runs',
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.quick:
+        args.resolutions = args.resolutions[:1]
+        args.per_combination = 1
+        args.modes = args.modes or ['adaptive_threshold', 'text_optimised']
+
+    with tempfile.TemporaryDirectory() as scratch:
+        corpus_dir = args.corpus or scratch
+        if args.regenerate or not os.path.exists(
+            os.path.join(corpus_dir, 'ground_truth.json')
+        ):
+            generate_corpus(
+                corpus_dir,
+                args.resolutions,
+                DEFAULT_DENSITIES,
+                args.per_combination,
+                args.seed,
+            )
+        report = run_benchmarks(corpus_dir, args.modes, repeat=args.repeat)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    for mode, data in report['modes'].items():
+        summary = data['summary']
+        print(
+            f"{mode:20s} {summary['images_per_second']:8.3f} images/s  "
+            f"p50 {summary['latency_p50']:.3f}s  p95 {summary['latency_p95']:.3f}s  "
+            f"text {summary['accuracy']['text_similarity']:.3f}  "
+            f"fields {summary['accuracy']['field_recall']:.3f}"
+        )
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_reports(json.load(f), report)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
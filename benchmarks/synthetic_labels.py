@@ -0,0 +1,181 @@
+# benchmarks/synthetic_labels.py
+
+import json
+import os
+import random
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# Label widths in pixels; heights follow a 3:4 portrait aspect ratio
+DEFAULT_RESOLUTIONS = [640, 1280, 2400]
+
+# Number of text lines rendered per label
+DEFAULT_DENSITIES = {'sparse': 4, 'medium': 8, 'dense': 14}
+
+# Ground-truth fields compared against filter_text output
+TRUTH_FIELDS = ['prices', 'weights', 'volumes', 'dates', 'percentages']
+
+_PRODUCTS = [
+    'Organic Milk',
+    'Whole Grain Bread',
+    'Greek Yogurt',
+    'Orange Juice',
+    'Cheddar Cheese',
+    'Basmati Rice',
+    'Olive Oil',
+    'Dark Chocolate',
+    'Coffee Beans',
+    'Pasta Sauce',
+]
+_RETAILERS = ['Tesco', 'Sainsbury', 'Waitrose', 'Aldi', 'Lidl']
+_BRANDS = ['Heinz', 'Kellogg', 'Cadbury', 'Nestle', 'Unilever']
+_MONTHS = [
+    'Jan',
+    'Feb',
+    'Mar',
+    'Apr',
+    'May',
+    'Jun',
+    'Jul',
+    'Aug',
+    'Sep',
+    'Oct',
+    'Nov',
+    'Dec',
+]
+
+
+def _field_line(rng: random.Random, field: str) -> Tuple[str, str]:
+    """Return a rendered line and the value the extractor should find in it."""
+    if field == 'prices':
+        value = f"£{rng.randint(0, 19)}.{rng.randint(0, 99):02d}"
+        return f"Price {value}", value
+    if field == 'weights':
+        value = f"{rng.choice([100, 250, 400, 500, 750])}g"
+        return f"Net weight {value}", value
+    if field == 'volumes':
+        value = f"{rng.choice([250, 330, 500, 750])}ml"
+        return f"Contents {value}", value
+    if field == 'dates':
+        day, month = rng.randint(1, 28), rng.randint(1, 12)
+        value = f"{day:02d}/{month:02d}/{rng.randint(2024, 2027)}"
+        return f"Packed {value}", value
+    if field == 'percentages':
+        value = f"{rng.randint(1, 60)}%"
+        return f"Fat {value}", value
+    raise ValueError(f"Unknown field: {field}")
+
+
+def make_label_text(lines: int, seed: int) -> Dict[str, Any]:
+    """
+    Build the text content of one label: a product name, retailer and brand
+    followed by field lines (prices, weights, ...) cycling until `lines` is reached.
+    """
+    rng = random.Random(seed)
+    rendered = [
+        rng.choice(_PRODUCTS),
+        rng.choice(_RETAILERS),
+        rng.choice(_BRANDS),
+    ][:max(1, lines)]
+    fields: Dict[str, List[str]] = {field: [] for field in TRUTH_FIELDS}
+
+    order = list(TRUTH_FIELDS)
+    rng.shuffle(order)
+    while len(rendered) < lines:
+        field = order[(len(rendered) - 3) % len(order)]
+        line, value = _field_line(rng, field)
+        rendered.append(line)
+        fields[field].append(value)
+
+    return {'lines': rendered, 'fields': fields}
+
+
+def render_label(
+    lines: Sequence[str], width: int, seed: int = 0, noise: float = 4.0
+) -> np.ndarray:
+    """
+    Render text lines onto a light, slightly noisy background as a BGR image.
+    Font size scales with the width so every resolution holds the same text.
+    """
+    rng = np.random.default_rng(seed)
+    height = int(width * 4 / 3)
+    background = rng.integers(225, 250)
+    image = np.full((height, width, 3), background, dtype=np.uint8)
+
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    margin = width // 16
+    # Fit the longest line to the usable width, capped so short labels stay readable
+    longest = max(len(line) for line in lines)
+    base_width = cv2.getTextSize('M' * longest, font, 1.0, 2)[0][0] * 0.75
+    scale = min((width - 2 * margin) / base_width, width / 400)
+    thickness = max(1, int(round(scale * 2)))
+    line_height = int(cv2.getTextSize('Mg', font, scale, thickness)[0][1] * 2.0)
+
+    y = margin + line_height
+    for line in lines:
+        if y > height - margin:
+            break
+        cv2.putText(
+            image, line, (margin, y), font, scale, (20, 20, 20), thickness, cv2.LINE_AA
+        )
+        y += line_height
+
+    if noise:
+        grain = rng.normal(0, noise, image.shape)
+        image = np.clip(image.astype(np.float32) + grain, 0, 255).astype(np.uint8)
+    return image
+
+
+def generate_corpus(
+    output_dir: str,
+    resolutions: Optional[List[int]] = None,
+    densities: Optional[Dict[str, int]] = None,
+    per_combination: int = 2,
+    seed: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Write a deterministic corpus of label images plus ground_truth.json to
+    `output_dir` and return the ground-truth entries. The same seed always
+    produces the same images, so runs on different commits are comparable.
+    """
+    resolutions = resolutions or DEFAULT_RESOLUTIONS
+    densities = densities or DEFAULT_DENSITIES
+    os.makedirs(output_dir, exist_ok=True)
+
+    entries = []
+    index = 0
+    for width in resolutions:
+        for density, lines in densities.items():
+            for _ in range(per_combination):
+                label_seed = seed * 100003 + index
+                label = make_label_text(lines, label_seed)
+                filename = f"label_{width}_{density}_{index:03d}.png"
+                cv2.imwrite(
+                    os.path.join(output_dir, filename),
+                    render_label(label['lines'], width, label_seed),
+                )
+                entries.append({
+                    'filename': filename,
+                    'width': width,
+                    'density': density,
+                    'lines': label['lines'],
+                    'fields': label['fields']
+                })
+                index += 1
+
+    with open(
+        os.path.join(output_dir, 'ground_truth.json'), 'w', encoding='utf-8'
+    ) as f:
+        json.dump(entries, f, indent=2, ensure_ascii=False)
+    return entries
+
+
+def load_corpus(corpus_dir: str) -> List[Dict[str, Any]]:
+    """Read the ground-truth entries written by generate_corpus."""
+    with open(
+        os.path.join(corpus_dir, 'ground_truth.json'), 'r', encoding='utf-8'
+    ) as f:
+        entries: List[Dict[str, Any]] = json.load(f)
+    return entries
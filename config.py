@@ -12,33 +12,77 @@ class Config:
     EXTRACTED_FOLDER = os.path.join(BASE_DIR, 'extracted_info')
     
     # OCR configurations
-    OCR_CONFIG = {
+    OCR_CONFIG: Dict[str, Any] = {
         'min_confidence': 30.0,
         'psm_modes': [6, 8, 11, 3],
         'padding': 5,
-        'language': 'eng'
+        'language': 'eng',
+        'backend': os.getenv('OCR_BACKEND', 'auto'),  # auto, tesserocr or pytesseract
+        'confidence_target': 85.0,  # Stop searching a region once this is reached
+        'max_calls_per_image': None,  # OCR call budget per image (None = unlimited)
+        'time_budget_seconds': None,  # OCR time budget per image (None = unlimited)
+        'strategy_stats_path': os.path.join(BASE_DIR, '.cache', 'strategy_stats.json'),
+        # Full-resolution variants held per image (all of them)
+        'max_cached_variants': 4,
+        # Stop early below the target if a keyword is read (None = off)
+        'keyword_accept_confidence': 60.0,
+        # Full-image words this confident can stand in for a region's OCR
+        'word_reuse_confidence': 80.0,
+        # Share of a region those words must cover to skip its OCR (None = off)
+        'word_reuse_coverage': 0.5,
+        # Threads searching one image's regions at once (1 = one after another)
+        'region_workers': 4,
+        # Concurrent OCR calls across the whole process (None = CPU count)
+        'max_ocr_threads': None,
     }
     
     # Preprocessing configurations
-    PREPROCESSING_CONFIG = {
+    PREPROCESSING_CONFIG: Dict[str, Any] = {
         'default_mode': 'adaptive_threshold',
-        'resize_width': 1920,  # Resize images wider than this
+        'resize_width': 1920,  # Max width of the working copy text is detected on
+        # Also shrink the working copy to the estimated text height
+        'plan_resolution': True,
+        # Character height (pixels) aimed for on the working copy
+        'target_text_height': 32,
+        'min_working_width': 640,  # Never shrink the working copy below this width
+        # True picks a tier from the measured noise; or none, median, bilateral, nlm
         'denoise': True,
+        # Noise sigma ceiling per tier
+        'denoise_thresholds': {'none': 1.5, 'median': 4.0, 'bilateral': 8.0},
         'deskew': False,
-        'remove_shadows': False
-    }
-    
-    # Text extraction patterns
-    EXTRACTION_PATTERNS = {
-        'prices': r'\$?[\d,]+\.?\d*',
-        'dates': r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}|\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4}',
-        'percentages': r'\d+\.?\d*\s*%',
-        'weights': r'\d+\.?\d*\s*(?:kg|g|mg|lb|oz|lbs|ounces?)',
-        'volumes': r'\d+\.?\d*\s*(?:ml|l|L|mL|gal|gallons?)',
-        'product_codes': r'[A-Z]{2,}\d{3,}|\d{3,}[A-Z]{2,}',
-        'barcodes': r'\d{8,13}',
+        # Skew is estimated on a copy downscaled to this size
+        'skew_max_dimension': 1024,
+        'skew_max_lines': 200,  # Longest line segments used in the estimate
+        # Leave the image unrotated below this confidence (0-1)
+        'skew_min_confidence': 0.5,
+        'remove_shadows': False,
+    }
+    
+    # Text region detection and consolidation
+    REGION_CONFIG: Dict[str, Any] = {
+        'min_area': 100,  # Ignore contours smaller than this
+        'merge_mode': 'lines',  # none, contained, lines or blocks
+        'gap_ratio': 1.0,  # Max horizontal gap between boxes, in character heights
+        # Min overlap on the other axis, as a fraction of the smaller box
+        'min_overlap': 0.5,
+    }
+    
+    # Text extraction patterns, compiled once by utils.pattern_engine
+    EXTRACTION_PATTERNS: Dict[str, Any] = {
+        'prices': r'[$£€]\s*\d+(?:[.,]\d{2})?|\d+(?:[.,]\d{2})?\s*[$£€]',
+        'dates': (
+            r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}'
+            r'|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*'
+            r'\s+\d{1,2},?\s+\d{2,4}'
+        ),
+        'percentages': r'\d+(?:\.\d*)?\s*%',
+        'weights': r'\d+(?:\.\d*)?\s*(?:kg|g|mg|lb|oz|lbs|ounces?)\b',
+        'volumes': r'\d+(?:\.\d*)?\s*(?:ml|l|L|mL|gal|gallons?|fl\.?\s*oz)\b',
+        'product_codes': r'\b[A-Z]{2,}\d{3,}|\d{3,}[A-Z]{2,}\b|UPC\s*:\s*\d+',
+        'barcodes': r'\b\d{8,13}\b',
+        'expiry': r'(?:exp|expiry|expires?|best\s+before)[:\s]*[\d/\-\s]+\d{2,4}',
         'urls': r'https?://\S+|www\.\S+',
-        'emails': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+        'emails': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b',
     }
     
     # Keyword configurations
@@ -65,20 +109,110 @@ class Config:
         }
     }
     
+    # Keyword matching used by filter_text
+    KEYWORD_CONFIG: Dict[str, Any] = {
+        # Only match whole words (e.g. "all" not inside "small")
+        'word_boundaries': False,
+        # Large brand/retailer/product dictionaries: CSV files with name and category
+        # columns, or "category=path" for text files with one name per line
+        'dictionaries': [
+            spec
+            for spec in os.getenv('KEYWORD_DICTIONARIES', '').split(',')
+            if spec.strip()
+        ],
+        # Where the memory-mapped index is cached
+        'index_dir': os.path.join(BASE_DIR, '.cache'),
+        'fuzzy_matching': True,  # Tolerate OCR errors such as "Wa1mart" or "Tlde"
+        # Edits allowed after folding OCR-confusable characters
+        'fuzzy_max_distance': 1,
+        'fuzzy_min_length': 5,  # Shorter keywords must match exactly after folding
+        # Also fuzzy-match dictionary names; builds an in-memory deletion index
+        # over every entry in each process (tens of seconds and hundreds of MB
+        # per 100k names)
+        'fuzzy_dictionaries': False,
+    }
+    
+    # Pre-OCR text-presence gate (utils/text_gate.py)
+    TEXT_GATE_CONFIG: Dict[str, Any] = {
+        'enabled': True,
+        # Regions scoring below this skip OCR; lower keeps more (higher recall)
+        'min_score': 0.5,
+        # Larger regions are sampled down to about this size for scoring
+        'max_pixels': 200_000,
+    }
+    
+    # Tiled processing of very large images (utils/tiling.py)
+    TILING_CONFIG: Dict[str, Any] = {
+        # Tile images at least this large (None = only when asked)
+        'min_pixels': 40_000_000,
+        # Tile side at working resolution; bounds intermediate memory
+        'tile_size': 2048,
+        'overlap': 256,  # Overlap between neighbouring tiles at working resolution
+    }
+    
+    # Batch processing configurations
+    BATCH_CONFIG: Dict[str, Any] = {
+        'max_workers': None,  # Worker processes (None = all cores)
+        'max_in_flight': None,  # Images submitted at once (None = 2 x workers)
+        'timeout_seconds': 300  # Per-image time limit
+    }
+    
+    # Streaming pipeline (utils/pipeline.py)
+    PIPELINE_CONFIG: Dict[str, Any] = {
+        'stage_workers': {'denoise': 2, 'ocr': 2},  # Threads per stage (default 1)
+        'queue_size': 2,  # Records buffered between stages
+        # Images inside the pipeline at once (None = derived from workers)
+        'max_in_flight': None,
+    }
+    
+    # HTTP extraction service (utils/service.py)
+    SERVICE_CONFIG: Dict[str, Any] = {
+        'host': os.getenv('SERVICE_HOST', '127.0.0.1'),
+        'port': int(os.getenv('SERVICE_PORT', '8080')),
+        'max_batch_size': 8,  # Requests coalesced into one pipeline run
+        # How long the first request waits for others to join its batch
+        'batch_wait_ms': 10,
+        'batch_workers': 2,  # Batches processed at once
+        # Requests waiting for a batch; more are rejected with 503
+        'max_queue_depth': 64,
+        'request_timeout_seconds': 120,
+        'latency_window': 1024,  # Recent requests used for the p50/p95 latency figures
+    }
+    
+    # Result cache configurations
+    CACHE_CONFIG: Dict[str, Any] = {
+        'enabled': os.getenv('RESULT_CACHE_ENABLED', 'true').lower() == 'true',
+        'path': os.getenv(
+            'RESULT_CACHE_PATH', os.path.join(BASE_DIR, '.cache', 'results.sqlite3')
+        ),
+        'max_size_mb': 256,  # Least recently used results are evicted beyond this
+    }
+    
+    # Stage-level timing and profiling
+    PROFILING_CONFIG: Dict[str, Any] = {
+        'enabled': os.getenv('PROFILING_ENABLED', 'false').lower() == 'true',
+        'log_profiles': True  # Log one JSON line per profiled image
+    }
+    
     # Export configurations
-    EXPORT_CONFIG = {
+    EXPORT_CONFIG: Dict[str, Any] = {
         'formats': ['json', 'csv', 'txt', 'excel'],
         'default_format': 'json',
         'timestamp_format': '%Y%m%d_%H%M%S'
     }
     
     # UI configurations
-    UI_CONFIG = {
+    UI_CONFIG: Dict[str, Any] = {
         'max_file_size_mb': 10,
         'allowed_extensions': ['jpeg', 'jpg', 'png', 'bmp', 'tiff'],
         'show_confidence_scores': True,
         'show_visualisation': True,
-        'batch_processing_limit': 50
+        'batch_processing_limit': 50,
+        # Keep a copy of uploads in UPLOAD_FOLDER (written in the background)
+        'persist_uploads': True,
+        # Uploads whose OCR results are kept in memory across reruns
+        'stage_cache_entries': 8,
+        'stage_cache_ttl_seconds': 3600,  # How long those results are kept
     }
     
     @classmethod
@@ -92,8 +226,17 @@ class Config:
             },
             'ocr': cls.OCR_CONFIG,
             'preprocessing': cls.PREPROCESSING_CONFIG,
+            'regions': cls.REGION_CONFIG,
+            'tiling': cls.TILING_CONFIG,
+            'text_gate': cls.TEXT_GATE_CONFIG,
             'patterns': cls.EXTRACTION_PATTERNS,
             'keywords': cls.KEYWORDS,
+            'keyword_matching': cls.KEYWORD_CONFIG,
+            'batch': cls.BATCH_CONFIG,
+            'pipeline': cls.PIPELINE_CONFIG,
+            'service': cls.SERVICE_CONFIG,
+            'cache': cls.CACHE_CONFIG,
+            'profiling': cls.PROFILING_CONFIG,
             'export': cls.EXPORT_CONFIG,
             'ui': cls.UI_CONFIG
         }
@@ -17,7 +17,8 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/yourusername/Product-Information-Extractor",
-    packages=find_packages(),
+    packages=find_packages(exclude=["tests", "benchmarks"]),
+    py_modules=["config"],
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -33,6 +34,9 @@ setup(
     python_requires=">=3.8",
     install_requires=requirements,
     extras_require={
+        "fast": [
+            "tesserocr>=2.6.0",
+        ],
         "dev": [
             "pytest>=7.4.0",
             "black>=23.0.0",
@@ -46,6 +50,8 @@ setup(
     entry_points={
         "console_scripts": [
             "product-extractor=app:main",
+            "product-extractor-batch=utils.cli:main",
+            "product-extractor-service=utils.service:main",
         ],
     },
     include_package_data=True,
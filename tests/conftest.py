@@ -0,0 +1,24 @@
+# tests/conftest.py
+
+import pytest
+from config import Config
+from utils import result_cache, strategy_scheduler
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    """Keep strategy stats, cached results and indexes out of the repo's .cache."""
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    monkeypatch.setitem(
+        Config.OCR_CONFIG, 'strategy_stats_path', str(cache_dir / "strategy_stats.json")
+    )
+    monkeypatch.setitem(Config.CACHE_CONFIG, 'path', str(cache_dir / "results.sqlite3"))
+    monkeypatch.setitem(Config.KEYWORD_CONFIG, 'index_dir', str(cache_dir))
+    monkeypatch.setattr(strategy_scheduler, '_default_scheduler', None)
+    monkeypatch.setattr(result_cache, '_default_cache', None)
+
+    yield
+
+    # Close a cache the test opened before the previous one is restored
+    if result_cache._default_cache is not None:
+        result_cache._default_cache.close()
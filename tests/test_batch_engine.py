@@ -0,0 +1,55 @@
+# tests/test_batch_engine.py
+
+import signal
+import time
+import pytest
+import numpy as np
+import cv2
+from utils.batch_engine import BatchEngine, process_image_file
+
+def _wedge_on_stuck(image_path, settings):
+    """Stand-in worker task that ignores the alarm and hangs on "stuck" images."""
+    if image_path.startswith("stuck"):
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})
+        time.sleep(60)
+    return {"filename": image_path, "status": "success"}
+
+class WedgingEngine(BatchEngine):
+    task = staticmethod(_wedge_on_stuck)
+    deadline_grace = 0.2
+    poll_interval = 0.1
+
+class TestBatchEngine:
+    
+    def test_process_image_file_isolates_errors(self, tmp_path):
+        """Test that a missing image yields an error record instead of raising."""
+        result = process_image_file(str(tmp_path / "missing.jpg"))
+        
+        assert result['filename'] == "missing.jpg"
+        assert result['status'].startswith("error")
+    
+    def test_batch_results_in_input_order(self, tmp_path):
+        """Test that ordered batch runs return one record per input, in order."""
+        blank_path = str(tmp_path / "blank.png")
+        cv2.imwrite(blank_path, np.full((60, 80, 3), 255, dtype=np.uint8))
+        paths = [str(tmp_path / "missing.jpg"), blank_path]
+        
+        with BatchEngine(max_workers=2, timeout=60) as engine:
+            results = list(engine.run(paths, ordered=True))
+        
+        assert [r['filename'] for r in results] == ["missing.jpg", "blank.png"]
+        assert results[0]['status'].startswith("error")
+        assert not results[1]['status'].startswith("error")
+    
+    def test_wedged_worker_is_recycled(self):
+        """Test that a worker past its deadline is killed and later images still run."""
+        paths = ["stuck.png", "a.png", "b.png", "c.png"]
+        started = time.monotonic()
+        with WedgingEngine(max_workers=1, max_in_flight=2, timeout=0.3) as engine:
+            results = list(engine.run(paths, ordered=True))
+        
+        assert time.monotonic() - started < 10
+        assert engine.pools_recycled == 1
+        assert [r['filename'] for r in results] == paths
+        assert results[0]['status'] == "error: timed out after 0.3s"
+        assert [r['status'] for r in results[1:]] == ["success"] * 3
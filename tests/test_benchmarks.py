@@ -0,0 +1,57 @@
+# tests/test_benchmarks.py
+
+import pytest
+import numpy as np
+from benchmarks.synthetic_labels import (
+    generate_corpus,
+    load_corpus,
+    make_label_text,
+    render_label,
+)
+from benchmarks.run_benchmarks import compare_reports, score_extraction
+
+class TestBenchmarks:
+    
+    def test_corpus_is_deterministic(self, tmp_path):
+        """Test that the same seed produces the same labels and ground truth."""
+        first = generate_corpus(
+            str(tmp_path / "a"), resolutions=[320], per_combination=1, seed=7
+        )
+        second = generate_corpus(
+            str(tmp_path / "b"), resolutions=[320], per_combination=1, seed=7
+        )
+        
+        assert first == second
+        assert load_corpus(str(tmp_path / "a")) == first
+        assert np.array_equal(
+            render_label(first[0]['lines'], 320, seed=7),
+            render_label(first[0]['lines'], 320, seed=7),
+        )
+    
+    def test_label_text_contains_ground_truth(self):
+        """Test that every ground-truth field value appears in the rendered lines."""
+        label = make_label_text(10, seed=3)
+        text = ' '.join(label['lines'])
+        
+        assert len(label['lines']) == 10
+        for values in label['fields'].values():
+            for value in values:
+                assert value in text
+    
+    def test_score_and_compare(self):
+        """Test accuracy scoring and regression detection between two reports."""
+        entry = {'lines': ['Price £2.99'], 'fields': {'prices': ['£2.99']}}
+        scores = score_extraction(entry, ['Price £2.99'], {'prices': ['£2.99']})
+        assert scores['text_similarity'] == 1.0
+        assert scores['field_recall'] == 1.0
+        
+        def report(rate, denoise, recall):
+            return {'modes': {'otsu': {'summary': {
+                'images_per_second': rate,
+                'stage_seconds': {'denoise': denoise, 'rotate': 0.0001},
+                'accuracy': {'field_recall': recall}
+            }}}}
+        
+        assert compare_reports(report(2.0, 0.5, 0.9), report(1.95, 0.52, 0.9)) == []
+        regressions = compare_reports(report(2.0, 0.5, 0.9), report(1.0, 1.0, 0.5))
+        assert len(regressions) == 3
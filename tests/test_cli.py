@@ -0,0 +1,113 @@
+# tests/test_cli.py
+
+import json
+import pytest
+from utils import cli
+from utils.cli import iter_image_paths, main, repair_jsonl, run_extraction
+
+class FakeEngine:
+    """Batch engine stand-in that records which paths it was asked to process."""
+    
+    def __init__(self, statuses=None):
+        self.seen = []
+        self.statuses = statuses or {}
+    
+    def run_indexed(self, image_paths, ordered=True):
+        for index, path in enumerate(image_paths):
+            self.seen.append(path)
+            status = self.statuses.get(path, "no_text_detected")
+            yield index, {"filename": path.rsplit('/', 1)[-1], "status": status}
+
+class TestCLI:
+    
+    def test_iter_image_paths_filters_extensions(self, tmp_path):
+        """Test directory walking keeps only image files, recursively."""
+        (tmp_path / "sub").mkdir()
+        for name in ("a.jpg", "notes.txt", "sub/b.png"):
+            (tmp_path / name).write_bytes(b"")
+        
+        paths = list(iter_image_paths(str(tmp_path)))
+        assert [p.rsplit('/', 1)[-1] for p in paths] == ["a.jpg", "b.png"]
+    
+    def test_run_resumes_from_manifest(self, tmp_path):
+        """Test that a rerun skips images recorded in the manifest."""
+        output = str(tmp_path / "out.jsonl")
+        manifest = str(tmp_path / "out.jsonl.manifest")
+        paths = [str(tmp_path / f"{i}.jpg") for i in range(3)]
+        
+        first = run_extraction(paths[:2], output, manifest, FakeEngine())
+        engine = FakeEngine()
+        second = run_extraction(paths, output, manifest, engine)
+        
+        assert first['processed'] == 2
+        assert second['skipped'] == 2
+        assert engine.seen == [paths[2]]
+        with open(output) as f:
+            assert [json.loads(line)['path'] for line in f] == paths
+    
+    def test_resume_retries_timeouts(self, tmp_path):
+        """Test that a rerun retries an image that timed out, unless told not to."""
+        output = str(tmp_path / "out.jsonl")
+        manifest = str(tmp_path / "out.jsonl.manifest")
+        paths = [str(tmp_path / f"{i}.jpg") for i in range(3)]
+        # Older manifests list finished paths without an outcome
+        with open(manifest, 'w') as f:
+            f.write(paths[0] + '\n')
+        
+        first = run_extraction(
+            paths, output, manifest, FakeEngine({paths[1]: "error: timed out after 5s"})
+        )
+        skipping = FakeEngine()
+        run_extraction(paths, output, manifest, skipping, retry_failed=False)
+        retrying = FakeEngine()
+        second = run_extraction(paths, output, manifest, retrying)
+        third = run_extraction(paths, output, manifest, FakeEngine())
+        
+        assert first['errors'] == 1 and first['skipped'] == 1
+        assert skipping.seen == []
+        assert retrying.seen == [paths[1]] and second['errors'] == 0
+        assert third['processed'] == 0 and third['skipped'] == 3
+        with open(output) as f:
+            statuses = [
+                (json.loads(line)['path'], json.loads(line)['status']) for line in f
+            ]
+        assert statuses[-1] == (paths[1], "no_text_detected")
+    
+    def test_repair_jsonl_drops_partial_line(self, tmp_path):
+        """Test that a half-written trailing record is removed."""
+        output = tmp_path / "out.jsonl"
+        output.write_text('{"a": 1}\n{"b"')
+        
+        repair_jsonl(str(output))
+        assert output.read_text() == '{"a": 1}\n'
+        
+        # The tail is read in blocks, so the partial line may span several
+        output.write_text('{"a": 1}\n{"b": 2}\n' + '{"c": "' + 'x' * 50)
+        repair_jsonl(str(output), block_size=8)
+        assert output.read_text() == '{"a": 1}\n{"b": 2}\n'
+        repair_jsonl(str(output), block_size=8)
+        assert output.read_text() == '{"a": 1}\n{"b": 2}\n'
+        output.write_text('x' * 20)
+        repair_jsonl(str(output), block_size=8)
+        assert output.read_text() == ''
+    
+    def test_profile_flag_reaches_workers(self, tmp_path, monkeypatch):
+        """Test that --profile travels to the workers in the engine settings."""
+        created = []
+        
+        class RecordingEngine(FakeEngine):
+            def __init__(self, settings, **kwargs):
+                super().__init__()
+                created.append(settings)
+            
+            def __enter__(self):
+                return self
+            
+            def __exit__(self, *exc):
+                return False
+        
+        monkeypatch.setattr(cli, 'BatchEngine', RecordingEngine)
+        output = str(tmp_path / "out.jsonl")
+        assert main([str(tmp_path), '--output', output, '--profile']) == 0
+        assert main([str(tmp_path), '--output', output]) == 0
+        assert [settings['profile'] for settings in created] == [True, None]
@@ -0,0 +1,66 @@
+# tests/test_fuzzy_matcher.py
+
+import pytest
+from config import Config
+from utils.fuzzy_matcher import (
+    FuzzyKeywordMatcher,
+    edit_distance,
+    get_fuzzy_matcher,
+    normalise_ocr,
+)
+from utils.ocr_extraction import _keyword_acceptor, filter_text
+
+class TestFuzzyMatcher:
+    
+    def test_ocr_confusions_and_edits(self):
+        """Test that OCR misreads and single edits still find the keyword."""
+        matcher = FuzzyKeywordMatcher(Config.KEYWORDS)
+        
+        assert normalise_ocr("Wa1mart") == normalise_ocr("walmart")
+        assert matcher.lookup("Wa1mart")[0][:2] == ('walmart', 'retailer_keywords')
+        assert matcher.lookup("Tlde")[0][:2] == ('tide', 'brand_keywords')
+        assert matcher.lookup("deterqent") == [('detergent', 'product_keywords', 1)]
+        assert matcher.classify("Trader Joe5 Market") == 'retailer_keywords'
+    
+    def test_short_words_need_exact_match(self):
+        """Test that keywords below the minimum length do not match with edits."""
+        matcher = FuzzyKeywordMatcher(
+            {'product_keywords': ["soap", "gel"]}, min_length=5
+        )
+        
+        assert matcher.lookup("s0ap") == [('soap', 'product_keywords', 0)]
+        assert matcher.lookup("soup") == []
+        assert matcher.lookup("2.99") == []
+    
+    def test_edit_distance(self):
+        """Test the bounded optimal string alignment distance."""
+        assert edit_distance("tide", "tide", 1) == 0
+        assert edit_distance("tide", "tdie", 1) == 1
+        assert edit_distance("tide", "t", 1) == 2
+    
+    def test_filter_text_and_early_accept(self):
+        """Test that misread keywords are classified and accepted by the search."""
+        result = filter_text(["Wa1mart Supercenter", "Good Text"], [80.0, 80.0])
+        
+        assert result['retailer_names'] == ["Wa1mart Supercenter"]
+        
+        accept = _keyword_acceptor()
+        assert accept("C1orox Bleach", 70.0)
+        assert not accept("C1orox Bleach", 40.0)
+        assert not accept("Good Text", 70.0)
+    
+    def test_dictionaries_are_fuzzy_only_on_request(self, tmp_path, monkeypatch):
+        """Test that dictionary names join the fuzzy index only when opted in."""
+        csv_path = tmp_path / "master.csv"
+        csv_path.write_text("name,category\nZorblax Foods,retailer\n", encoding='utf-8')
+        monkeypatch.setitem(Config.KEYWORD_CONFIG, 'dictionaries', [str(csv_path)])
+        monkeypatch.setitem(Config.KEYWORD_CONFIG, 'index_dir', str(tmp_path))
+        
+        assert len(get_fuzzy_matcher()) == len(FuzzyKeywordMatcher(Config.KEYWORDS))
+        assert get_fuzzy_matcher().lookup("Zorb1ax Foods") == []
+        
+        monkeypatch.setitem(Config.KEYWORD_CONFIG, 'fuzzy_dictionaries', True)
+        assert get_fuzzy_matcher().lookup("Zorb1ax Foods")[0][:2] == (
+            'zorblax foods',
+            'retailer_keywords',
+        )
@@ -0,0 +1,76 @@
+# tests/test_keyword_index.py
+
+import os
+import pytest
+from config import Config
+from utils.keyword_index import (
+    KeywordIndex,
+    get_keyword_index,
+    open_keyword_index,
+    read_dictionary,
+    write_index,
+)
+from utils.ocr_extraction import filter_text
+
+class TestKeywordIndex:
+    
+    def test_lookup_and_multi_word_matches(self, tmp_path):
+        """Test exact lookups and whole-word n-gram matching in fragments."""
+        path = str(tmp_path / "keywords.idx")
+        count = write_index([
+            ("Trader Joe's", 'retailer_keywords'),
+            ("Trader", 'brand_keywords'),
+            ("Mr. Clean", 'brand_keywords'),
+            ("Acme", 'brand_keywords'),
+            ("Acme", 'retailer_keywords'),
+        ], path)
+        index = KeywordIndex(path)
+        
+        assert count == 4
+        assert index.lookup("ACME") == ['retailer_keywords', 'brand_keywords']
+        assert index.lookup("mr clean") == ['brand_keywords']
+        assert index.lookup("trader joe") == []
+        
+        matches = set(index.iter_matches("Shop at Trader Joe's, then Mr. Clean!"))
+        assert ('retailer_keywords', 2, 4) in matches
+        assert ('brand_keywords', 2, 3) in matches
+        assert ('brand_keywords', 5, 7) in matches
+        assert index.classify("acmeville") is None
+        assert index.classify("acme", current='product_keywords') == 'product_keywords'
+        index.close()
+    
+    def test_dictionary_sources_and_cache(self, tmp_path):
+        """Test CSV and text dictionaries, and that the built index is reused."""
+        csv_path = tmp_path / "master.csv"
+        csv_path.write_text(
+            "name,category\nZorblax Foods,retailer\nGlimmo,brands\n", encoding='utf-8'
+        )
+        txt_path = tmp_path / "products.txt"
+        txt_path.write_text("# products\nfizzwater\n", encoding='utf-8')
+        specs = [str(csv_path), f"product_keywords={txt_path}"]
+        
+        assert list(read_dictionary(str(csv_path))) == [
+            ("Zorblax Foods", 'retailer_keywords'), ("Glimmo", 'brand_keywords')
+        ]
+        
+        cache_dir = str(tmp_path / "cache")
+        index = open_keyword_index(specs, cache_dir)
+        assert index.lookup("fizzwater") == ['product_keywords']
+        built = os.listdir(cache_dir)
+        index.close()
+        
+        open_keyword_index(specs, cache_dir).close()
+        assert os.listdir(cache_dir) == built
+    
+    def test_filter_text_uses_index(self, tmp_path, monkeypatch):
+        """Test that filter_text classifies names found only in the dictionary."""
+        csv_path = tmp_path / "master.csv"
+        csv_path.write_text("name,category\nZorblax Foods,retailer\n", encoding='utf-8')
+        monkeypatch.setitem(Config.KEYWORD_CONFIG, 'dictionaries', [str(csv_path)])
+        monkeypatch.setitem(Config.KEYWORD_CONFIG, 'index_dir', str(tmp_path))
+        
+        result = filter_text(["Zorblax Foods Market"], [90.0])
+        
+        assert result['retailer_names'] == ["Zorblax Foods Market"]
+        monkeypatch.setitem(Config.KEYWORD_CONFIG, 'dictionaries', [])
+        assert get_keyword_index() is None
@@ -0,0 +1,74 @@
+# tests/test_keyword_matcher.py
+
+import random
+import pytest
+from config import Config
+from utils.keyword_matcher import CATEGORY_PRIORITY, KeywordMatcher, get_keyword_matcher
+
+class TestKeywordMatcher:
+    
+    def test_classify_matches_substring_scan(self):
+        """Test that classification agrees with the per-keyword substring checks."""
+        matcher = KeywordMatcher(Config.KEYWORDS)
+        words = [k for words in Config.KEYWORDS.values() for k in words] + [
+            "milk",
+            "x",
+            "&",
+            "'s",
+            "small",
+        ]
+        rng = random.Random(0)
+        
+        for _ in range(500):
+            text = ' '.join(rng.choice(words) for _ in range(rng.randint(0, 4)))
+            expected = next(
+                (category for category in CATEGORY_PRIORITY
+                 if any(keyword in text for keyword in Config.KEYWORDS[category])),
+                None
+            )
+            assert matcher.classify(text) == expected
+    
+    def test_multi_word_and_word_boundaries(self):
+        """Test multi-word keywords and whole-word matching."""
+        keywords = {'retailer_keywords': ["trader joe's"], 'brand_keywords': ["all"]}
+        substring = KeywordMatcher(keywords)
+        whole_words = KeywordMatcher(keywords, word_boundaries=True)
+        
+        assert substring.classify("shop at trader  joe's") is None
+        assert substring.classify("shop at trader joe's today") == 'retailer_keywords'
+        assert substring.classify("small bottle") == 'brand_keywords'
+        assert whole_words.classify("small bottle") is None
+        assert whole_words.classify("all purpose") == 'brand_keywords'
+    
+    def test_incremental_add_and_sync(self):
+        """Test that keywords added or removed after building are picked up."""
+        matcher = KeywordMatcher({'brand_keywords': ["tide"]})
+        assert matcher.classify("new acme soap") is None
+        
+        assert matcher.add('brand_keywords', ["Acme"]) == 1
+        assert matcher.classify("new acme soap") == 'brand_keywords'
+        
+        assert matcher.sync({'brand_keywords': ["tide"]})
+        assert matcher.classify("new acme soap") is None
+        assert not matcher.sync({'brand_keywords': ["tide"]})
+    
+    def test_shared_matcher_follows_config(self, monkeypatch):
+        """Test that the shared matcher tracks runtime changes to Config.KEYWORDS."""
+        keywords = {category: set(words) for category, words in Config.KEYWORDS.items()}
+        monkeypatch.setattr(Config, 'KEYWORDS', keywords)
+        assert get_keyword_matcher().classify("zorblax") is None
+        
+        keywords['retailer_keywords'].add("zorblax")
+        assert get_keyword_matcher().classify("zorblax") == 'retailer_keywords'
+    
+    def test_scan_survives_keywords_added_midway(self):
+        """Test that a running scan keeps its tables while keywords are added."""
+        matcher = KeywordMatcher({'brand_keywords': ["tide"]})
+        scan = matcher.iter_matches("tide yzq")
+        assert next(scan) == ('brand_keywords', 0, 4)
+        
+        matcher.add('brand_keywords', ["yz"])
+        assert matcher.categories("yz") == {'brand_keywords'}
+        matcher.add('retailer_keywords', ["yzq"])
+        assert list(scan) == []
+        assert ('retailer_keywords', 5, 8) in matcher.iter_matches("tide yzq")
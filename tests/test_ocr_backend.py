@@ -0,0 +1,118 @@
+# tests/test_ocr_backend.py
+
+import gc
+import threading
+from types import SimpleNamespace
+from typing import List
+import pytest
+import numpy as np
+from utils import ocr_backend
+from utils.ocr_backend import (
+    PytesseractBackend,
+    TesserocrBackend,
+    create_ocr_backend,
+    parse_tesseract_config,
+)
+
+class FakeTessAPI:
+    """Stands in for tesserocr.PyTessBaseAPI, recording its lifecycle."""
+
+    created: List["FakeTessAPI"] = []
+
+    def __init__(self, lang, psm, fail=False):
+        self.fail = fail
+        self.cleared = 0
+        self.ended = False
+        FakeTessAPI.created.append(self)
+
+    def SetImageBytes(self, *args):
+        pass
+
+    def Recognize(self):
+        if self.fail:
+            raise RuntimeError("recognition failed")
+
+    def GetIterator(self):
+        return None
+
+    def Clear(self):
+        self.cleared += 1
+
+    def End(self):
+        self.ended = True
+
+def _fake_tesserocr(fail=False):
+    FakeTessAPI.created = []
+    return SimpleNamespace(
+        PyTessBaseAPI=lambda **kwargs: FakeTessAPI(kwargs['lang'], kwargs['psm'], fail),
+        RIL=SimpleNamespace(WORD=3)
+    )
+
+class TestOCRBackend:
+    
+    def test_parse_tesseract_config(self):
+        """Test splitting a tesseract config string."""
+        language, psm, extra = parse_tesseract_config("--psm 6 -l eng")
+        assert language == 'eng'
+        assert psm == 6
+        assert extra == []
+        
+        language, psm, extra = parse_tesseract_config("--oem 1")
+        assert psm == 3
+        assert extra == ['--oem', '1']
+    
+    def test_auto_falls_back_without_native_binding(self, monkeypatch):
+        """Test that auto selection uses pytesseract when tesserocr is missing."""
+        monkeypatch.setattr(ocr_backend, 'tesserocr', None)
+        backend = create_ocr_backend("auto")
+        assert isinstance(backend, PytesseractBackend)
+        
+        with pytest.raises(ValueError):
+            create_ocr_backend("unknown")
+    
+    def test_pytesseract_backend_returns_word_data(self, monkeypatch):
+        """Test that the pytesseract backend keeps only the word-level keys."""
+        fake_data = {
+            'text': ['Tide'], 'conf': [91], 'left': [1], 'top': [2],
+            'width': [3], 'height': [4], 'level': [5], 'block_num': [1]
+        }
+        monkeypatch.setattr(
+            ocr_backend.pytesseract, 'image_to_data',
+            lambda image, config, output_type: fake_data
+        )
+        
+        data = PytesseractBackend().image_to_data(np.zeros((10, 10), dtype=np.uint8))
+        assert set(data) == set(ocr_backend.WORD_DATA_KEYS)
+        assert data['text'] == ['Tide']
+    
+    def test_tesserocr_handles_released_with_their_thread(self, monkeypatch):
+        """Test that each thread's handles are ended when the thread exits."""
+        monkeypatch.setattr(ocr_backend, 'tesserocr', _fake_tesserocr())
+        backend = TesserocrBackend()
+        image = np.zeros((10, 10), dtype=np.uint8)
+        
+        for _ in range(3):
+            thread = threading.Thread(
+                target=backend.image_to_data, args=(image, "--psm 6")
+            )
+            thread.start()
+            thread.join()
+        gc.collect()
+        assert len(FakeTessAPI.created) == 3
+        assert all(handle.ended for handle in FakeTessAPI.created)
+        
+        # Handles of live threads are reused, then ended by close()
+        backend.image_to_data(image, "--psm 6")
+        backend.image_to_data(image, "--psm 6")
+        assert len(FakeTessAPI.created) == 4 and not FakeTessAPI.created[-1].ended
+        backend.close()
+        assert FakeTessAPI.created[-1].ended
+    
+    def test_tesserocr_handle_cleared_after_failure(self, monkeypatch):
+        """Test that a failed recognition still clears the pooled handle."""
+        monkeypatch.setattr(ocr_backend, 'tesserocr', _fake_tesserocr(fail=True))
+        backend = TesserocrBackend()
+        with pytest.raises(RuntimeError):
+            backend.image_to_data(np.zeros((10, 10), dtype=np.uint8), "--psm 6")
+        assert FakeTessAPI.created[0].cleared == 1
+        backend.close()
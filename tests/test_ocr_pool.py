@@ -0,0 +1,125 @@
+# tests/test_ocr_pool.py
+
+import contextvars
+import threading
+import time
+import pytest
+import numpy as np
+from config import Config
+from utils.ocr_backend import OCRBackend, empty_word_data, set_ocr_backend
+from utils.ocr_extraction import extract_text_from_image
+from utils.ocr_pool import map_ordered, ocr_slot
+from utils.strategy_scheduler import StrategyScheduler
+
+_request_id = contextvars.ContextVar("request_id", default=None)
+
+class ConcurrencyProbe:
+    """Tracks how many callers are inside at once."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def __enter__(self):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def __exit__(self, *exc):
+        with self.lock:
+            self.active -= 1
+
+class SlowRegionBackend(OCRBackend):
+    """Reads nothing on the full image and 'W<crop width>' on each crop, slowly."""
+
+    name = "slow"
+
+    def __init__(self, full_shape, delay=0.05):
+        self.full_shape = full_shape
+        self.delay = delay
+        self.probe = ConcurrencyProbe()
+
+    def image_to_data(self, image, config_string="--psm 3"):
+        data = empty_word_data()
+        if image.shape[:2] == self.full_shape:
+            return data
+        with self.probe:
+            time.sleep(self.delay)
+        for key, value in zip(
+            ('text', 'conf', 'left', 'top', 'width', 'height'),
+            (f"W{image.shape[1]}", 95, 0, 0, 5, 5),
+        ):
+            data[key].append(value)
+        return data
+
+class TestOCRPool:
+
+    def test_map_ordered(self):
+        """Test that results keep item order and lanes share the caller's context."""
+        probe = ConcurrencyProbe()
+        _request_id.set("image-7")
+
+        def work(item):
+            with probe:
+                time.sleep(0.01 * (5 - item % 5))
+            return item * 10, _request_id.get()
+
+        results = map_ordered(work, list(range(10)), workers=4)
+
+        assert [value for value, _ in results] == [i * 10 for i in range(10)]
+        assert {request for _, request in results} == {"image-7"}
+        assert probe.peak > 1
+        assert map_ordered(work, [3], workers=4) == [(30, "image-7")]
+
+    def test_map_ordered_raises_first_error(self):
+        """Test that a failing item stops the map and its error reaches the caller."""
+        def work(item):
+            if item == 2:
+                raise ValueError("bad region")
+            return item
+
+        with pytest.raises(ValueError):
+            map_ordered(work, list(range(6)), workers=3)
+
+    def test_ocr_slot_limits_concurrency(self, monkeypatch):
+        """Test that OCR calls across threads never exceed the process-wide limit."""
+        monkeypatch.setitem(Config.OCR_CONFIG, 'max_ocr_threads', 2)
+        probe = ConcurrencyProbe()
+
+        def call():
+            with ocr_slot(), probe:
+                time.sleep(0.02)
+
+        threads = [threading.Thread(target=call) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert probe.peak == 2
+
+    def test_regions_searched_in_parallel(self, monkeypatch, tmp_path):
+        """Test that regions are OCR'd concurrently and merged in region order."""
+        monkeypatch.setitem(Config.TEXT_GATE_CONFIG, 'enabled', False)
+        monkeypatch.setitem(Config.OCR_CONFIG, 'max_ocr_threads', 4)
+        monkeypatch.setitem(Config.OCR_CONFIG, 'region_workers', 4)
+        canvas = np.zeros((400, 800, 3), dtype=np.uint8)
+        regions = [(20 + i * 130, 100, 60 + i * 10, 80) for i in range(6)]
+        backend = SlowRegionBackend(canvas.shape[:2])
+        scheduler = StrategyScheduler(
+            stats_path=str(tmp_path / "stats.json"), confidence_target=90.0
+        )
+
+        set_ocr_backend(backend)
+        try:
+            report = {}
+            texts, _ = extract_text_from_image(
+                canvas, regions, scheduler=scheduler, report=report
+            )
+        finally:
+            set_ocr_backend(None)
+
+        assert texts == [f"W{w + 20}" for _, _, w, _ in regions]
+        assert backend.probe.peak > 1
+        assert report['region_workers'] == 4
+        assert report['parallel_speedup'] > 1.5
@@ -0,0 +1,66 @@
+# tests/test_pattern_engine.py
+
+import re
+import pytest
+from config import Config
+from utils.pattern_engine import PatternEngine, get_pattern_engine
+from utils.ocr_extraction import extract_patterns, extract_patterns_batch
+
+class TestPatternEngine:
+    
+    def test_matches_findall_per_category(self):
+        """Test that the engine returns exactly what re.findall returns per pattern."""
+        texts = [
+            "Price £2.99 500g Exp: 12/03/2025",
+            "1.5kg 330ml 20% UPC: 01234 ABC1234",
+            "Visit www.example.com or mail info@example.co.uk",
+            ""
+        ]
+        engine = PatternEngine(Config.EXTRACTION_PATTERNS)
+        
+        for text in texts:
+            expected = {
+                name: re.findall(pattern, text, re.IGNORECASE)
+                for name, pattern in Config.EXTRACTION_PATTERNS.items()
+            }
+            assert engine.extract(text) == expected
+    
+    def test_overlapping_categories(self):
+        """Test that one span can match several categories."""
+        patterns = extract_patterns("Exp: 12/03/2025")
+        
+        assert patterns['expiry'] == ['Exp: 12/03/2025']
+        assert patterns['dates'] == ['12/03/2025']
+    
+    def test_batch_matches_single(self):
+        """Test that the batch API returns one result per text, in order."""
+        texts = ["£1.50", "no patterns", "250ml and 5%"]
+        
+        assert extract_patterns_batch(texts) == [
+            extract_patterns(text) for text in texts
+        ]
+        assert extract_patterns_batch([]) == []
+    
+    def test_batch_scan_keeps_texts_apart(self):
+        """Test that matches never join neighbouring texts in the batch scan."""
+        engine = PatternEngine({
+            **Config.EXTRACTION_PATTERNS,
+            'pairs': r'(\d+)\s*(kg|g)\b',
+            'leading': r'^\w+',
+        })
+        # "500" and "g" would form a weight if the texts were scanned as one
+        texts = ["Tide 500", "g 20", "kg", "Exp: 12/03/2025", "", "1kg 2g"]
+        
+        assert engine.extract_batch(texts) == [engine.extract(text) for text in texts]
+        assert engine.extract_batch(texts)[1]['weights'] == []
+    
+    def test_engine_recompiles_on_config_change(self, monkeypatch):
+        """Test that the shared engine follows changes to Config.EXTRACTION_PATTERNS."""
+        engine = get_pattern_engine()
+        assert get_pattern_engine() is engine
+        
+        # Patterns are changed by assigning a new dict
+        monkeypatch.setattr(Config, 'EXTRACTION_PATTERNS', {'codes': r'\bSKU\d+'})
+        assert get_pattern_engine().extract("sku42 SKU7") == {
+            'codes': ['sku42', 'SKU7']
+        }
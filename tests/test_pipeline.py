@@ -0,0 +1,158 @@
+# tests/test_pipeline.py
+
+import threading
+import time
+import pytest
+import numpy as np
+import cv2
+from config import Config
+from utils.ocr_backend import OCRBackend, empty_word_data, set_ocr_backend
+from utils.pipeline import Pipeline, Stage, run_pipeline
+
+def _encode(image: np.ndarray) -> bytes:
+    return cv2.imencode('.png', image)[1].tobytes()
+
+class LineBackend(OCRBackend):
+    """Reads the same line of text, at 60% confidence, from any image."""
+
+    name = "line"
+
+    def __init__(self):
+        self.calls = 0
+
+    def version(self):
+        return "line-1"
+
+    def image_to_data(self, image, config_string="--psm 3"):
+        self.calls += 1
+        data = empty_word_data()
+        for word in ("Zorblax", "Foods"):
+            for key, value in zip(
+                ('text', 'conf', 'left', 'top', 'width', 'height'),
+                (word, 60, 0, 0, 5, 5),
+            ):
+                data[key].append(value)
+        return data
+
+class TestPipeline:
+    
+    def test_process_statuses(self, tmp_path):
+        """Test missing files, images without text and intermediate results."""
+        blank = ("blank.png", _encode(np.zeros((60, 80, 3), dtype=np.uint8)))
+        pipeline = Pipeline(settings={'preprocessing_mode': 'otsu'})
+        
+        assert pipeline.process(str(tmp_path / "missing.jpg"))['status'].startswith(
+            "error"
+        )
+        result = pipeline.process(blank)
+        assert result['status'] == "no_text_detected"
+        assert 'product_info' not in result
+        assert 'profile' not in result
+        # Profiling can be asked for per run, e.g. by batch workers
+        profiled = Pipeline(settings={'preprocessing_mode': 'otsu', 'profile': True})
+        assert profiled.process(blank)['profile']['image'] == "blank.png"
+        
+        stages = []
+        record = Pipeline(settings={'preprocessing_mode': 'text_optimised'}).process(
+            blank,
+            on_stage=lambda name, record: stages.append(name),
+            keep_intermediate=True,
+        )
+        assert record['status'] == "success"
+        assert record['regions'] and record['original'].shape == (60, 80, 3)
+        assert 'ocr' in stages and 'filter' in stages
+        # The full-size denoised image is handed on to OCR rather than recomputed
+        assert record['denoise_report']['tier'] == "none"
+        assert record['ocr_report']['denoise']['reused'] is True
+    
+    def test_stream_is_ordered_and_bounded(self):
+        """Test that streaming keeps input order and never exceeds max_in_flight."""
+        active = [0, 0]
+        lock = threading.Lock()
+        
+        def enter(record, settings):
+            with lock:
+                active[0] += 1
+                active[1] = max(active[1], active[0])
+            record['value'] = int(record.pop('source')[1])
+        
+        def slow(record, settings):
+            time.sleep(0.001 * (record['value'] % 3))
+        
+        def leave(record, settings):
+            with lock:
+                active[0] -= 1
+            record['product_info'] = {'value': record['value']}
+            record['status'] = "success"
+        
+        stages = [
+            Stage('enter', enter),
+            Stage('slow', slow, workers=3),
+            Stage('leave', leave),
+        ]
+        pipeline = Pipeline(stages=stages, queue_size=1, max_in_flight=4)
+        sources = ((f"{i}.png", str(i)) for i in range(50))
+        
+        results = list(pipeline.run(sources, ordered=True))
+        
+        assert [r['product_info']['value'] for r in results] == list(range(50))
+        assert active[1] <= 4
+    
+    def test_stage_errors_and_early_stop(self):
+        """Test that a failing image does not stop the stream and consumers can stop."""
+        def parse(record, settings):
+            record['product_info'] = {'value': 10 // int(record.pop('source')[1])}
+            record['status'] = "success"
+        
+        pipeline = Pipeline(stages=[Stage('parse', parse)])
+        results = list(pipeline.run([("a", "0"), ("b", "5")]))
+        assert results[0]['status'].startswith("error")
+        assert results[1]['product_info'] == {'value': 2}
+        
+        endless = ((f"{i}", "1") for i in iter(int, 1))
+        stream = pipeline.run(endless)
+        assert next(stream)['status'] == "success"
+        stream.close()
+    
+    def test_run_pipeline_default_stages(self):
+        """Test the default stages streaming in-memory uploads."""
+        blank = _encode(np.zeros((60, 80, 3), dtype=np.uint8))
+        results = list(
+            run_pipeline(
+                [("a.png", blank), ("b.png", b"not an image")],
+                settings={'preprocessing_mode': 'otsu'},
+            )
+        )
+        
+        assert [r['filename'] for r in results] == ["a.png", "b.png"]
+        assert results[0]['status'] == "no_text_detected"
+        assert results[1]['status'].startswith("error")
+    
+    def test_cache_hits_are_classified_again(self, tmp_path, monkeypatch):
+        """Test that cached OCR texts pick up keyword and confidence changes."""
+        monkeypatch.setitem(
+            Config.CACHE_CONFIG, 'path', str(tmp_path / "results.sqlite3")
+        )
+        monkeypatch.setitem(Config.CACHE_CONFIG, 'enabled', True)
+        monkeypatch.setitem(Config.OCR_CONFIG, 'keyword_accept_confidence', None)
+        image = ("label.png", _encode(np.zeros((60, 80, 3), dtype=np.uint8)))
+        settings = {'preprocessing_mode': 'text_optimised', 'min_confidence': 30}
+        backend = LineBackend()
+        set_ocr_backend(backend)
+        try:
+            first = Pipeline(settings=settings).process(image)
+            calls = backend.calls
+            monkeypatch.setitem(
+                Config.KEYWORDS,
+                'retailer_keywords',
+                Config.KEYWORDS['retailer_keywords'] | {"zorblax"},
+            )
+            second = Pipeline(settings=settings).process(image)
+            strict = Pipeline(settings=dict(settings, min_confidence=70)).process(image)
+        finally:
+            set_ocr_backend(None)
+        
+        assert not first['cached'] and first['product_info']['retailer_names'] == []
+        assert second['cached'] and backend.calls == calls
+        assert second['product_info']['retailer_names'] == ["Zorblax Foods"]
+        assert strict['cached'] and strict['product_info']['retailer_names'] == []
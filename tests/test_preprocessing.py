@@ -28,6 +28,104 @@ class TestPreprocessing:
         deskewed = deskew_image(test_image)
         assert deskewed.shape == test_image.shape
     
+    def test_estimate_skew(self):
+        """Test that skew is found on a small copy and low confidence skips rotation."""
+        from utils.preprocessing import estimate_skew, auto_rotate_image
+        page = np.full((1200, 1600, 3), 255, dtype=np.uint8)
+        for i in range(10):
+            cv2.putText(
+                page,
+                "BEST BEFORE 12/05/2025",
+                (50, 100 + i * 105),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                2,
+                (0, 0, 0),
+                4,
+            )
+        matrix = cv2.getRotationMatrix2D((800, 600), 6, 1.0)
+        skewed = cv2.warpAffine(page, matrix, (1600, 1200), borderValue=(255, 255, 255))
+        
+        angle, confidence = estimate_skew(skewed, max_dimension=512)
+        assert abs(angle + 6) < 0.5
+        assert confidence > 0.5
+        
+        corrected_angle, _ = estimate_skew(auto_rotate_image(skewed))
+        assert abs(corrected_angle) < 0.5
+        
+        blank = np.full((200, 200, 3), 255, dtype=np.uint8)
+        assert estimate_skew(blank) == (0.0, 0.0)
+        assert auto_rotate_image(blank) is blank
+        assert auto_rotate_image(skewed, min_confidence=1.1) is skewed
+    
+    def test_working_resolution_maps_back_to_original(self):
+        """Test that large text is processed smaller and regions map back onto it."""
+        from utils.preprocessing import preprocess_image_data
+        from utils.text_regions import detect_text_regions
+        label = np.zeros((1200, 1600, 3), dtype=np.uint8)
+        for i in range(6):
+            cv2.putText(
+                label,
+                "PRICE 499",
+                (100, 150 + i * 180),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                4,
+                (255, 255, 255),
+                8,
+            )
+        
+        processed, original, transform = preprocess_image_data(
+            label, preprocessing_mode="otsu", denoise=False, return_transform=True
+        )
+        assert processed.shape[1] < original.shape[1]
+        
+        regions = transform.to_original(detect_text_regions(processed))
+        ink = cv2.cvtColor(label, cv2.COLOR_BGR2GRAY) > 128
+        covered = np.zeros_like(ink)
+        for x, y, w, h in regions:
+            assert x + w <= 1600 and y + h <= 1200
+            covered[y:y + h, x:x + w] = True
+        assert (ink & covered).sum() / ink.sum() > 0.99
+        assert covered.mean() < 0.5
+    
+    def test_image_transform(self):
+        """Test mapping regions through a resize and a rotation."""
+        from utils.preprocessing import ImageTransform, rotation_matrix
+        transform = ImageTransform((400, 600, 3))
+        assert transform.to_original([(1, 2, 3, 4)]) == [(1, 2, 3, 4)]
+        
+        transform.scale(0.5)
+        assert transform.to_original([(10, 20, 30, 40)]) == [(20, 40, 60, 80)]
+        assert transform.to_original([(290, 190, 50, 50)]) == [(580, 380, 20, 20)]
+        
+        matrix, _ = rotation_matrix((200, 300), 90)
+        transform.affine(matrix)
+        x, y, w, h = transform.to_original([(0, 0, 200, 300)])[0]
+        assert (x, y, w, h) == (0, 0, 600, 400)
+    
+    def test_denoise_tiers_follow_measured_noise(self):
+        """Test that the denoising tier is chosen from the estimated noise level."""
+        from utils.preprocessing import denoise_image, estimate_noise
+        rng = np.random.RandomState(0)
+        clean = np.full((200, 200), 200, dtype=np.uint8)
+        cv2.putText(clean, "SALE", (20, 120), cv2.FONT_HERSHEY_SIMPLEX, 2, 40, 4)
+        
+        tiers = {}
+        for sigma in (0, 3, 6, 12):
+            noisy = np.clip(clean + rng.randn(200, 200) * sigma, 0, 255).astype(
+                np.uint8
+            )
+            assert abs(estimate_noise(noisy) - sigma) < 0.25 * sigma + 0.5
+            report = {}
+            denoised = denoise_image(noisy, report=report)
+            assert denoised.shape == noisy.shape
+            assert report['seconds'] >= 0
+            tiers[sigma] = report['tier']
+        
+        assert tiers == {0: 'none', 3: 'median', 6: 'bilateral', 12: 'nlm'}
+        assert denoise_image(clean, 'none') is clean
+        with pytest.raises(ValueError):
+            denoise_image(clean, 'wavelet')
+    
     def test_invalid_preprocessing_mode(self):
         """Test handling of invalid preprocessing mode."""
         # This should use the default preprocessing
@@ -47,4 +145,29 @@ class TestPreprocessing:
         finally:
             import os
             if os.path.exists(test_image_path):
-                os.remove(test_image_path)
\ No newline at end of file
+                os.remove(test_image_path)
+    
+    def test_preprocess_image_data_from_bytes(self):
+        """Test preprocessing straight from encoded bytes without touching disk."""
+        from utils.preprocessing import preprocess_image_data
+        dummy_image = np.ones((100, 100, 3), dtype=np.uint8) * 255
+        _, encoded = cv2.imencode(".png", dummy_image)
+        
+        processed, original = preprocess_image_data(
+            encoded.tobytes(), preprocessing_mode="otsu"
+        )
+        assert processed.shape[:2] == original.shape[:2]
+        assert np.array_equal(original, dummy_image)
+    
+    def test_preprocess_image_data_copy_original(self):
+        """Test that the defensive copy is only made when requested."""
+        from utils.preprocessing import preprocess_image_data
+        dummy_image = np.ones((100, 100, 3), dtype=np.uint8) * 255
+        
+        _, original = preprocess_image_data(dummy_image, preprocessing_mode="otsu")
+        assert original is not dummy_image
+        
+        _, original = preprocess_image_data(
+            dummy_image, preprocessing_mode="otsu", copy_original=False
+        )
+        assert original is dummy_image
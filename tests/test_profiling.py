@@ -0,0 +1,33 @@
+# tests/test_profiling.py
+
+import pytest
+import numpy as np
+from utils.profiling import METRICS, count, profile_image, span, track_array
+
+class TestProfiling:
+    
+    def test_disabled_profiling_is_a_no_op(self):
+        """Test that spans and counters do nothing without an active profile."""
+        with profile_image("image.jpg", enabled=False) as profile:
+            with span('denoise'):
+                count('ocr_calls')
+        
+        assert profile is None
+    
+    def test_profile_records_stages_counters_and_arrays(self):
+        """Test that an active profile collects timings, counts and peak bytes."""
+        METRICS.reset()
+        with profile_image("image.jpg", enabled=True) as profile:
+            with span('denoise'):
+                track_array(np.zeros((10, 10), dtype=np.uint8))
+            with span('denoise'):
+                count('ocr_calls', 3)
+        
+        data = profile.to_dict()
+        assert data['stages']['denoise']['calls'] == 2
+        assert data['counters']['ocr_calls'] == 3
+        assert data['peak_array_bytes'] == 100
+        
+        text = METRICS.to_prometheus()
+        assert 'product_extractor_stage_calls_total{stage="denoise"} 2' in text
+        assert 'product_extractor_ocr_calls_total 3' in text
@@ -0,0 +1,81 @@
+# tests/test_result_cache.py
+
+import pytest
+from config import Config
+from utils.result_cache import ResultCache, cache_key
+
+SETTINGS = {
+    'preprocessing_mode': 'otsu',
+    'resize_width': None,
+    'denoise': True,
+    'min_confidence': 30,
+}
+
+class TestResultCache:
+    
+    def test_cache_key_depends_on_bytes_and_settings(self, monkeypatch):
+        """Test that the key follows the image, OCR settings, keywords and engine."""
+        key = cache_key(b"image", SETTINGS, version="v1")
+        
+        assert key == cache_key(
+            b"image", dict(SETTINGS, timeout_seconds=5), version="v1"
+        )
+        # Classification settings are applied again on every hit
+        assert key == cache_key(
+            b"image", dict(SETTINGS, min_confidence=50), version="v1"
+        )
+        assert key != cache_key(b"other", SETTINGS, version="v1")
+        assert key != cache_key(b"image", dict(SETTINGS, denoise=False), version="v1")
+        assert key != cache_key(b"image", SETTINGS, version="v2")
+        # Config that shapes the OCR output is part of the key, tuning is not
+        monkeypatch.setitem(Config.OCR_CONFIG, 'region_workers', 1)
+        assert key == cache_key(b"image", SETTINGS, version="v1")
+        for section, name, value in (
+            (Config.REGION_CONFIG, 'gap_ratio', 2.0),
+            (Config.TEXT_GATE_CONFIG, 'min_score', 0.9),
+            (Config.OCR_CONFIG, 'confidence_target', 95.0),
+            (Config.PREPROCESSING_CONFIG, 'target_text_height', 48),
+        ):
+            original = section[name]
+            monkeypatch.setitem(section, name, value)
+            assert key != cache_key(b"image", SETTINGS, version="v1")
+            monkeypatch.setitem(section, name, original)
+        # Keywords steer which region text the OCR search accepts
+        monkeypatch.setitem(
+            Config.KEYWORDS,
+            'brand_keywords',
+            Config.KEYWORDS['brand_keywords'] | {"zorblax"},
+        )
+        assert key != cache_key(b"image", SETTINGS, version="v1")
+    
+    def test_hit_and_miss_counters(self, tmp_path):
+        """Test that stored results are returned and lookups are counted."""
+        cache = ResultCache(str(tmp_path / "cache.sqlite3"))
+        value = {
+            'status': 'success',
+            'extracted_texts': ['Tide'],
+            'confidence_scores': [90.0],
+        }
+        
+        assert cache.get("a") is None
+        cache.put("a", value)
+        assert cache.get("a") == value
+        
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['entries'] == 1
+    
+    def test_lru_eviction_by_size(self, tmp_path):
+        """Test that least recently used entries are evicted beyond the size limit."""
+        cache = ResultCache(str(tmp_path / "cache.sqlite3"), max_bytes=250)
+        payload = {'text': 'x' * 100}
+        
+        cache.put("a", payload)
+        cache.put("b", payload)
+        cache.get("a")
+        cache.put("c", payload)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == payload
+        assert cache.get("c") == payload
@@ -0,0 +1,141 @@
+# tests/test_service.py
+
+import asyncio
+import json
+import threading
+import pytest
+import numpy as np
+import cv2
+from utils.service import (
+    ExtractionService,
+    LatencyTracker,
+    ServiceOverloaded,
+    start_http_server,
+)
+
+async def _request(reader, writer, method, path, body=b""):
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: test\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode()
+        + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode().strip()
+        if not line:
+            break
+        name, _, value = line.partition(':')
+        headers[name.lower()] = value.strip()
+    return status, json.loads(await reader.readexactly(int(headers['content-length'])))
+
+class TestService:
+
+    def test_concurrent_requests_are_batched(self):
+        """Test that concurrent requests are coalesced and each gets its own result."""
+        batch_sizes = []
+
+        def process_batch(sources):
+            batch_sizes.append(len(sources))
+            return [
+                {
+                    'filename': name,
+                    'status': "success",
+                    'product_info': {'size': len(data)},
+                }
+                for name, data in sources
+            ]
+
+        async def scenario():
+            async with ExtractionService(process_batch=process_batch, max_batch_size=4,
+                                         batch_wait_ms=50, batch_workers=1) as service:
+                results = await asyncio.gather(
+                    *(service.submit(f"{i}.png", b"x" * i) for i in range(1, 7))
+                )
+                return results, service.stats()
+
+        results, stats = asyncio.run(scenario())
+
+        assert [r['product_info']['size'] for r in results] == [1, 2, 3, 4, 5, 6]
+        assert batch_sizes == [4, 2]
+        assert stats['batches'] == 2 and stats['mean_batch_size'] == 3.0
+        assert stats['latency']['samples'] == 6
+
+    def test_queue_depth_limit(self):
+        """Test that requests beyond the queue depth are rejected, the rest complete."""
+        release = threading.Event()
+
+        def process_batch(sources):
+            release.wait(5)
+            return [{'filename': name, 'status': "success"} for name, _ in sources]
+
+        async def scenario():
+            async with ExtractionService(
+                process_batch=process_batch,
+                max_batch_size=1,
+                batch_wait_ms=0,
+                batch_workers=1,
+                max_queue_depth=2,
+            ) as service:
+                running = asyncio.ensure_future(service.submit("a.png", b"a"))
+                await asyncio.sleep(0.05)
+                queued = [
+                    asyncio.ensure_future(service.submit(name, b"b"))
+                    for name in ("b.png", "c.png")
+                ]
+                await asyncio.sleep(0)
+                with pytest.raises(ServiceOverloaded):
+                    await service.submit("d.png", b"d")
+                release.set()
+                results = await asyncio.gather(running, *queued)
+                return results, service.stats()
+
+        results, stats = asyncio.run(scenario())
+
+        assert [r['filename'] for r in results] == ["a.png", "b.png", "c.png"]
+        assert stats['rejected'] == 1 and stats['requests'] == 3
+
+    def test_latency_percentiles(self):
+        """Test nearest-rank p50/p95 over the latency window."""
+        tracker = LatencyTracker(window=100)
+        assert tracker.summary()['p50_seconds'] is None
+        for value in range(1, 201):
+            tracker.add(value / 1000)
+
+        summary = tracker.summary()
+        assert summary['samples'] == 100
+        assert summary['p50_seconds'] == 0.15
+        assert summary['p95_seconds'] == 0.195
+
+    def test_http_endpoints(self):
+        """Test extraction and status endpoints over a keep-alive HTTP connection."""
+        image = cv2.imencode('.png', np.zeros((60, 80, 3), dtype=np.uint8))[1].tobytes()
+
+        async def scenario():
+            async with ExtractionService(
+                settings={'preprocessing_mode': 'otsu'}
+            ) as service:
+                server = await start_http_server(service, '127.0.0.1', 0)
+                async with server:
+                    port = server.sockets[0].getsockname()[1]
+                    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                    responses = [
+                        await _request(
+                            reader, writer, "POST", "/extract?filename=blank.png", image
+                        ),
+                        await _request(reader, writer, "GET", "/extract"),
+                        await _request(reader, writer, "GET", "/stats"),
+                        await _request(reader, writer, "GET", "/missing"),
+                    ]
+                    writer.close()
+                    return responses
+
+        extracted, wrong_method, stats, missing = asyncio.run(scenario())
+
+        assert extracted[0] == 200
+        assert extracted[1]['filename'] == "blank.png"
+        assert extracted[1]['status'] == "no_text_detected"
+        assert wrong_method[0] == 405
+        assert stats[0] == 200 and stats[1]['requests'] == 1
+        assert missing[0] == 404
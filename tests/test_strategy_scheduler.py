@@ -0,0 +1,105 @@
+# tests/test_strategy_scheduler.py
+
+import os
+import threading
+import pytest
+import numpy as np
+from utils.strategy_scheduler import StrategyScheduler, default_strategies, read_stats
+
+class TestStrategyScheduler:
+    
+    def test_early_exit_on_confidence_target(self):
+        """Test that the search stops once the confidence target is reached."""
+        scheduler = StrategyScheduler(confidence_target=80.0)
+        search = scheduler.begin_image()
+        
+        calls = []
+        def run_ocr(image, psm):
+            calls.append(psm)
+            return "Tide Detergent", 90.0
+        
+        text, confidence = search.search_region(lambda name: np.zeros((5, 5)), run_ocr)
+        report = search.finish()
+        
+        assert text == "Tide Detergent"
+        assert len(calls) == 1
+        assert report['calls_saved'] == len(default_strategies()) - 1
+        assert report['early_exits'] == 1
+    
+    def test_call_budget(self):
+        """Test that the per-image call budget is enforced."""
+        scheduler = StrategyScheduler(confidence_target=101.0, max_calls_per_image=4)
+        search = scheduler.begin_image()
+        
+        for _ in range(3):
+            search.search_region(
+                lambda name: np.zeros((5, 5)), lambda image, psm: ("abc", 40.0)
+            )
+        
+        report = search.report()
+        assert report['ocr_calls'] == 4
+        assert report['budget_exhausted']
+        assert report['regions_skipped'] == 2
+    
+    def test_win_rate_ordering_is_persisted(self, tmp_path):
+        """Test that winning strategies move to the front and survive a reload."""
+        stats_path = str(tmp_path / "stats.json")
+        scheduler = StrategyScheduler(confidence_target=101.0, stats_path=stats_path)
+        winner = ('grey', 11)
+        
+        search = scheduler.begin_image()
+        for _ in range(5):
+            search.search_region(
+                lambda name: name,
+                lambda variant, psm: (
+                    "text",
+                    70.0 if (variant, psm) == winner else 10.0,
+                ),
+            )
+        search.finish()
+        
+        reloaded = StrategyScheduler(stats_path=stats_path)
+        assert reloaded.ordered_strategies()[0] == winner
+    
+    def test_concurrent_saves(self, tmp_path):
+        """Test that threads finishing images at once never fail and lose no counts."""
+        stats_path = str(tmp_path / "stats.json")
+        scheduler = StrategyScheduler(confidence_target=80.0, stats_path=stats_path)
+        errors = []
+        
+        def work():
+            try:
+                for _ in range(50):
+                    search = scheduler.begin_image()
+                    search.search_region(
+                        lambda name: name, lambda variant, psm: ("text", 90.0)
+                    )
+                    search.finish()
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert errors == []
+        assert sum(c['trials'] for c in read_stats(stats_path).values()) == 200
+        assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+    
+    def test_saves_from_separate_processes_merge(self, tmp_path):
+        """Test that schedulers sharing a file add up their counts."""
+        stats_path = str(tmp_path / "stats.json")
+        first = StrategyScheduler(stats_path=stats_path)
+        second = StrategyScheduler(stats_path=stats_path)
+        
+        first.record_region([('grey', 6)] * 3, ('grey', 6))
+        second.record_region([('grey', 6)] * 2, None)
+        first.save()
+        second.save()
+        first.save()
+        
+        stored = read_stats(stats_path)
+        assert stored['grey:6'] == {'wins': 1, 'trials': 5}
+        assert second.stats['grey:6'] == {'wins': 1, 'trials': 5}
@@ -0,0 +1,114 @@
+# tests/test_text_gate.py
+
+import pytest
+import numpy as np
+import cv2
+from utils.ocr_extraction import extract_text_from_image
+from utils.strategy_scheduler import StrategyScheduler
+from utils.text_gate import gate_regions, region_features, text_score
+
+
+def _text(
+    label: str,
+    font: int = cv2.FONT_HERSHEY_SIMPLEX,
+    scale: float = 1.2,
+    thickness: int = 2,
+) -> np.ndarray:
+    """Dark text on a light label, with a margin like a padded region crop."""
+    (width, height), baseline = cv2.getTextSize(label, font, scale, thickness)
+    crop = np.full((height + baseline + 16, width + 20), 235, dtype=np.uint8)
+    cv2.putText(crop, label, (10, height + 8), font, scale, 30, thickness)
+    return crop
+
+
+def _barcode() -> np.ndarray:
+    crop = np.full((80, 200), 235, dtype=np.uint8)
+    widths = np.random.RandomState(1).randint(1, 4, size=60)
+    x = 10
+    for width in widths:
+        if x + width > 190:
+            break
+        crop[10:70, x:x + width] = 20
+        x += width + 2
+    return crop
+
+def _non_text() -> dict:
+    """Samples the gate should reject."""
+    rs = np.random.RandomState(0)
+    y, x = np.mgrid[:80, :160]
+    disc = np.full((100, 100), 230, dtype=np.uint8)
+    cv2.circle(disc, (50, 50), 40, 40, -1)
+    return {
+        'flat': np.full((60, 200), 200, dtype=np.uint8),
+        'gradient': np.tile(np.linspace(50, 200, 200).astype(np.uint8), (60, 1)),
+        'texture': (rs.rand(60, 200) * 255).astype(np.uint8),
+        'glare': np.clip(
+            120 + 130 * np.exp(-((x - 80) ** 2 + (y - 40) ** 2) / 2048.0), 0, 255
+        ).astype(np.uint8),
+        'barcode': _barcode(),
+        'solid_logo': disc,
+    }
+
+class TestTextGate:
+
+    @pytest.mark.parametrize("label,font,thickness", [
+        ("BEST BEFORE 12/05", cv2.FONT_HERSHEY_SIMPLEX, 2),
+        ("Net Wt 500g", cv2.FONT_HERSHEY_DUPLEX, 3),
+        ("Ingredients", cv2.FONT_HERSHEY_COMPLEX, 2),
+        ("A", cv2.FONT_HERSHEY_SIMPLEX, 2),
+    ])
+    def test_text_passes(self, label, font, thickness):
+        """Test that printed text, bold fonts and single characters score high."""
+        crop = _text(label, font=font, thickness=thickness)
+        assert text_score(region_features(crop)) >= 0.9
+        assert text_score(region_features(255 - crop)) >= 0.9
+
+    def test_multiline_block_passes(self):
+        """Test that a tall block of small lines, sampled down, still counts as text."""
+        block = np.vstack(
+            [_text("Ingredients: wheat flour, water, salt", scale=0.6, thickness=1)] * 8
+        )
+        assert text_score(region_features(block)) >= 0.9
+        assert text_score(region_features(cv2.resize(block, None, fx=4, fy=4))) >= 0.9
+
+    def test_non_text_rejected(self):
+        """Test that flat areas, gradients, textures, glare and barcodes score low."""
+        for name, crop in _non_text().items():
+            assert text_score(region_features(crop)) < 0.3, name
+
+    def test_gate_regions(self):
+        """Test that the gate keeps text regions and drops the rest by threshold."""
+        canvas = np.full((400, 600), 235, dtype=np.uint8)
+        label = _text("BEST BEFORE")
+        canvas[20:20 + label.shape[0], 20:20 + label.shape[1]] = label
+        canvas[200:280, 300:500] = _barcode()
+        regions = [
+            (30, 28, label.shape[1] - 20, label.shape[0] - 16),
+            (310, 210, 180, 60),
+        ]
+
+        kept, report = gate_regions(canvas, regions)
+        assert kept == regions[:1]
+        assert report == {'regions_checked': 2, 'regions_gated': 1}
+
+        kept, report = gate_regions(canvas, regions, min_score=0)
+        assert kept == regions and report['regions_gated'] == 0
+
+        # A region covering most of the image is never gated
+        whole = [(0, 0, 600, 400)]
+        assert gate_regions(np.full((400, 600), 200, dtype=np.uint8), whole)[0] == whole
+
+    def test_ocr_report_counts_pruned_calls(self, tmp_path):
+        """Test that gated regions are reported as pruned OCR calls."""
+        canvas = np.zeros((300, 400, 3), dtype=np.uint8)
+        regions = [(20, 20, 120, 60), (200, 150, 150, 100)]
+        scheduler = StrategyScheduler(stats_path=str(tmp_path / "stats.json"))
+
+        report = {}
+        extract_text_from_image(canvas, regions, scheduler=scheduler, report=report)
+
+        strategies = len(scheduler.strategies)
+        assert report['regions_gated'] == 2
+        assert report['ocr_calls_pruned'] == 2 * strategies
+        assert report['ocr_calls'] == 0
+        assert report['exhaustive_calls'] == 2 * strategies
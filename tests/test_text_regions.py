@@ -0,0 +1,46 @@
+# tests/test_text_regions.py
+
+import pytest
+import numpy as np
+import cv2
+from utils.text_regions import consolidate_regions, detect_text_regions
+
+class TestTextRegions:
+    
+    def test_characters_merge_into_lines(self):
+        """Test that character boxes on the same line merge into one region."""
+        line_one = [(10 + i * 22, 10, 18, 30) for i in range(8)]
+        line_two = [(10 + i * 22, 100, 18, 30) for i in range(5)]
+        
+        regions, stats = consolidate_regions(line_one + line_two, merge_mode='lines')
+        
+        assert stats['regions_before'] == 13
+        assert stats['regions_after'] == 2
+        assert regions[0] == (10, 10, 7 * 22 + 18, 30)
+        assert regions[1][1] == 100
+    
+    def test_blocks_merge_lines(self):
+        """Test that nearby lines merge into a block in blocks mode."""
+        regions = [(10, 10, 200, 20), (10, 35, 180, 20), (10, 300, 100, 20)]
+        
+        merged, stats = consolidate_regions(regions, merge_mode='blocks')
+        
+        assert stats['regions_after'] == 2
+        assert merged[0] == (10, 10, 200, 45)
+    
+    def test_contained_regions_dropped(self):
+        """Test that regions fully inside another are removed."""
+        regions = [(0, 0, 100, 100), (10, 10, 20, 20), (200, 200, 30, 30)]
+        
+        merged, stats = consolidate_regions(regions, merge_mode='contained')
+        
+        assert merged == [(0, 0, 100, 100), (200, 200, 30, 30)]
+        assert stats['regions_after'] == 2
+    
+    def test_detect_text_regions(self):
+        """Test contour detection with the minimum area filter."""
+        image = np.zeros((100, 100), dtype=np.uint8)
+        cv2.rectangle(image, (10, 10), (40, 40), 255, -1)
+        cv2.rectangle(image, (70, 70), (72, 72), 255, -1)
+        
+        assert detect_text_regions(image) == [(10, 10, 31, 31)]
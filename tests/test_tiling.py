@@ -0,0 +1,148 @@
+# tests/test_tiling.py
+
+import tracemalloc
+import pytest
+import numpy as np
+import cv2
+from config import Config
+from utils.ocr_backend import OCRBackend, empty_word_data, set_ocr_backend
+from utils.pipeline import Pipeline
+from utils.text_regions import consolidate_regions, merge_seam_regions
+from utils.tiling import detect_text_regions_tiled, iter_tiles, should_tile
+
+def _poster(width: int = 3000, height: int = 1000) -> np.ndarray:
+    """Light text on a dark background, with lines straddling likely tile seams."""
+    poster = np.zeros((height, width, 3), dtype=np.uint8)
+    for row, x in enumerate((100, 380, 700, 1150, 1500)):
+        cv2.putText(
+            poster,
+            "BEST BEFORE 2025",
+            (x, 120 + row * 180),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            1.5,
+            (255, 255, 255),
+            3,
+        )
+    return poster
+
+class LabelBackend(OCRBackend):
+    """Reads the same confident word from any image."""
+
+    name = "label"
+
+    def image_to_data(self, image, config_string="--psm 3"):
+        data = empty_word_data()
+        for key, value in zip(
+            ('text', 'conf', 'left', 'top', 'width', 'height'), ("BEST", 95, 0, 0, 5, 5)
+        ):
+            data[key].append(value)
+        return data
+
+class TestTiling:
+
+    def test_tiles_cover_image_with_overlap(self):
+        """Test that tiles cover every pixel and neighbours overlap."""
+        shape = (1000, 2500)
+        covered = np.zeros(shape, dtype=np.int32)
+        tiles = list(iter_tiles(shape, 800, 100))
+        for x, y, w, h in tiles:
+            assert w <= 800 and h <= 800
+            covered[y:y + h, x:x + w] += 1
+
+        assert covered.min() >= 1
+        assert len(tiles) == 4 * 2
+        assert list(iter_tiles((300, 300), 800, 100)) == [(0, 0, 300, 300)]
+
+    def test_merge_seam_regions(self):
+        """Test that pieces cut by a seam join and duplicates collapse, others stay."""
+        regions = [
+            (90, 10, 30, 20),   # left piece, cut at the seam
+            (100, 10, 50, 20),  # right piece
+            (300, 50, 40, 20),  # seen whole by two tiles
+            (301, 50, 40, 20),
+            (500, 10, 40, 20),  # overlapping neighbours away from any seam
+            (530, 10, 40, 20),
+        ]
+        seams = [True, True, False, False, False, False]
+
+        merged = sorted(merge_seam_regions(regions, seams))
+        assert merged == [
+            (90, 10, 60, 20),
+            (300, 50, 41, 20),
+            (500, 10, 40, 20),
+            (530, 10, 40, 20),
+        ]
+
+    def test_tiled_detection_matches_text(self):
+        """Test that tiled detection finds every text line once across seams."""
+        poster = _poster()
+        regions, stats = detect_text_regions_tiled(
+            poster, "otsu", denoise=False, tile_size=400, overlap=64
+        )
+        assert stats['tiles'] > 4
+        assert stats['regions_after_seam_merge'] < stats['regions_before_seam_merge']
+
+        lines, _ = consolidate_regions(regions, merge_mode='lines')
+        assert len(lines) == 5
+
+        ink = cv2.cvtColor(poster, cv2.COLOR_BGR2GRAY) > 128
+        covered = np.zeros_like(ink)
+        for x, y, w, h in lines:
+            covered[y:y + h, x:x + w] = True
+        assert (ink & covered).sum() / ink.sum() > 0.99
+
+    def test_pipeline_tiles_large_images(self, monkeypatch):
+        """Test that the pipeline switches to tiles above the pixel threshold."""
+        monkeypatch.setitem(Config.CACHE_CONFIG, 'enabled', False)
+        monkeypatch.setitem(Config.TILING_CONFIG, 'tile_size', 400)
+        monkeypatch.setitem(Config.TILING_CONFIG, 'overlap', 64)
+        poster = _poster()
+        assert not should_tile(poster)
+        monkeypatch.setitem(Config.TILING_CONFIG, 'min_pixels', 1_000_000)
+        assert should_tile(poster) and not should_tile(poster, tiled=False)
+
+        image = ("poster.png", cv2.imencode('.png', poster)[1].tobytes())
+        record = Pipeline(
+            settings={'preprocessing_mode': 'otsu', 'denoise': False}
+        ).process(image, keep_intermediate=True)
+        assert record['tiled'] and record['tiling']['tiles'] > 4
+        assert record['region_stats']['regions_after'] == 5
+
+    def test_tiled_pipeline_peak_memory(self, monkeypatch):
+        """Test that OCR on a tiled image never builds full-size variants."""
+        monkeypatch.setitem(Config.CACHE_CONFIG, 'enabled', False)
+        poster = np.zeros((2000, 6000, 3), dtype=np.uint8)
+        for row in range(4):
+            for x in (200, 2200, 4200):
+                cv2.putText(
+                    poster,
+                    "BEST BEFORE",
+                    (x, 200 + row * 500),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    2,
+                    (255, 255, 255),
+                    4,
+                )
+        image = ("poster.png", cv2.imencode('.png', poster)[1].tobytes())
+        stage_peaks = {}
+
+        def on_stage(name, record):
+            stage_peaks[name] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+
+        set_ocr_backend(LabelBackend())
+        tracemalloc.start()
+        try:
+            record = Pipeline(
+                settings={'preprocessing_mode': 'otsu', 'tiled': True}
+            ).process(image, on_stage=on_stage, keep_intermediate=True)
+        finally:
+            tracemalloc.stop()
+            set_ocr_backend(None)
+
+        assert len(record['regions']) == 12
+        assert record['ocr_report']['denoise']['roi_local']
+        assert record['extracted_texts'] == ["BEST"]
+        # The decoded original is the only full-size array alive during OCR
+        assert stage_peaks['ocr'] < 1.1 * poster.nbytes
+        assert max(stage_peaks.values()) < 2 * poster.nbytes
@@ -0,0 +1,97 @@
+# tests/test_variant_cache.py
+
+import pytest
+import numpy as np
+from config import Config
+from utils.ocr_backend import OCRBackend, empty_word_data, set_ocr_backend
+from utils.ocr_extraction import PREPROCESSING_VARIANTS, extract_text_from_image
+from utils.strategy_scheduler import StrategyScheduler
+from utils.variant_cache import PreprocessingVariantCache
+
+class UnsureBackend(OCRBackend):
+    """Reads one low-confidence word, so every strategy gets tried."""
+
+    name = "unsure"
+
+    def image_to_data(self, image, config_string="--psm 3"):
+        data = empty_word_data()
+        for key, value in zip(
+            ('text', 'conf', 'left', 'top', 'width', 'height'), ("text", 20, 0, 0, 5, 5)
+        ):
+            data[key].append(value)
+        return data
+
+class TestVariantCache:
+    
+    def test_variants_built_once_and_sliced(self):
+        """Test that a variant is computed once and regions are views of it."""
+        image = np.arange(100, dtype=np.uint8).reshape(10, 10)
+        calls = []
+        
+        def invert(img):
+            calls.append(1)
+            return 255 - img
+        
+        with PreprocessingVariantCache(image, {'inverted': invert}) as cache:
+            first = cache.roi('inverted', 2, 2, 5, 5)
+            second = cache.roi('inverted', 0, 0, 3, 3)
+            
+            assert len(calls) == 1
+            assert np.shares_memory(first, cache.get('inverted'))
+            assert np.array_equal(second, 255 - image[0:3, 0:3])
+        
+        assert cache.nbytes() == 0
+    
+    def test_max_variants_evicts_least_recently_used(self):
+        """Test that the memory cap bounds the number of held variants."""
+        image = np.zeros((4, 4), dtype=np.uint8)
+        builders = {name: (lambda img: img + 1) for name in ('a', 'b', 'c')}
+        
+        cache = PreprocessingVariantCache(image, builders, max_variants=2)
+        for name in ('a', 'b', 'c'):
+            cache.get(name)
+        
+        assert cache.nbytes() == 2 * image.nbytes
+        cache.get('a')
+        assert cache.builds == 4
+    
+    def test_derived_and_supplied_variants(self):
+        """Test that derived variants reuse their source and supplied ones are kept."""
+        image = np.full((4, 4), 10, dtype=np.uint8)
+        calls = []
+        
+        def base(img):
+            calls.append('base')
+            return img + 1
+        
+        builders = {'base': base, 'derived': ('base', lambda img: img * 2)}
+        with PreprocessingVariantCache(image, builders) as cache:
+            assert cache.get('derived')[0, 0] == 22
+            assert cache.get('base')[0, 0] == 11
+            assert calls == ['base']
+        
+        with PreprocessingVariantCache(image, builders) as cache:
+            cache.put('base', np.full((4, 4), 5, dtype=np.uint8))
+            assert cache.get('derived')[0, 0] == 10
+            assert calls == ['base']
+            with pytest.raises(ValueError):
+                cache.put('base', np.zeros((2, 2), dtype=np.uint8))
+    
+    def test_each_variant_built_once_per_image(self, monkeypatch, tmp_path):
+        """Test that the default cap holds every variant, so none is rebuilt."""
+        monkeypatch.setitem(Config.TEXT_GATE_CONFIG, 'enabled', False)
+        image = np.random.default_rng(0).integers(0, 255, (200, 300, 3), dtype=np.uint8)
+        regions = [(10 + i * 70, 40, 50, 60) for i in range(4)]
+        scheduler = StrategyScheduler(
+            stats_path=str(tmp_path / "stats.json"), confidence_target=101.0
+        )
+        
+        set_ocr_backend(UnsureBackend())
+        try:
+            report = {}
+            extract_text_from_image(image, regions, scheduler=scheduler, report=report)
+        finally:
+            set_ocr_backend(None)
+        
+        assert report['ocr_calls'] > len(regions)
+        assert report['variants_built'] == len(PREPROCESSING_VARIANTS)
@@ -0,0 +1,122 @@
+# tests/test_word_index.py
+
+import pytest
+import numpy as np
+import cv2
+from config import Config
+from utils.ocr_backend import OCRBackend, empty_word_data, set_ocr_backend
+from utils.ocr_extraction import extract_text_from_image
+from utils.strategy_scheduler import StrategyScheduler
+from utils.word_index import WordIndex
+
+def _word_data(words):
+    """Build pytesseract-style word data from (text, conf, (x, y, w, h)) tuples."""
+    data = empty_word_data()
+    for text, conf, (x, y, w, h) in words:
+        for key, value in zip(
+            ('text', 'conf', 'left', 'top', 'width', 'height'), (text, conf, x, y, w, h)
+        ):
+            data[key].append(value)
+    return data
+
+class FullPageBackend(OCRBackend):
+    """Reads fixed words on the full image and a fixed line on any crop."""
+
+    name = "fake"
+
+    def __init__(self, full_words):
+        self.full_words = full_words
+        self.region_calls = 0
+
+    def image_to_data(self, image, config_string="--psm 3"):
+        if image.shape[:2] == (300, 600):
+            return _word_data(self.full_words)
+        self.region_calls += 1
+        return _word_data([("REREAD", 92, (0, 0, 10, 10))])
+
+class TestWordIndex:
+
+    def test_lookup_reuses_confident_coverage(self, monkeypatch):
+        """Test that covered, confident regions reuse words in reading order."""
+        index = WordIndex(_word_data([
+            ("BEFORE", 91, (130, 20, 100, 30)),
+            ("BEST", 95, (20, 20, 100, 30)),
+            ("2025", 88, (20, 60, 80, 30)),
+            ("x", 90, (240, 20, 10, 30)),
+            ("", -1, (0, 0, 600, 300)),
+            ("blurry", 40, (20, 200, 100, 30)),
+        ]))
+        assert len(index) == 5
+
+        assert index.lookup(
+            (20, 20, 230, 70), min_confidence=80, min_coverage=0.5
+        ) == pytest.approx(("BEST BEFORE 2025", (95 + 91 + 88) / 3))
+        # A low-confidence word inside means the region needs its own OCR
+        assert (
+            index.lookup((20, 200, 100, 30), min_confidence=80, min_coverage=0.5)
+            is None
+        )
+        # Too little of the region is covered by words
+        assert (
+            index.lookup((20, 20, 500, 150), min_confidence=80, min_coverage=0.5)
+            is None
+        )
+        # Nothing read there at all
+        assert (
+            index.lookup((400, 100, 100, 50), min_confidence=80, min_coverage=0.5)
+            is None
+        )
+        # Reuse can be switched off
+        monkeypatch.setitem(Config.OCR_CONFIG, 'word_reuse_coverage', None)
+        assert index.lookup((20, 20, 230, 70)) is None
+
+    def test_words_in_uses_grid(self):
+        """Test that only words centred in the region are returned across grid cells."""
+        words = [(f"w{i}", 90, (i * 50, (i % 3) * 50, 40, 20)) for i in range(12)]
+        index = WordIndex(_word_data(words), cell_size=64)
+        assert index.words_in((100, 0, 200, 200)) == [2, 3, 4, 5]
+        assert index.words_in((1000, 1000, 10, 10)) == []
+
+    def test_extraction_reuses_full_image_words(self, tmp_path):
+        """Test that covered regions skip OCR while the others are re-read."""
+        canvas = np.zeros((300, 600, 3), dtype=np.uint8)
+        for y in (60, 200):
+            cv2.putText(
+                canvas,
+                "BEST BEFORE",
+                (30, y),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                1.2,
+                (255, 255, 255),
+                2,
+            )
+        covered_region, weak_region = (30, 30, 230, 40), (30, 170, 230, 40)
+        backend = FullPageBackend([
+            ("BEST", 93, (30, 32, 95, 34)),
+            ("BEFORE", 90, (135, 32, 125, 34)),
+            ("BEST", 45, (30, 172, 95, 34)),
+            ("BEFORE", 50, (135, 172, 125, 34)),
+        ])
+        set_ocr_backend(backend)
+        try:
+            report = {}
+            scheduler = StrategyScheduler(
+                stats_path=str(tmp_path / "stats.json"), confidence_target=85.0
+            )
+            words = extract_text_from_image(
+                canvas,
+                [covered_region, weak_region],
+                scheduler=scheduler,
+                report=report,
+                as_table=True,
+            )
+        finally:
+            set_ocr_backend(None)
+
+        assert report['regions_reused'] == 1
+        assert report['regions_searched'] == 1
+        assert backend.region_calls == report['ocr_calls'] == 1
+        sources = dict(zip(words.texts, words.strategy_names))
+        assert sources["BEST BEFORE"] == 'word_reuse'
+        assert sources["REREAD"] in {key for key in scheduler.stats}
+        assert words.boxes[words.texts.index("REREAD")].tolist() == list(weak_region)
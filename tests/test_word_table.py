@@ -0,0 +1,108 @@
+# tests/test_word_table.py
+
+import os
+import pytest
+import numpy as np
+import pandas as pd
+from utils.data_export import export_words_to_csv
+from utils.ocr_extraction import summarise_word_data
+from utils.word_table import WordTable
+
+def _data():
+    return {
+        'text': ['', 'Tide', ' Original ', 'x', 'Café', 'noise'],
+        'conf': ['-1', 96, 88.5, 90, 75, 0.4],
+        'left': [0, 10, 60, 130, 10, 5],
+        'top': [0, 5, 5, 5, 40, 80],
+        'width': [200, 45, 65, 8, 50, 30],
+        'height': [100, 20, 20, 20, 20, 10]
+    }
+
+class TestWordTable:
+
+    def test_from_word_data(self):
+        """Test that word data is filtered and stored in one text buffer."""
+        words = WordTable.from_word_data(_data(), strategy='full_image')
+
+        assert words.texts == ['Tide', 'Original', 'x', 'Café']
+        assert words.buffer == "TideOriginalxCafé".encode('utf-8')
+        assert words.confidences.tolist() == pytest.approx([96, 88.5, 90, 75])
+        assert words.boxes[1].tolist() == [60, 5, 65, 20]
+        assert words.strategy_names == ['full_image'] * 4
+        assert len(WordTable.from_word_data(_data(), min_length=2)) == 3
+
+    def test_slicing_shares_buffer(self):
+        """Test that slices are views and filters keep the same text buffer."""
+        words = WordTable.from_word_data(_data())
+        head = words[:2]
+        assert np.shares_memory(head.records, words.records)
+        assert head.buffer is words.buffer
+
+        confident = words.filter_confidence(80)
+        assert confident.texts == ['Tide', 'Original', 'x']
+        assert confident.buffer is words.buffer
+        assert words[3].texts == ['Café'] and words.text(3) == 'Café'
+
+    def test_deduplicate(self):
+        """Test de-duplication keeps first occurrences and drops short texts."""
+        words = WordTable.from_columns(
+            ['Best Before', 'ok', 'best before ', 'Tide', 'TIDE', '500g'],
+            [90, 80, 70, 60, 50, 40],
+        )
+        unique = words.deduplicate()
+        assert unique.texts == ['Best Before', 'Tide', '500g']
+        assert unique.confidences.tolist() == [90, 60, 40]
+        assert len(WordTable.empty().deduplicate()) == 0
+
+    def test_concat_merges_strategies(self):
+        """Test that concatenation remaps strategy codes and offsets."""
+        first = WordTable.from_columns(
+            ['Tide', 'Pods'], [90, 80], strategies=['grey:6', 'full_image']
+        )
+        second = WordTable.from_columns(
+            ['Lidl', 'Aldi', 'Asda'],
+            [70, 60, 50],
+            strategies=['word_reuse', 'grey:6', 'word_reuse'],
+        )
+        joined = WordTable.concat(
+            [first[1:], second, WordTable.from_columns(['n/a'], [10])]
+        )
+
+        assert joined.texts == ['Pods', 'Lidl', 'Aldi', 'Asda', 'n/a']
+        assert joined.strategy_names == [
+            'full_image',
+            'word_reuse',
+            'grey:6',
+            'word_reuse',
+            None,
+        ]
+        assert joined.buffer == b"PodsLidlAldiAsdan/a"
+
+    def test_summarise_word_data(self):
+        """Test that summaries skip single characters and non-positive confidences."""
+        text, confidence = summarise_word_data(_data())
+        assert text == "Tide Original Café"
+        assert confidence == pytest.approx((96 + 88.5 + 75) / 3)
+        assert summarise_word_data(
+            {'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': []}
+        ) == ("", 0.0)
+
+    def test_export_words_to_csv(self, tmp_path):
+        """Test that the word table exports with its boxes and strategies."""
+        words = WordTable.from_word_data(_data(), strategy='full_image')
+        filename = export_words_to_csv("label.png", words, str(tmp_path))
+
+        df = pd.read_csv(os.path.join(tmp_path, filename))
+        assert df.columns.tolist() == [
+            'source_file',
+            'text',
+            'confidence',
+            'left',
+            'top',
+            'width',
+            'height',
+            'strategy',
+        ]
+        assert df['text'].tolist() == ['Tide', 'Original', 'x', 'Café']
+        assert df['left'].tolist() == [10, 60, 130, 10]
+        assert set(df['strategy']) == {'full_image'}
@@ -0,0 +1,261 @@
+# utils/batch_engine.py
+
+import functools
+import logging
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import Config
+from utils.ocr_pool import ocr_concurrency, set_ocr_concurrency
+from utils.pipeline import ImageSource, Pipeline, default_settings, source_name
+
+
+class ImageTimeoutError(BaseException):
+    """
+    Raised inside a worker when an image exceeds its time limit. Derives from
+    BaseException so per-stage error handling cannot swallow it.
+    """
+
+
+def _raise_timeout(signum, frame):
+    raise ImageTimeoutError("image processing timed out")
+
+
+def process_image_file(
+    image_path: ImageSource,
+    settings: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Run the full extraction pipeline on one image file and return a result
+    record. Errors are captured in the record's status rather than raised.
+    `image_path` may also be a (filename, bytes) pair for in-memory uploads.
+    """
+    settings = {**default_settings(), **(settings or {})}
+
+    # Enforce the time limit inside the worker so the slot is freed
+    timeout = settings.get('timeout_seconds') or 0
+    use_alarm = timeout > 0 and hasattr(signal, 'setitimer')
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    started = time.perf_counter()
+    try:
+        result = Pipeline(settings=settings).process(image_path)
+    except ImageTimeoutError:
+        result = {
+            "filename": source_name(image_path),
+            "status": f"error: timed out after {timeout}s"
+        }
+        logging.error(f"Timed out processing {result['filename']}")
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+    result["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+
+    return result
+
+
+class BatchEngine:
+    """
+    Runs process_image_file over many images on a process pool.
+
+    At most `max_in_flight` images are submitted at once, so arbitrarily long
+    inputs are consumed lazily. Results are yielded in input order
+    (`ordered=True`) or as they complete. A failing or slow image only
+    affects its own record: a worker still busy `deadline_grace` seconds
+    past the timeout is killed with its pool, and the other images in flight
+    are resubmitted to a fresh one.
+    """
+
+    # Function each worker runs per image
+    task: Callable[[ImageSource, Dict[str, Any]], Dict[str, Any]] = staticmethod(
+        process_image_file
+    )
+    # Seconds past the timeout before the parent gives up on a worker
+    deadline_grace = 5.0
+    # How often in-flight images are checked against their deadlines
+    poll_interval = 1.0
+
+    def __init__(
+        self,
+        settings: Optional[Dict[str, Any]] = None,
+        max_workers: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        timeout: Optional[float] = None
+    ):
+        batch_config = Config.BATCH_CONFIG
+        self.settings = {**default_settings(), **(settings or {})}
+        self.max_workers = (
+            max_workers or batch_config.get('max_workers') or os.cpu_count() or 1
+        )
+        self.max_in_flight = (
+            max_in_flight or batch_config.get('max_in_flight') or self.max_workers * 2
+        )
+        self.timeout = (
+            timeout if timeout is not None else batch_config.get('timeout_seconds')
+        )
+        self.settings['timeout_seconds'] = self.timeout
+        self.pools_recycled = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "BatchEngine":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Shut down the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Split the cores between worker processes so region threads do not
+            # oversubscribe them
+            cores = ocr_concurrency()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=functools.partial(
+                    set_ocr_concurrency, max(1, cores // self.max_workers)
+                )
+            )
+        return self._executor
+
+    def _recycle_executor(self, unfinished: Iterable[Future] = ()):
+        """
+        Kill every worker of the current pool and drop it, so a worker wedged
+        in native code stops holding a slot. The `unfinished` futures are
+        cancelled first; the next submit starts a new pool.
+        """
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        # shutdown(cancel_futures=True) needs Python 3.9
+        for future in unfinished:
+            future.cancel()
+        # Running futures cannot be cancelled and the executor has no public
+        # way to stop its workers, so the wedged process is killed through
+        # the private process table (absent on other implementations)
+        processes = getattr(executor, '_processes', None) or {}
+        for process in list(processes.values()):
+            process.kill()
+        executor.shutdown(wait=False)
+        self.pools_recycled += 1
+        logging.warning(
+            "Recycled the batch worker pool after a worker missed its deadline"
+        )
+
+    def _collect(self, future: Future, image_path: ImageSource) -> Dict[str, Any]:
+        """Turn a finished future into a result record, isolating worker crashes."""
+        try:
+            result: Dict[str, Any] = future.result()
+            return result
+        except Exception as e:
+            logging.error(f"Error processing {source_name(image_path)}: {str(e)}")
+            return {"filename": source_name(image_path), "status": f"error: {str(e)}"}
+
+    def run(
+        self,
+        image_paths: Iterable[ImageSource],
+        ordered: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Process images and yield one result record per input. Inputs are file
+        paths or (filename, bytes) pairs.
+        """
+        for _, result in self.run_indexed(image_paths, ordered=ordered):
+            yield result
+
+    def run_indexed(
+        self,
+        image_paths: Iterable[ImageSource],
+        ordered: bool = True
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Like run(), but yield (input index, result) pairs."""
+        inputs = iter(enumerate(image_paths))
+        pending: Dict[Future, Tuple[int, ImageSource]] = {}
+        # Workers enforce the timeout themselves; the parent-side deadline is
+        # a backstop for native code that ignores the alarm. It starts once the
+        # image is handed to a worker, so queueing time is not counted.
+        deadlines: Dict[Future, float] = {}
+        finished: Dict[int, Dict[str, Any]] = {}
+        next_to_yield = 0
+
+        def submit(index: int, image_path: ImageSource):
+            future = self._get_executor().submit(self.task, image_path, self.settings)
+            pending[future] = (index, image_path)
+
+        def submit_next() -> bool:
+            try:
+                index, image_path = next(inputs)
+            except StopIteration:
+                return False
+            submit(index, image_path)
+            return True
+
+        while len(pending) < self.max_in_flight and submit_next():
+            pass
+
+        while pending:
+            wait_for = None
+            if self.timeout:
+                now = time.monotonic()
+                for future in pending:
+                    if future not in deadlines and future.running():
+                        deadlines[future] = now + self.timeout + self.deadline_grace
+                wait_for = self.poll_interval
+                if deadlines:
+                    wait_for = min(wait_for, max(0.0, min(deadlines.values()) - now))
+            done, _ = wait(list(pending), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            completed: List[Tuple[int, Dict[str, Any]]] = []
+            for future in done:
+                index, image_path = pending.pop(future)
+                deadlines.pop(future, None)
+                completed.append((index, self._collect(future, image_path)))
+
+            now = time.monotonic()
+            expired = [
+                future for future, deadline in deadlines.items() if now >= deadline
+            ]
+            if expired:
+                for future in expired:
+                    index, image_path = pending.pop(future)
+                    del deadlines[future]
+                    completed.append((index, {
+                        "filename": source_name(image_path),
+                        "status": f"error: timed out after {self.timeout}s"
+                    }))
+                # Keep what already finished, and start the rest again on a fresh pool
+                restart = []
+                for future, (index, image_path) in list(pending.items()):
+                    if future.done():
+                        completed.append((index, self._collect(future, image_path)))
+                    else:
+                        restart.append((index, image_path))
+                unfinished = [future for future in pending if not future.done()]
+                pending.clear()
+                deadlines.clear()
+                self._recycle_executor(unfinished)
+                for index, image_path in restart:
+                    submit(index, image_path)
+
+            while len(pending) < self.max_in_flight and submit_next():
+                pass
+
+            if not ordered:
+                for item in completed:
+                    yield item
+                continue
+
+            finished.update(completed)
+            while next_to_yield in finished:
+                yield next_to_yield, finished.pop(next_to_yield)
+                next_to_yield += 1
@@ -0,0 +1,269 @@
+# utils/cli.py
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from typing import Iterable, Iterator, List, Optional, Set
+
+from config import Config
+from utils.batch_engine import BatchEngine
+from utils.profiling import METRICS
+
+
+def iter_image_paths(
+    source: str,
+    recursive: bool = True,
+    extensions: Optional[List[str]] = None
+) -> Iterator[str]:
+    """
+    Yield image paths from a directory, or from a text file listing one path per line.
+    """
+    suffixes = {
+        f".{ext.lower().lstrip('.')}"
+        for ext in (extensions or Config.UI_CONFIG['allowed_extensions'])
+    }
+
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() in suffixes:
+                    yield os.path.abspath(os.path.join(root, name))
+            if not recursive:
+                break
+    else:
+        base_dir = os.path.dirname(os.path.abspath(source))
+        with open(source, 'r', encoding='utf-8') as f:
+            for line in f:
+                path = line.strip()
+                if path and not path.startswith('#'):
+                    yield os.path.abspath(os.path.join(base_dir, path))
+
+
+# Manifest lines are "<path>\t<outcome>"; lines from older runs hold only the path
+MANIFEST_DONE = 'done'
+MANIFEST_FAILED = 'failed'
+
+
+def load_manifest(manifest_path: str, retry_failed: bool = True) -> Set[str]:
+    """
+    Return the image paths a rerun should skip: those recorded as done, and
+    with `retry_failed` False also those whose last attempt failed.
+    """
+    if not os.path.exists(manifest_path):
+        return set()
+    outcomes = {}
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                continue
+            path, _, outcome = line.rstrip('\n').rpartition('\t')
+            if not path:
+                path, outcome = outcome, MANIFEST_DONE
+            # Later attempts override earlier ones
+            outcomes[path] = outcome
+    return {
+        path for path, outcome in outcomes.items()
+        if outcome == MANIFEST_DONE or not retry_failed
+    }
+
+
+def repair_jsonl(output_path: str, block_size: int = 64 * 1024):
+    """
+    Drop a trailing partial line left behind by an interrupted run. Only the
+    tail is read, in blocks backwards from the end, up to the last newline.
+    """
+    if not os.path.exists(output_path):
+        return
+    with open(output_path, 'rb+') as f:
+        end = position = f.seek(0, os.SEEK_END)
+        while position > 0:
+            start = max(0, position - block_size)
+            f.seek(start)
+            block = f.read(position - start)
+            newline = block.rfind(b'\n')
+            if newline >= 0:
+                if start + newline + 1 < end:
+                    f.truncate(start + newline + 1)
+                return
+            position = start
+        f.truncate(0)
+
+
+def run_extraction(
+    paths: Iterable[str],
+    output_path: str,
+    manifest_path: str,
+    engine: BatchEngine,
+    retry_failed: bool = True
+) -> dict:
+    """
+    Process paths with the batch engine, appending one JSON line per image
+    and recording each path's outcome in the manifest so reruns can resume.
+    Reruns retry images that errored or timed out unless `retry_failed` is
+    False; the output then holds a line per attempt, the last one current.
+    """
+    done = load_manifest(manifest_path, retry_failed=retry_failed)
+    repair_jsonl(output_path)
+    counts = {
+        'processed': 0,
+        'skipped': 0,
+        'success': 0,
+        'no_text_detected': 0,
+        'errors': 0,
+    }
+    in_flight = {}
+
+    def pending_paths() -> Iterator[str]:
+        index = 0
+        for path in paths:
+            if path in done:
+                counts['skipped'] += 1
+                continue
+            in_flight[index] = path
+            index += 1
+            yield path
+
+    with open(output_path, 'a', encoding='utf-8') as output, open(
+        manifest_path, 'a', encoding='utf-8'
+    ) as manifest:
+        for index, result in engine.run_indexed(pending_paths(), ordered=False):
+            path = in_flight.pop(index)
+            record = {'path': path, **result}
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+            output.flush()
+            status = result['status']
+            succeeded = status == 'success' or status == 'no_text_detected'
+            # The manifest is written after the result, so a crash can only repeat work
+            manifest.write(
+                f"{path}\t{MANIFEST_DONE if succeeded else MANIFEST_FAILED}\n"
+            )
+            manifest.flush()
+
+            counts['processed'] += 1
+            if 'profile' in result:
+                METRICS.record_dict(result['profile'])
+            if succeeded:
+                counts[status] += 1
+            else:
+                counts['errors'] += 1
+
+    return counts
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command-line options for headless extraction."""
+    preprocessing = Config.PREPROCESSING_CONFIG
+    parser = argparse.ArgumentParser(
+        prog='product-extractor-batch',
+        description='Extract product information from a directory of images into JSONL.'
+    )
+    parser.add_argument(
+        'source', help='Image directory, or a text file with one image path per line'
+    )
+    parser.add_argument(
+        '-o',
+        '--output',
+        default='extraction_results.jsonl',
+        help='JSONL file results are appended to',
+    )
+    parser.add_argument(
+        '--manifest', help='Checkpoint manifest (default: <output>.manifest)'
+    )
+    parser.add_argument(
+        '--no-retry-failed',
+        action='store_true',
+        help='On resume, skip images that errored or timed out '
+        'instead of retrying them',
+    )
+    parser.add_argument(
+        '--no-recursive', action='store_true', help='Do not descend into subdirectories'
+    )
+    parser.add_argument(
+        '--mode', default=preprocessing['default_mode'], help='Preprocessing mode'
+    )
+    parser.add_argument(
+        '--resize-width',
+        type=int,
+        default=preprocessing['resize_width'],
+        help='Max width of the working copy regions are detected on '
+        '(0 = automatic: 1920 for images wider than 2000); OCR reads the original',
+    )
+    parser.add_argument('--no-denoise', action='store_true', help='Skip denoising')
+    parser.add_argument(
+        '--tiled',
+        action='store_true',
+        default=None,
+        help='Process every image in overlapping tiles '
+        '(default: only very large images)',
+    )
+    parser.add_argument(
+        '--min-confidence', type=float, default=Config.OCR_CONFIG['min_confidence']
+    )
+    parser.add_argument(
+        '--workers', type=int, help='Worker processes (default: all cores)'
+    )
+    parser.add_argument('--timeout', type=float, help='Per-image time limit in seconds')
+    parser.add_argument(
+        '--profile', action='store_true', help='Record per-stage timings for each image'
+    )
+    parser.add_argument(
+        '--metrics',
+        help='Write aggregated stage metrics here in Prometheus text format',
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for the product-extractor-batch console script."""
+    logging.basicConfig(level=logging.INFO)
+    args = build_parser().parse_args(argv)
+
+    if not os.path.exists(args.source):
+        print(f"Source not found: {args.source}", file=sys.stderr)
+        return 2
+
+    manifest_path = args.manifest or f"{args.output}.manifest"
+    settings = {
+        'preprocessing_mode': args.mode,
+        'resize_width': args.resize_width if args.resize_width > 0 else None,
+        'denoise': not args.no_denoise,
+        'min_confidence': args.min_confidence,
+        'tiled': args.tiled,
+        # Travels with each task, so workers started with spawn profile too
+        'profile': True if args.profile or args.metrics else None
+    }
+
+    started = time.perf_counter()
+    paths = iter_image_paths(args.source, recursive=not args.no_recursive)
+    with BatchEngine(
+        settings=settings, max_workers=args.workers, timeout=args.timeout
+    ) as engine:
+        counts = run_extraction(
+            paths,
+            args.output,
+            manifest_path,
+            engine,
+            retry_failed=not args.no_retry_failed,
+        )
+    elapsed = time.perf_counter() - started
+
+    if args.metrics:
+        with open(args.metrics, 'w', encoding='utf-8') as f:
+            f.write(METRICS.to_prometheus())
+
+    rate = counts['processed'] / elapsed if elapsed > 0 else 0.0
+    print(
+        f"Processed {counts['processed']} images "
+        f"({counts['skipped']} already done) in {elapsed:.1f}s "
+        f"[{rate:.2f} images/s]: {counts['success']} successful, "
+        f"{counts['no_text_detected']} no text, {counts['errors']} errors"
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,9 +3,31 @@
 import json
 import csv
 import pandas as pd
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Any
 import os
+from utils.word_table import WordTable
+
+# Background writer for persisting uploads off the request path
+_upload_writer = ThreadPoolExecutor(max_workers=2, thread_name_prefix="upload-writer")
+
+def save_upload(filename: str, data: bytes, output_dir: str) -> str:
+    """
+    Write uploaded image bytes to the upload folder and return the path.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, os.path.basename(filename))
+    with open(output_path, 'wb') as f:
+        f.write(data)
+    return output_path
+
+def save_upload_async(filename: str, data: bytes, output_dir: str) -> Future:
+    """
+    Persist an upload in the background. `data` must be immutable (bytes)
+    because it is written after this call returns.
+    """
+    return _upload_writer.submit(save_upload, filename, data, output_dir)
 
 def export_to_json(filename: str, data: Dict[str, List[str]], output_dir: str) -> str:
     """
@@ -67,7 +89,7 @@ def export_to_excel(filename: str, data: Dict[str, List[str]], output_dir: str)
     
     with pd.ExcelWriter(output_path) as writer:
         # Summary sheet
-        summary_data = {
+        summary_data: Dict[str, List[Any]] = {
             'Category': [],
             'Count': [],
             'Values': []
@@ -90,6 +112,22 @@ def export_to_excel(filename: str, data: Dict[str, List[str]], output_dir: str)
     
     return output_filename
 
+def export_words_to_csv(filename: str, words: WordTable, output_dir: str) -> str:
+    """
+    Export word-level OCR results (text, confidence, box, strategy) to CSV.
+    The table's numeric columns are handed to pandas without copying.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    base_name = os.path.splitext(filename)[0]
+    output_filename = f"{base_name}_words_{timestamp}.csv"
+    output_path = os.path.join(output_dir, output_filename)
+    
+    df = pd.DataFrame(words.columns(), copy=False)
+    df.insert(0, 'source_file', filename)
+    df.to_csv(output_path, index=False, encoding='utf-8')
+    
+    return output_filename
+
 def export_batch_results(results: List[Dict[str, Any]], output_dir: str) -> str:
     """
     Export batch processing results to a comprehensive report.
@@ -0,0 +1,254 @@
+# utils/fuzzy_matcher.py
+
+import re
+import threading
+from itertools import combinations
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from config import Config
+from utils.keyword_index import get_keyword_index
+from utils.keyword_matcher import CATEGORY_PRIORITY
+
+# Characters and pairs Tesseract commonly confuses, mapped to one canonical form.
+# Applied to keywords and OCR text alike, so these confusions cost no edits.
+_OCR_CONFUSIONS = [
+    ('rn', 'm'), ('vv', 'w'),
+    ('0', 'o'), ('1', 'l'), ('i', 'l'), ('|', 'l'), ('!', 'l'),
+    ('5', 's'), ('$', 's'), ('8', 'b'), ('@', 'a'),
+]
+_CONFUSION_PATTERN = re.compile(
+    '|'.join(re.escape(source) for source, _ in _OCR_CONFUSIONS)
+)
+_CONFUSION_MAP = dict(_OCR_CONFUSIONS)
+
+# Words may contain the symbols OCR substitutes for letters ("$hampoo", "Wa|mart")
+_TOKEN_PATTERN = re.compile(r"[\w$|!@]+(?:['\-&][\w$|!@]+)*|&")
+_LETTER = re.compile(r'[^\W\d_]')
+
+
+def normalise_ocr(word: str) -> str:
+    """Lowercase a word and fold OCR-confusable characters together."""
+    return _CONFUSION_PATTERN.sub(
+        lambda match: _CONFUSION_MAP[match.group()], word.lower()
+    )
+
+
+def ocr_tokens(text: str) -> List[str]:
+    """
+    Normalised words of `text`; tokens without any letter (prices, codes) are dropped.
+    """
+    return [
+        normalise_ocr(token) if _LETTER.search(token) else ''
+        for token in _TOKEN_PATTERN.findall(text)
+    ]
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance, or limit + 1 once it exceeds `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (
+                previous2 is not None
+                and i > 1
+                and j > 1
+                and a[i - 1] == b[j - 2]
+                and a[i - 2] == b[j - 1]
+            ):
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def _deletes(term: str, distance: int) -> Set[str]:
+    """Every string obtained by deleting up to `distance` characters from `term`."""
+    results = {term}
+    for count in range(1, min(distance, len(term)) + 1):
+        for positions in combinations(range(len(term)), count):
+            skip = set(positions)
+            results.add(
+                ''.join(char for index, char in enumerate(term) if index not in skip)
+            )
+    return results
+
+
+class FuzzyKeywordMatcher:
+    """
+    OCR-tolerant keyword lookup using a SymSpell-style deletion index.
+
+    Every keyword's deletions (up to `max_distance` characters) are indexed
+    once, so a lookup only generates the query's own deletions and verifies
+    the few candidates they hit, instead of comparing against every keyword.
+    Keywords shorter than `min_length` only match exactly after OCR
+    normalisation, which keeps short words like "gel" from matching noise.
+    """
+
+    def __init__(
+        self,
+        keywords: Optional[Mapping[str, Iterable[str]]] = None,
+        max_distance: int = 1,
+        min_length: int = 5
+    ):
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.max_words = 1
+        self._terms: List[Tuple[str, str, str]] = []  # (normalised, keyword, category)
+        self._known: Set[Tuple[str, str]] = set()
+        self._deletes: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        for category, words in (keywords or {}).items():
+            self.add(category, words)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def _limit(self, term: str) -> int:
+        return self.max_distance if len(term) >= self.min_length else 0
+
+    def add(self, category: str, keywords: Iterable[str]) -> int:
+        """Index more keywords under a category; returns how many were new."""
+        added = 0
+        with self._lock:
+            for keyword in keywords:
+                tokens = [token for token in ocr_tokens(keyword) if token]
+                term = ' '.join(tokens)
+                if not term or (term, category) in self._known:
+                    continue
+                self._known.add((term, category))
+                term_id = len(self._terms)
+                self._terms.append((term, keyword, category))
+                for deleted in _deletes(term, self._limit(term)):
+                    self._deletes.setdefault(deleted, []).append(term_id)
+                self.max_words = max(self.max_words, len(tokens))
+                added += 1
+        return added
+
+    def lookup(self, text: str) -> List[Tuple[str, str, int]]:
+        """
+        Return (keyword, category, distance) for keywords within the edit
+        limit of `text`, closest first.
+        """
+        term = ' '.join(token for token in ocr_tokens(text) if token)
+        return self._lookup_term(term) if term else []
+
+    def _lookup_term(self, term: str) -> List[Tuple[str, str, int]]:
+        limit = self._limit(term)
+        candidates: Set[int] = set()
+        for deleted in _deletes(term, limit):
+            candidates.update(self._deletes.get(deleted, ()))
+
+        matches = []
+        for term_id in candidates:
+            indexed, keyword, category = self._terms[term_id]
+            distance = edit_distance(term, indexed, min(limit, self._limit(indexed)))
+            if distance <= min(limit, self._limit(indexed)):
+                matches.append((keyword, category, distance))
+        matches.sort(key=lambda match: (match[2], match[0]))
+        return matches
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[str, str, int, int, int]]:
+        """
+        Yield (category, keyword, first word, end word, distance) for word n-grams of
+        `text`.
+        """
+        tokens = ocr_tokens(text)
+        for start in range(len(tokens)):
+            if not tokens[start]:
+                continue
+            term = ''
+            for end in range(start, min(len(tokens), start + self.max_words)):
+                if not tokens[end]:
+                    break
+                term = tokens[end] if end == start else f"{term} {tokens[end]}"
+                for keyword, category, distance in self._lookup_term(term):
+                    yield category, keyword, start, end + 1, distance
+
+    def classify(
+        self,
+        text: str,
+        priority: Sequence[str] = CATEGORY_PRIORITY,
+        current: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Return the highest-priority category matched in `text`, or `current` if higher.
+        """
+        rank: Dict[Optional[str], int] = {
+            category: position for position, category in enumerate(priority)
+        }
+        best = rank.get(current, len(priority))
+        for category, _, _, _, _ in self.iter_matches(text):
+            position = rank.get(category, len(priority))
+            if position < best:
+                best = position
+                if best == 0:
+                    break
+        return priority[best] if best < len(priority) else None
+
+    def contains_keyword(self, text: str) -> bool:
+        """True if any keyword appears in `text`, allowing for OCR errors."""
+        return next(self.iter_matches(text), None) is not None
+
+
+_default_matcher = None
+_default_source = None
+_default_lock = threading.Lock()
+
+
+def get_fuzzy_matcher() -> Optional[FuzzyKeywordMatcher]:
+    """
+    Return the shared fuzzy matcher over Config.KEYWORDS, or None when fuzzy
+    matching is disabled. Dictionary names are only added when
+    KEYWORD_CONFIG['fuzzy_dictionaries'] opts in, since their deletion index
+    is built in memory; otherwise they still match exactly through the
+    memory-mapped index. The deletion index is rebuilt only when the keywords
+    or settings change.
+    """
+    global _default_matcher, _default_source
+    keyword_config = Config.KEYWORD_CONFIG
+    if not keyword_config.get('fuzzy_matching'):
+        return None
+
+    source = (
+        {category: frozenset(words) for category, words in Config.KEYWORDS.items()},
+        (
+            tuple(keyword_config.get('dictionaries') or ())
+            if keyword_config.get('fuzzy_dictionaries')
+            else ()
+        ),
+        keyword_config.get('fuzzy_max_distance', 1),
+        keyword_config.get('fuzzy_min_length', 5),
+    )
+    with _default_lock:
+        if _default_matcher is None or _default_source != source:
+            matcher = FuzzyKeywordMatcher(
+                Config.KEYWORDS, max_distance=source[2], min_length=source[3]
+            )
+            keyword_index = get_keyword_index() if source[1] else None
+            if keyword_index is not None:
+                for keyword, categories in keyword_index.iter_entries():
+                    for category in categories:
+                        matcher.add(category, [keyword])
+            _default_matcher = matcher
+            _default_source = source
+    return _default_matcher
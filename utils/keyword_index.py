@@ -0,0 +1,324 @@
+# utils/keyword_index.py
+
+from array import array
+import csv
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from config import Config
+from utils.keyword_matcher import CATEGORY_PRIORITY
+
+logger = logging.getLogger("product_extractor.keyword_index")
+
+INDEX_MAGIC = b'PIEKIDX1'
+# Bump when the file layout or key normalisation changes
+INDEX_FORMAT_VERSION = 1
+
+# magic, format version, entries, longest key in words, categories JSON length
+_HEADER = struct.Struct('<8sIIII')
+
+# Words: letters/digits, allowing inner apostrophes and hyphens ("joe's", "pine-sol")
+_TOKEN_PATTERN = re.compile(r"\w+(?:['\-]\w+)*|&")
+
+
+def tokenise(text: str) -> List[str]:
+    """Split text into lowercase words; dictionary names and fragments share this."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def _category_name(value: str) -> str:
+    """Accept 'brand', 'brands' or 'brand_keywords' for a category column value."""
+    value = value.strip().lower()
+    if value.endswith('_keywords'):
+        return value
+    return f"{value[:-1] if value.endswith('s') else value}_keywords"
+
+
+def read_dictionary(
+    path: str, category: Optional[str] = None
+) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (name, category) from a dictionary file: a CSV with `name` and
+    `category` columns, or a text file with one name per line for `category`.
+    """
+    if path.lower().endswith('.csv'):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                name = (row.get('name') or '').strip()
+                row_category = category or row.get('category')
+                if name and row_category:
+                    yield name, _category_name(row_category)
+        return
+
+    if not category:
+        raise ValueError(f"A category is required for text dictionary {path}")
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            name = line.strip()
+            if name and not name.startswith('#'):
+                yield name, _category_name(category)
+
+
+def parse_dictionary_spec(spec: str) -> Tuple[str, Optional[str]]:
+    """
+    Split a 'category=path' spec; plain paths carry their categories in a CSV column.
+    """
+    category, separator, path = spec.partition('=')
+    if separator and not os.path.exists(spec):
+        return path.strip(), category.strip()
+    return spec.strip(), None
+
+
+class KeywordIndex:
+    """
+    Read-only, memory-mapped dictionary of names to keyword categories.
+
+    Names are stored as a sorted array of UTF-8 keys (words joined by single
+    spaces) with a parallel array of category bitmasks. Every process maps
+    the same file, so the operating system shares one copy of the pages
+    instead of each worker building its own Python sets. Lookups are binary
+    searches over the mapped keys.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Keyword index is empty: {path}")
+
+        magic, version, count, max_words, categories_len = _HEADER.unpack_from(
+            self._map, 0
+        )
+        if magic != INDEX_MAGIC or version != INDEX_FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Not a keyword index (or an outdated one): {path}")
+        position = _HEADER.size
+        meta = json.loads(self._map[position:position + categories_len].decode('utf-8'))
+        if meta['byteorder'] != sys.byteorder:
+            self.close()
+            raise ValueError(
+                f"Keyword index was built on a {meta['byteorder']}-endian "
+                f"machine: {path}"
+            )
+        position += categories_len
+        position += -position % 4
+
+        self.categories: List[str] = meta['categories']
+        self.count: int = count
+        self.max_words = max_words
+        view = memoryview(self._map)
+        self._offsets = view[position:position + 4 * (count + 1)].cast('I')
+        position += 4 * (count + 1)
+        self._masks = view[position:position + count]
+        self._keys = view[position + count:]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _key(self, index: int) -> bytes:
+        return self._keys[self._offsets[index]:self._offsets[index + 1]].tobytes()
+
+    def _search(self, key: bytes) -> int:
+        """Return the first index whose key is >= `key`."""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def lookup(self, name: str) -> List[str]:
+        """Return the categories a name belongs to, or an empty list."""
+        key = ' '.join(tokenise(name)).encode('utf-8')
+        index = self._search(key)
+        if index < self.count and self._key(index) == key:
+            return self._categories_for(self._masks[index])
+        return []
+
+    def iter_entries(self) -> Iterator[Tuple[str, List[str]]]:
+        """Yield every (name, categories) pair in key order."""
+        for index in range(self.count):
+            yield self._key(index).decode('utf-8'), self._categories_for(
+                self._masks[index]
+            )
+
+    def _categories_for(self, mask: int) -> List[str]:
+        return [
+            category
+            for bit, category in enumerate(self.categories)
+            if mask & (1 << bit)
+        ]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[str, int, int]]:
+        """
+        Yield (category, first word, end word) for every dictionary name
+        appearing as whole words in `text`.
+        """
+        words = [word.encode('utf-8') for word in tokenise(text)]
+        for start in range(len(words)):
+            key = b''
+            for end in range(start, min(len(words), start + self.max_words)):
+                key = words[end] if end == start else key + b' ' + words[end]
+                index = self._search(key)
+                if index >= self.count:
+                    break
+                found = self._key(index)
+                if found == key:
+                    for category in self._categories_for(self._masks[index]):
+                        yield category, start, end + 1
+                    # A longer name may continue with the next word
+                    if index + 1 >= self.count or not self._key(index + 1).startswith(
+                        key + b' '
+                    ):
+                        break
+                elif not found.startswith(key + b' '):
+                    # No name starts with these words, so longer n-grams cannot match
+                    break
+
+    def classify(
+        self,
+        text: str,
+        priority: Sequence[str] = CATEGORY_PRIORITY,
+        current: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Return the highest-priority category found in `text`, or `current` if
+        that ranks higher. Stops early once the top-priority category is seen.
+        """
+        rank: Dict[Optional[str], int] = {
+            category: position for position, category in enumerate(priority)
+        }
+        best = rank.get(current, len(priority))
+        for category, _, _ in self.iter_matches(text):
+            position = rank.get(category, len(priority))
+            if position < best:
+                best = position
+                if best == 0:
+                    break
+        return priority[best] if best < len(priority) else None
+
+    def close(self):
+        for attribute in ('_offsets', '_masks', '_keys'):
+            view = getattr(self, attribute, None)
+            if view is not None:
+                view.release()
+        self._map.close()
+        self._file.close()
+
+
+def write_index(entries: Iterable[Tuple[str, str]], path: str) -> int:
+    """
+    Build an index file from (name, category) pairs and atomically move it
+    into place. Returns the number of distinct names.
+    """
+    masks: Dict[bytes, int] = {}
+    categories: List[str] = []
+    max_words = 1
+    for name, category in entries:
+        words = tokenise(name)
+        if not words:
+            continue
+        if category not in categories:
+            if len(categories) == 8:
+                raise ValueError("A keyword index supports at most 8 categories")
+            categories.append(category)
+        key = ' '.join(words).encode('utf-8')
+        masks[key] = masks.get(key, 0) | (1 << categories.index(category))
+        max_words = max(max_words, len(words))
+
+    keys = sorted(masks)
+    meta = json.dumps({'categories': categories, 'byteorder': sys.byteorder}).encode(
+        'utf-8'
+    )
+    offsets = [0]
+    for key in keys:
+        offsets.append(offsets[-1] + len(key))
+    if offsets[-1] >= 2 ** 32:
+        raise ValueError("Keyword index is too large")
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(
+                _HEADER.pack(
+                    INDEX_MAGIC, INDEX_FORMAT_VERSION, len(keys), max_words, len(meta)
+                )
+            )
+            f.write(meta)
+            f.write(b'\0' * (-(_HEADER.size + len(meta)) % 4))
+            f.write(array('I', offsets).tobytes())
+            f.write(bytes(masks[key] for key in keys))
+            f.write(b''.join(keys))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(keys)
+
+
+def index_cache_path(specs: Sequence[str], cache_dir: str) -> str:
+    """Cache file name derived from the sources' paths, sizes and modification times."""
+    digest = hashlib.sha256(f"v{INDEX_FORMAT_VERSION}".encode('utf-8'))
+    for spec in specs:
+        path, category = parse_dictionary_spec(spec)
+        stat = os.stat(path)
+        entry = f"{os.path.abspath(path)}|{category}|{stat.st_size}|{stat.st_mtime_ns}"
+        digest.update(entry.encode('utf-8') + b"\n")
+    return os.path.join(cache_dir, f"keywords_{digest.hexdigest()[:16]}.idx")
+
+
+def open_keyword_index(specs: Sequence[str], cache_dir: str) -> KeywordIndex:
+    """
+    Open the cached index for these dictionary sources, building it first if
+    the sources changed since it was last built.
+    """
+    path = index_cache_path(specs, cache_dir)
+    if not os.path.exists(path):
+        def entries() -> Iterator[Tuple[str, str]]:
+            for spec in specs:
+                yield from read_dictionary(*parse_dictionary_spec(spec))
+        count = write_index(entries(), path)
+        logger.info(f"Built keyword index with {count} names at {path}")
+    return KeywordIndex(path)
+
+
+_default_index = None
+_default_specs = None
+_default_lock = threading.Lock()
+
+
+def get_keyword_index() -> Optional[KeywordIndex]:
+    """
+    Return the shared index for Config.KEYWORD_CONFIG['dictionaries'], or
+    None when no dictionaries are configured.
+    """
+    global _default_index, _default_specs
+    keyword_config = Config.KEYWORD_CONFIG
+    specs = tuple(keyword_config.get('dictionaries') or ())
+    if not specs:
+        return None
+    if _default_index is None or _default_specs != specs:
+        with _default_lock:
+            if _default_index is None or _default_specs != specs:
+                if _default_index is not None:
+                    _default_index.close()
+                _default_index = open_keyword_index(specs, keyword_config['index_dir'])
+                _default_specs = specs
+    return _default_index
@@ -0,0 +1,225 @@
+# utils/keyword_matcher.py
+
+import threading
+from collections import deque
+from typing import (
+    Deque, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+)
+
+from config import Config
+
+# Order in which filter_text assigns a fragment to a keyword category
+CATEGORY_PRIORITY = ('product_keywords', 'retailer_keywords', 'brand_keywords')
+
+# Per state: transitions, failure link and (category, keyword length) matches
+SearchTables = Tuple[List[Dict[str, int]], List[int], List[List[Tuple[str, int]]]]
+_EMPTY_TABLES: SearchTables = ([{}], [0], [[]])
+
+
+def normalise_keyword(keyword: str) -> str:
+    """Lowercase and collapse whitespace, as filter_text does for fragments."""
+    return ' '.join(keyword.lower().split())
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over categorised keywords.
+
+    A fragment is scanned once, left to right, regardless of how many
+    keywords there are. Keywords are added to the trie incrementally; the
+    search tables are rebuilt lazily before the next search and published
+    in one assignment, so scans already running keep a consistent copy
+    while keywords are added. With
+    `word_boundaries` a keyword only counts when it is not part of a longer
+    word, so "all" no longer matches inside "small".
+    """
+
+    def __init__(
+        self,
+        keywords: Optional[Mapping[str, Iterable[str]]] = None,
+        word_boundaries: bool = False
+    ):
+        self.word_boundaries = word_boundaries
+        # Trie under construction, only touched with the lock held
+        self._goto: List[Dict[str, int]] = [{}]
+        # Per state: (category, keyword length) for keywords ending here
+        self._outputs: List[List[Tuple[str, int]]] = [[]]
+        self._keywords: Dict[str, Set[str]] = {}
+        # Published (goto, fail, matches) tables searches read; never mutated,
+        # None when the trie has changed since they were built
+        self._tables: Optional[SearchTables] = _EMPTY_TABLES
+        # Raw keyword sets last passed to sync(), to skip unchanged configs cheaply
+        self._source: Dict[str, frozenset] = {}
+        self._lock = threading.Lock()
+        if keywords:
+            self.sync(keywords)
+
+    def __len__(self) -> int:
+        return sum(len(words) for words in self._keywords.values())
+
+    def add(self, category: str, keywords: Iterable[str]) -> int:
+        """Insert keywords under a category; returns how many were new."""
+        with self._lock:
+            added = self._insert(category, keywords)
+            if added:
+                self._tables = None
+                self._source = {}
+        return added
+
+    def _insert(self, category: str, keywords: Iterable[str]) -> int:
+        """Add keywords to the trie under construction; the lock must be held."""
+        added = 0
+        known = self._keywords.setdefault(category, set())
+        for keyword in keywords:
+            keyword = normalise_keyword(keyword)
+            if not keyword or keyword in known:
+                continue
+            known.add(keyword)
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._outputs.append([])
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._outputs[state].append((category, len(keyword)))
+            added += 1
+        return added
+
+    def sync(self, keywords: Mapping[str, Iterable[str]]) -> bool:
+        """
+        Bring the automaton in line with a keyword dict such as Config.KEYWORDS.
+        Additions are inserted incrementally; removals rebuild the trie.
+        Returns True if anything changed.
+        """
+        snapshot = {category: frozenset(words) for category, words in keywords.items()}
+        if snapshot == self._source:
+            return False
+
+        wanted = {
+            category: {normalise_keyword(k) for k in words} - {''}
+            for category, words in keywords.items()
+        }
+        removed = any(
+            known - wanted.get(category, set())
+            for category, known in self._keywords.items()
+        )
+        if removed:
+            # Rebuild the trie under the lock; searches keep the old tables
+            with self._lock:
+                self._goto, self._outputs, self._keywords = [{}], [[]], {}
+                for category, words in wanted.items():
+                    self._insert(category, words)
+                self._tables = None
+            self._source = snapshot
+            return True
+
+        changed = False
+        for category, words in wanted.items():
+            new = words - self._keywords.get(category, set())
+            if new:
+                changed = self.add(category, new) > 0 or changed
+        self._source = snapshot
+        return changed
+
+    def _link(self) -> SearchTables:
+        """
+        Build fresh search tables from the trie: failure links breadth-first,
+        with outputs merged along them. The lock must be held.
+        """
+        goto = [dict(transitions) for transitions in self._goto]
+        fail = [0] * len(goto)
+        matches = [list(output) for output in self._outputs]
+        queue: Deque[int] = deque()
+        for state in goto[0].values():
+            fail[state] = 0
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            for char, child in goto[state].items():
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[child] = goto[fallback].get(char, 0)
+                matches[child].extend(matches[fail[child]])
+                queue.append(child)
+
+        return goto, fail, matches
+
+    def _search_tables(self) -> SearchTables:
+        """Return the current search tables, building them if keywords changed."""
+        tables = self._tables
+        if tables is None:
+            with self._lock:
+                if self._tables is None:
+                    self._tables = self._link()
+                tables = self._tables
+        return tables
+
+    def _is_word(self, text: str, start: int, end: int) -> bool:
+        return (start == 0 or not text[start - 1].isalnum()) and (
+            end == len(text) or not text[end].isalnum()
+        )
+
+    def iter_matches(self, text: str) -> Iterable[Tuple[str, int, int]]:
+        """
+        Yield (category, start, end) for each keyword occurrence in lowercase `text`.
+        """
+        goto, fail, matches = self._search_tables()
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for category, length in matches[state]:
+                start, end = index + 1 - length, index + 1
+                if not self.word_boundaries or self._is_word(text, start, end):
+                    yield category, start, end
+
+    def categories(self, text: str) -> Set[str]:
+        """Return every category with at least one keyword in lowercase `text`."""
+        return {category for category, _, _ in self.iter_matches(text)}
+
+    def classify(
+        self, text: str, priority: Sequence[str] = CATEGORY_PRIORITY
+    ) -> Optional[str]:
+        """
+        Return the highest-priority category matching lowercase `text`, or None.
+        The scan stops as soon as the top-priority category is seen.
+        """
+        best = len(priority)
+        rank = {category: position for position, category in enumerate(priority)}
+        for category, _, _ in self.iter_matches(text):
+            position = rank.get(category, best)
+            if position < best:
+                best = position
+                if best == 0:
+                    break
+        return priority[best] if best < len(priority) else None
+
+
+_default_matcher = None
+_default_lock = threading.Lock()
+
+
+def get_keyword_matcher() -> KeywordMatcher:
+    """
+    Return the shared matcher for Config.KEYWORDS, picking up keywords added
+    or removed at runtime and the KEYWORD_CONFIG word-boundary setting.
+    """
+    global _default_matcher
+    word_boundaries = bool(Config.KEYWORD_CONFIG.get('word_boundaries'))
+    with _default_lock:
+        if (
+            _default_matcher is None
+            or _default_matcher.word_boundaries != word_boundaries
+        ):
+            _default_matcher = KeywordMatcher(
+                Config.KEYWORDS, word_boundaries=word_boundaries
+            )
+        else:
+            _default_matcher.sync(Config.KEYWORDS)
+    return _default_matcher
@@ -0,0 +1,254 @@
+# utils/ocr_backend.py
+
+import os
+import shlex
+import threading
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pytesseract
+
+from config import Config
+
+try:
+    import tesserocr
+except ImportError:  # pragma: no cover - depends on the local install
+    tesserocr = None
+
+# Keys returned by every backend, matching pytesseract.Output.DICT
+WORD_DATA_KEYS = ('text', 'conf', 'left', 'top', 'width', 'height')
+
+
+def parse_tesseract_config(config_string: str) -> Tuple[str, int, List[str]]:
+    """
+    Split a tesseract command-line config into language, PSM and any other options.
+    """
+    language = Config.OCR_CONFIG.get('language', 'eng')
+    psm = 3
+    extra = []
+
+    tokens = shlex.split(config_string or "")
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == '--psm' and i + 1 < len(tokens):
+            psm = int(tokens[i + 1])
+            i += 2
+        elif token == '-l' and i + 1 < len(tokens):
+            language = tokens[i + 1]
+            i += 2
+        else:
+            extra.append(token)
+            i += 1
+
+    return language, psm, extra
+
+
+def empty_word_data() -> Dict[str, List[Any]]:
+    """Return an empty word-level result in pytesseract's DICT layout."""
+    return {key: [] for key in WORD_DATA_KEYS}
+
+
+class OCRBackend:
+    """Base class for OCR engines returning word-level results."""
+
+    name = "base"
+
+    def image_to_data(
+        self, image: np.ndarray, config_string: str = "--psm 3"
+    ) -> Dict[str, List[Any]]:
+        """Run OCR on an image and return word boxes, texts and confidences."""
+        raise NotImplementedError
+
+    def version(self) -> str:
+        """Return the engine version, used to key cached results."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release any engine resources held by the backend."""
+
+
+class PytesseractBackend(OCRBackend):
+    """
+    Backend that shells out to the tesseract binary through pytesseract.
+    Each call spawns a process and reloads the language model.
+    """
+
+    name = "pytesseract"
+
+    def __init__(self):
+        self._version: Optional[str] = None
+
+    def image_to_data(
+        self, image: np.ndarray, config_string: str = "--psm 3"
+    ) -> Dict[str, List[Any]]:
+        data = pytesseract.image_to_data(
+            image, config=config_string, output_type=pytesseract.Output.DICT
+        )
+        return {key: data[key] for key in WORD_DATA_KEYS}
+
+    def version(self) -> str:
+        # Querying the binary spawns a process, so only do it once
+        if self._version is None:
+            try:
+                self._version = f"{self.name}-{pytesseract.get_tesseract_version()}"
+            except Exception:
+                return f"{self.name}-unknown"
+        return self._version
+
+
+class _HandlePool:
+    """One thread's API handles, ended when the thread exits."""
+
+    def __init__(self):
+        self.handles: Dict[Tuple[str, int], Any] = {}
+        # Thread-locals are dropped with their thread; the finalizer must not
+        # hold the pool itself, only its handles
+        weakref.finalize(self, _end_handles, self.handles)
+
+    def release(self):
+        _end_handles(self.handles)
+
+
+def _end_handles(handles: Dict[Tuple[str, int], Any]):
+    while handles:
+        _, handle = handles.popitem()
+        handle.End()
+
+
+class TesserocrBackend(OCRBackend):
+    """
+    Backend that keeps long-lived in-process Tesseract API handles.
+
+    Handles are not thread-safe, so each worker thread gets its own pool
+    keyed by (language, PSM), released when the thread exits. Images are
+    handed to Tesseract as raw numpy buffers, so no temporary files or
+    subprocesses are involved.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, tessdata_path: Optional[str] = None):
+        if tesserocr is None:
+            raise ImportError("tesserocr is not installed")
+        self.tessdata_path = tessdata_path or os.getenv('TESSDATA_PREFIX')
+        self._local = threading.local()
+        self._pools: "weakref.WeakSet[_HandlePool]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._fallback = PytesseractBackend()
+
+    def _get_handle(self, language: str, psm: int):
+        """Return this thread's API handle for a language and PSM, creating it once."""
+        pool = getattr(self._local, 'pool', None)
+        if pool is None:
+            pool = self._local.pool = _HandlePool()
+            with self._lock:
+                self._pools.add(pool)
+
+        key = (language, psm)
+        handle = pool.handles.get(key)
+        if handle is None:
+            kwargs = {'lang': language, 'psm': psm}
+            if self.tessdata_path:
+                kwargs['path'] = self.tessdata_path
+            handle = tesserocr.PyTessBaseAPI(**kwargs)
+            pool.handles[key] = handle
+        return handle
+
+    def image_to_data(
+        self, image: np.ndarray, config_string: str = "--psm 3"
+    ) -> Dict[str, List[Any]]:
+        language, psm, extra = parse_tesseract_config(config_string)
+
+        # Options we cannot map onto the API handle go through the binary
+        if extra:
+            return self._fallback.image_to_data(image, config_string)
+
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+        if bytes_per_pixel == 3:
+            # Tesseract expects RGB ordering, OpenCV images are BGR
+            image = np.ascontiguousarray(image[:, :, ::-1])
+
+        handle = self._get_handle(language, psm)
+        data = empty_word_data()
+        level = tesserocr.RIL.WORD
+        try:
+            handle.SetImageBytes(
+                image.tobytes(), width, height, bytes_per_pixel, image.strides[0]
+            )
+            handle.Recognize()
+
+            iterator = handle.GetIterator()
+            if iterator is not None:
+                for word in tesserocr.iterate_level(iterator, level):
+                    text = word.GetUTF8Text(level)
+                    box = word.BoundingBox(level)
+                    if text is None or box is None:
+                        continue
+                    x1, y1, x2, y2 = box
+                    data['text'].append(text)
+                    data['conf'].append(word.Confidence(level))
+                    data['left'].append(x1)
+                    data['top'].append(y1)
+                    data['width'].append(x2 - x1)
+                    data['height'].append(y2 - y1)
+        finally:
+            # A pooled handle must not carry this image into the next call
+            handle.Clear()
+        return data
+
+    def version(self) -> str:
+        return f"{self.name}-{tesserocr.tesseract_version().split()[1]}"
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = list(self._pools), weakref.WeakSet()
+        for pool in pools:
+            pool.release()
+        self._local = threading.local()
+
+
+_BACKENDS: Dict[str, Callable[[], OCRBackend]] = {
+    'pytesseract': PytesseractBackend,
+    'tesserocr': TesserocrBackend,
+}
+_default_backend = None
+_default_lock = threading.Lock()
+
+
+def create_ocr_backend(name: str = "auto") -> OCRBackend:
+    """
+    Create an OCR backend by name. "auto" prefers the in-process engine
+    and falls back to pytesseract when the native binding is missing.
+    """
+    if name == "auto":
+        name = 'tesserocr' if tesserocr is not None else 'pytesseract'
+
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown OCR backend: {name}")
+
+    return _BACKENDS[name]()
+
+
+def get_ocr_backend() -> OCRBackend:
+    """Return the process-wide OCR backend configured in Config.OCR_CONFIG."""
+    global _default_backend
+    if _default_backend is None:
+        with _default_lock:
+            if _default_backend is None:
+                _default_backend = create_ocr_backend(
+                    Config.OCR_CONFIG.get('backend', 'auto')
+                )
+    return _default_backend
+
+
+def set_ocr_backend(backend: Optional[OCRBackend]):
+    """Replace the process-wide OCR backend (None resets to the configured one)."""
+    global _default_backend
+    with _default_lock:
+        if _default_backend is not None and _default_backend is not backend:
+            _default_backend.close()
+        _default_backend = backend
@@ -1,25 +1,48 @@
 # utils/ocr_extraction.py
 
-import pytesseract
 from PIL import Image
 import re
+import time
 import cv2
 import numpy as np
-from typing import List, Tuple, Dict, Optional
+from typing import Any, Callable, List, Tuple, Dict, Optional, Union
 from config import Config
+from utils.ocr_backend import empty_word_data, get_ocr_backend
+from utils.ocr_pool import map_ordered, ocr_concurrency, ocr_slot
+from utils.fuzzy_matcher import get_fuzzy_matcher
+from utils.keyword_index import get_keyword_index
+from utils.keyword_matcher import CATEGORY_PRIORITY, get_keyword_matcher
+from utils.pattern_engine import get_pattern_engine
+from utils.preprocessing import denoise_image
+from utils.strategy_scheduler import (
+    StrategyRun,
+    StrategyScheduler,
+    get_strategy_scheduler,
+)
+from utils.text_gate import gate_regions
+from utils.variant_cache import PreprocessingVariantCache, VariantBuilder
+from utils.word_index import WordIndex
+from utils.word_table import WordTable
+from utils.profiling import count, span, timed, track_array
 
-def enhance_image_for_ocr(image: np.ndarray) -> np.ndarray:
+
+def enhance_image_for_ocr(
+    image: np.ndarray, upscale: bool = True, denoise: str = 'auto'
+) -> np.ndarray:
     """
     Apply additional image enhancement techniques for better OCR results.
+    Set `upscale=False` to keep the input size, e.g. when the result is
+    cached at full resolution and regions are sliced from it later, and
+    `denoise='none'` when the input has already been denoised.
     """
     # Convert to greyscale if not already
     if len(image.shape) == 3:
         grey = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
     else:
-        grey = image.copy()
+        grey = image
     
-    # Denoise
-    denoised = cv2.fastNlMeansDenoising(grey)
+    # Denoise with the tier the measured noise calls for
+    denoised = denoise_image(grey, denoise)
     
     # Apply CLAHE (Contrast Limited Adaptive Histogram Equalisation)
     clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
@@ -34,15 +57,26 @@ def enhance_image_for_ocr(image: np.ndarray) -> np.ndarray:
     # Apply binary threshold
     _, binary = cv2.threshold(sharpened, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
     
-    # Resize if too small
-    height, width = binary.shape
-    if height < 50 or width < 50:
-        scale_factor = max(50/height, 50/width)
+    if upscale:
+        binary = upscale_small_image(binary)
+    
+    return binary
+
+
+def upscale_small_image(image: np.ndarray, min_size: int = 50) -> np.ndarray:
+    """
+    Resize an image up so both sides are at least `min_size` pixels.
+    """
+    height, width = image.shape[:2]
+    if height < min_size or width < min_size:
+        scale_factor = max(min_size/height, min_size/width)
         new_width = int(width * scale_factor)
         new_height = int(height * scale_factor)
-        binary = cv2.resize(binary, (new_width, new_height), interpolation=cv2.INTER_CUBIC)
+        image = cv2.resize(
+            image, (new_width, new_height), interpolation=cv2.INTER_CUBIC
+        )
     
-    return binary
+    return image
 
 def preprocess_for_text_detection(image: np.ndarray) -> np.ndarray:
     """
@@ -80,58 +114,215 @@ def preprocess_for_text_detection(image: np.ndarray) -> np.ndarray:
     
     return result
 
-def extract_text_with_confidence(image: np.ndarray, config_string: str = "--psm 3") -> Tuple[str, float]:
+
+def ocr_word_data(
+    image: np.ndarray, config_string: str = "--psm 3"
+) -> Dict[str, List[Any]]:
     """
-    Extract text from image with confidence score.
+    Run OCR and return the word-level boxes, texts and confidences.
     """
     try:
-        # Get detailed OCR data
-        data = pytesseract.image_to_data(image, config=config_string, output_type=pytesseract.Output.DICT)
-        
-        # Extract text with confidence
-        texts = []
-        confidences = []
-        
-        for i in range(len(data['text'])):
-            if int(data['conf'][i]) > 0:  # Only consider text with positive confidence
-                text = data['text'][i].strip()
-                conf = float(data['conf'][i])
-                if text and len(text) > 1:  # Filter out single characters
-                    texts.append(text)
-                    confidences.append(conf)
-        
-        if texts:
-            # Join the texts and calculate average confidence
-            full_text = ' '.join(texts)
-            avg_confidence = np.mean(confidences) if confidences else 0
-            return full_text, avg_confidence
-        
+        # Get detailed OCR data from the configured backend
+        count('ocr_calls')
+        # Concurrent calls from every image and thread share one process-wide limit
+        with ocr_slot(), span('ocr_call'):
+            return get_ocr_backend().image_to_data(image, config_string)
     except Exception as e:
         print(f"OCR error: {e}")
     
+    return empty_word_data()
+
+
+def summarise_word_data(
+    data: Union[Dict[str, List[Any]], WordTable],
+) -> Tuple[str, float]:
+    """
+    Join word-level OCR results into text with its mean confidence.
+    Single characters and words without a positive confidence are ignored.
+    """
+    words = data if isinstance(data, WordTable) else WordTable.from_word_data(data)
+    # Filter out single characters
+    words = (
+        words[np.char.str_len(np.asarray(words.texts, dtype=str)) > 1]
+        if len(words)
+        else words
+    )
+    
+    if len(words):
+        # Join the texts and calculate average confidence
+        return ' '.join(words.texts), float(words.confidences.mean())
+    
     return "", 0.0
 
-def extract_text_from_image(image: np.ndarray, regions: List[Tuple[int, int, int, int]]) -> Tuple[List[str], List[float]]:
+
+def extract_text_with_confidence(
+    image: np.ndarray, config_string: str = "--psm 3"
+) -> Tuple[str, float]:
+    """
+    Extract text from image with confidence score.
+    """
+    return summarise_word_data(ocr_word_data(image, config_string))
+
+
+# One accepted (text, confidence, box, strategy) row of the region search
+RegionRow = Tuple[str, float, Tuple[int, int, int, int], Optional[str]]
+
+# Full-resolution preprocessing variants used by the region strategy search.
+# The denoised image is computed once and the enhanced variant refines it.
+PREPROCESSING_VARIANTS: Dict[str, VariantBuilder] = {
+    'grey': lambda img: (
+        cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img
+    ),
+    'denoised': ('grey', lambda grey: denoise_image(grey)),
+    'enhanced': (
+        'denoised',
+        lambda denoised: enhance_image_for_ocr(denoised, upscale=False, denoise='none'),
+    ),
+    'text_detection': lambda img: preprocess_for_text_detection(img),
+}
+
+def extract_text_from_image(
+    image: np.ndarray,
+    regions: List[Tuple[int, int, int, int]],
+    scheduler: Optional[StrategyScheduler] = None,
+    report: Optional[Dict[str, Any]] = None,
+    denoised: Optional[np.ndarray] = None,
+    as_table: bool = False,
+    full_page: bool = True
+) -> Union[Tuple[List[str], List[float]], WordTable]:
     """
     Extract text from detected regions using multiple OCR strategies.
+    Strategies are tried in order of historical win-rate, stopping early once
+    the confidence target is met. Pass a dict as `report` to receive the
+    search statistics for this image, including the denoising tier used and
+    the regions the text gate dropped before OCR. Word boxes from the
+    full-image pass are indexed, and regions already covered by confident
+    words reuse them instead of being OCR'd again. A greyscale `denoised`
+    image of the same size, e.g. from preprocessing, is reused instead of
+    denoising the image again. Regions are searched on several threads
+    (OCR_CONFIG['region_workers']) and the report includes the speedup.
+
+    With `full_page` False, as for tiled images, no full-size array is
+    created: the full-image pass is skipped and each region's variants are
+    built from its own crop of `image`, so memory follows the region size.
+
+    Returns parallel (texts, confidences) lists, or with `as_table` a
+    WordTable that also holds each text's box and source strategy.
     """
-    extracted_texts = []
-    confidence_scores = []
+    results: List[RegionRow] = []  # (text, confidence, box, strategy) rows
+    scheduler = scheduler or get_strategy_scheduler()
+    search = scheduler.begin_image()
+    denoise_report = {'reused': denoised is not None}
+    builders: Dict[str, VariantBuilder] = {
+        **PREPROCESSING_VARIANTS,
+        'denoised': ('grey', lambda grey: denoise_image(grey, report=denoise_report))
+    }
+    
+    count('regions', len(regions))
+    searchable = [region for region in regions if region[2] >= 20 and region[3] >= 20]
+    
+    if not full_page:
+        # Cheap text-presence check; the gate converts only the padded crops to grey
+        kept, _ = gate_regions(image, searchable)
+        search.gate_regions(len(searchable) - len(kept))
+        denoise_report['roi_local'] = True
+        with span('ocr_regions'):
+            parallel_report = _extract_regions(image, kept, builders, search, results)
+        variants_built = parallel_report.pop('variants_built')
+    else:
+        # Preprocessing variants are computed once at full resolution and
+        # regions are sliced out of them, instead of re-running per region
+        with PreprocessingVariantCache(image, builders) as variants:
+            if denoised is not None:
+                variants.put('denoised', denoised)
+            # Try full image OCR first
+            with span('ocr_full_image'):
+                full_image_preprocessed = track_array(variants.get('text_detection'))
+                full_data = ocr_word_data(full_image_preprocessed, "--psm 3")
+                full_words = WordTable.from_word_data(full_data, strategy='full_image')
+                full_text, full_confidence = summarise_word_data(full_words)
+                words = WordIndex(full_words)
+            
+            if full_text and full_confidence > 50:
+                full_box = (0, 0, image.shape[1], image.shape[0])
+                results.append((full_text, full_confidence, full_box, 'full_image'))
+            
+            # Cheap text-presence check, so flat areas, textures and barcodes never
+            # reach OCR
+            kept, _ = gate_regions(variants.get('grey'), searchable)
+            search.gate_regions(len(searchable) - len(kept))
+            with span('ocr_regions'):
+                parallel_report = _extract_regions(
+                    image, kept, variants, search, results, words
+                )
+            
+            parallel_report.pop('variants_built')
+            variants_built = variants.builds
     
-    # Try full image OCR first
-    full_image_preprocessed = preprocess_for_text_detection(image)
-    full_text, full_confidence = extract_text_with_confidence(full_image_preprocessed, "--psm 3")
+    search_report = search.finish()
+    search_report['variants_built'] = variants_built
+    search_report['denoise'] = denoise_report
+    search_report.update(parallel_report)
+    if report is not None:
+        report.update(search_report)
     
-    if full_text and full_confidence > 50:
-        extracted_texts.append(full_text)
-        confidence_scores.append(full_confidence)
+    texts, confidences, boxes, strategies = (
+        zip(*results) if results else ((), (), (), ())
+    )
+    table = WordTable.from_columns(texts, confidences, boxes, strategies).deduplicate()
+    return table if as_table else table.to_lists()
+
+def _extract_regions(
+    image: np.ndarray,
+    regions: List[Tuple[int, int, int, int]],
+    variants: Union[PreprocessingVariantCache, Dict[str, Any]],
+    search: StrategyRun,
+    results: List[RegionRow],
+    words: Optional[WordIndex] = None,
+    workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Run the strategy search over each region, appending accepted results as
+    (text, confidence, region, strategy) rows in region order.
+    `variants` is either the image's full-size variant cache to slice regions
+    from, or the variant builders to run on each region's own crop.
+    Regions covered by confident words in `words` reuse them without OCR.
+    The remaining regions are searched on up to `workers` threads
+    (OCR_CONFIG['region_workers'] by default); returns the timing of that
+    search and its speedup over running the regions one after another.
+    """
+    def run_ocr(processed_roi: np.ndarray, psm: int) -> Tuple[str, float]:
+        return extract_text_with_confidence(processed_roi, f"--psm {psm} -l eng")
+    
+    accept = _keyword_acceptor()
+    rows: List[Optional[RegionRow]] = [None] * len(regions)
+    # Variant builds of each region searched on its own crop
+    local_builds: List[int] = []
+    pending: List[int] = []
     
     # Process individual regions
-    for (x, y, w, h) in regions:
+    for slot, (x, y, w, h) in enumerate(regions):
         # Skip very small regions
         if w < 20 or h < 20:
             continue
-            
+        
+        # Reuse the full-image pass where it already read the region confidently
+        reused = words.lookup((x, y, w, h)) if words is not None else None
+        if reused is not None:
+            search.reuse_region()
+            if reused[1] > 30:
+                rows[slot] = (reused[0], reused[1], (x, y, w, h), 'word_reuse')
+            continue
+        
+        pending.append(slot)
+    
+    def search_one(slot: int) -> float:
+        x, y, w, h = regions[slot]
+        # Stop once the per-image budget is spent
+        if search.exhausted():
+            search.skip_region()
+            return 0.0
+        
         # Add padding to the region for better OCR
         padding = 10
         x_start = max(0, x - padding)
@@ -139,86 +330,97 @@ def extract_text_from_image(image: np.ndarray, regions: List[Tuple[int, int, int
         x_end = min(image.shape[1], x + w + padding)
         y_end = min(image.shape[0], y + h + padding)
         
-        roi = image[y_start:y_end, x_start:x_end]
-        
-        # Try multiple preprocessing techniques
-        preprocessing_methods = [
-            lambda img: enhance_image_for_ocr(img),
-            lambda img: cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img,
-            lambda img: preprocess_for_text_detection(img)
-        ]
+        local = None
+        if not isinstance(variants, PreprocessingVariantCache):
+            # Region-local variants: only arrays the size of the crop are built
+            local = PreprocessingVariantCache(
+                image[y_start:y_end, x_start:x_end], variants
+            )
         
-        best_text = ""
-        best_confidence = 0
+        def get_variant(name: str) -> np.ndarray:
+            if local is not None:
+                roi = local.get(name)
+            else:
+                assert isinstance(variants, PreprocessingVariantCache)
+                roi = variants.roi(name, x_start, y_start, x_end, y_end)
+            return upscale_small_image(roi) if name == 'enhanced' else roi
         
-        for preprocess_func in preprocessing_methods:
-            try:
-                processed_roi = preprocess_func(roi)
-                
-                # Try multiple PSM modes
-                psm_modes = [6, 8, 7, 11, 13]  # Different OCR modes
-                
-                for psm in psm_modes:
-                    text, confidence = extract_text_with_confidence(
-                        processed_roi, 
-                        f"--psm {psm} -l eng"
-                    )
-                    
-                    if confidence > best_confidence and len(text) > 2:
-                        best_text = text
-                        best_confidence = confidence
-                        
-            except Exception as e:
-                continue
+        started = time.perf_counter()
+        try:
+            best_text, best_confidence, strategy = search.search_region(
+                get_variant, run_ocr, accept, with_strategy=True
+            )
+        finally:
+            if local is not None:
+                local_builds.append(local.builds)
+                local.clear()
         
         if best_text and best_confidence > 30:
-            extracted_texts.append(best_text)
-            confidence_scores.append(best_confidence)
-    
-    # Remove duplicates while preserving order
-    unique_texts = []
-    unique_scores = []
-    seen = set()
-    
-    for text, score in zip(extracted_texts, confidence_scores):
-        text_lower = text.lower().strip()
-        if text_lower not in seen and len(text_lower) > 2:
-            seen.add(text_lower)
-            unique_texts.append(text)
-            unique_scores.append(score)
-    
-    return unique_texts, unique_scores
+            rows[slot] = (best_text, best_confidence, (x, y, w, h), strategy)
+        return time.perf_counter() - started
+    
+    workers = min(
+        workers or Config.OCR_CONFIG.get('region_workers') or 1, ocr_concurrency()
+    )
+    started = time.perf_counter()
+    region_seconds = map_ordered(search_one, pending, workers)
+    wall_seconds = time.perf_counter() - started
+    
+    # Merge in region order, whichever thread finished first
+    results.extend(row for row in rows if row is not None)
+    serial_seconds = sum(region_seconds)
+    return {
+        'variants_built': sum(local_builds),
+        'region_workers': min(workers, len(pending)) or 1,
+        'region_wall_seconds': wall_seconds,
+        'region_serial_seconds': serial_seconds,
+        'parallel_speedup': (
+            serial_seconds / wall_seconds
+            if wall_seconds > 0 and serial_seconds > 0
+            else 1.0
+        ),
+    }
 
-def extract_patterns(text: str) -> Dict[str, List[str]]:
+def _keyword_acceptor() -> Optional[Callable[[str, float], bool]]:
     """
-    Extract common patterns from text using regex.
+    Accept a reasonably confident region result early when it already reads
+    as a known keyword (allowing for OCR errors), saving further OCR passes.
     """
-    patterns = {
-        'prices': r'[$£€]\s*\d+(?:[.,]\d{2})?|\d+(?:[.,]\d{2})?\s*[$£€]',
-        'dates': r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{2,4}',
-        'percentages': r'\d+\.?\d*\s*%',
-        'weights': r'\d+\.?\d*\s*(?:kg|g|mg|lb|oz|lbs|ounces?)\b',
-        'volumes': r'\d+\.?\d*\s*(?:ml|l|L|mL|gal|gallons?|fl\.?\s*oz)\b',
-        'product_codes': r'\b[A-Z]{2,}\d{3,}|\d{3,}[A-Z]{2,}\b|UPC\s*:\s*\d+',
-        'barcodes': r'\b\d{8,13}\b',
-        'expiry': r'(?:exp|expiry|expires?|best\s+before)[:\s]*[\d/\-\s]+\d{2,4}',
-    }
+    threshold = Config.OCR_CONFIG.get('keyword_accept_confidence')
+    matcher = get_fuzzy_matcher()
+    if threshold is None or matcher is None:
+        return None
     
-    results = {}
-    for pattern_name, pattern in patterns.items():
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        results[pattern_name] = matches
+    def accept(text: str, confidence: float) -> bool:
+        return confidence >= threshold and matcher.contains_keyword(text)
     
-    return results
+    return accept
+
+def extract_patterns(text: str) -> Dict[str, List[str]]:
+    """
+    Extract common patterns (prices, dates, weights, ...) from text using
+    the precompiled Config.EXTRACTION_PATTERNS engine.
+    """
+    return get_pattern_engine().extract(text)
 
+def extract_patterns_batch(texts: List[str]) -> List[Dict[str, List[str]]]:
+    """
+    Extract patterns from many texts, one result per text; each category is
+    scanned once over the whole batch rather than once per text.
+    """
+    return get_pattern_engine().extract_batch(texts)
+
+@timed('filter_text')
 def filter_text(extracted_texts: List[str], confidence_scores: List[float], min_confidence: float = 30.0) -> Dict[str, List[str]]:
     """
     Enhanced text filtering with confidence scores and pattern extraction.
     """
-    # Get keywords from config
-    product_keywords = Config.KEYWORDS['product_keywords']
-    retailer_keywords = Config.KEYWORDS['retailer_keywords']
-    brand_keywords = Config.KEYWORDS['brand_keywords']
+    # Keyword automaton built from Config.KEYWORDS, kept in sync with it,
+    # the memory-mapped index of external dictionaries if configured, and
+    # the OCR-tolerant fuzzy matcher for misread keywords
+    keyword_matcher = get_keyword_matcher()
+    keyword_index = get_keyword_index()
+    fuzzy_matcher = get_fuzzy_matcher()
     
     product_names = []
     retailer_names = []
@@ -230,18 +432,17 @@ def filter_text(extracted_texts: List[str], confidence_scores: List[float], min_
     percentages = []
     other_details = []
     
-    # Clean and process texts
-    for text, confidence in zip(extracted_texts, confidence_scores):
+    # Clean and keep confident texts, then extract their patterns in one batch
+    cleaned_texts = [
+        ' '.join(text.split())  # Remove extra whitespace
+        for text, confidence in zip(extracted_texts, confidence_scores)
         # Skip low confidence text and very short text
-        if confidence < min_confidence or len(text.strip()) < 3:
-            continue
-        
-        # Clean text
-        cleaned_text = ' '.join(text.split())  # Remove extra whitespace
-        
-        # Extract patterns from text
-        patterns = extract_patterns(cleaned_text)
-        
+        if confidence >= min_confidence and len(text.strip()) >= 3
+    ]
+    
+    for cleaned_text, patterns in zip(
+        cleaned_texts, extract_patterns_batch(cleaned_texts)
+    ):
         # Add extracted patterns to results
         prices.extend(patterns.get('prices', []))
         dates.extend(patterns.get('dates', []))
@@ -250,19 +451,20 @@ def filter_text(extracted_texts: List[str], confidence_scores: List[float], min_
         volumes.extend(patterns.get('volumes', []))
         percentages.extend(patterns.get('percentages', []))
         
-        # Check for keywords
-        text_lower = cleaned_text.lower()
+        # Check for keywords: product names first, then retailers, then brands
+        category = keyword_matcher.classify(cleaned_text.lower())
+        if keyword_index is not None and category != CATEGORY_PRIORITY[0]:
+            category = keyword_index.classify(cleaned_text, current=category)
+        if fuzzy_matcher is not None and category != CATEGORY_PRIORITY[0]:
+            category = fuzzy_matcher.classify(cleaned_text, current=category)
         
-        # Check for product names
-        if any(keyword in text_lower for keyword in product_keywords):
+        if category == 'product_keywords':
             product_names.append(cleaned_text)
         
-        # Check for retailer names
-        elif any(keyword in text_lower for keyword in retailer_keywords):
+        elif category == 'retailer_keywords':
             retailer_names.append(cleaned_text)
             
-        # Check for brand names
-        elif any(keyword in text_lower for keyword in brand_keywords):
+        elif category == 'brand_keywords':
             brand_names.append(cleaned_text)
         
         # Check if it's a meaningful text (not just symbols)
@@ -0,0 +1,118 @@
+# utils/ocr_pool.py
+
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, Sequence
+
+from config import Config
+
+_lock = threading.Lock()
+_semaphore = None  # (limit, BoundedSemaphore)
+_executor = None  # (size, ThreadPoolExecutor)
+
+
+def ocr_concurrency() -> int:
+    """
+    Process-wide cap on concurrent OCR calls: OCR_CONFIG['max_ocr_threads'], or the CPU
+    count.
+    """
+    return max(1, Config.OCR_CONFIG.get('max_ocr_threads') or os.cpu_count() or 1)
+
+
+def set_ocr_concurrency(limit: Optional[int]):
+    """
+    Set the process-wide OCR concurrency cap (None = CPU count), e.g. to
+    share the cores between batch worker processes. Calls already running
+    finish under the previous cap.
+    """
+    Config.OCR_CONFIG['max_ocr_threads'] = limit
+
+
+def _get_semaphore() -> threading.BoundedSemaphore:
+    global _semaphore
+    limit = ocr_concurrency()
+    with _lock:
+        if _semaphore is None or _semaphore[0] != limit:
+            _semaphore = (limit, threading.BoundedSemaphore(limit))
+        return _semaphore[1]
+
+
+def get_region_executor() -> ThreadPoolExecutor:
+    """
+    Return the long-lived thread pool region OCR runs on. Threads are kept,
+    so per-thread OCR engine handles are reused across images.
+    """
+    global _executor
+    size = ocr_concurrency()
+    with _lock:
+        if _executor is None or _executor[0] != size:
+            if _executor is not None:
+                _executor[1].shutdown(wait=False)
+            _executor = (
+                size,
+                ThreadPoolExecutor(max_workers=size, thread_name_prefix="region-ocr"),
+            )
+        return _executor[1]
+
+
+@contextmanager
+def ocr_slot() -> Iterator[None]:
+    """Hold one of the process-wide OCR slots for the duration of a call."""
+    semaphore = _get_semaphore()
+    semaphore.acquire()
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+
+def map_ordered(
+    func: Callable[[Any], Any], items: Sequence[Any], workers: int
+) -> List[Any]:
+    """
+    Apply `func` to every item using up to `workers` lanes, returning the
+    results in item order whatever order they finish in.
+
+    The calling thread runs one lane itself and the rest run on the shared
+    region pool, each in a copy of the caller's context so per-image
+    profiling still applies. If a lane fails, the others stop taking new
+    items and the first error is raised.
+    """
+    results = [None] * len(items)
+    workers = min(max(1, workers), len(items))
+    if workers <= 1:
+        return [func(item) for item in items]
+
+    next_index = iter(range(len(items)))
+    index_lock = threading.Lock()
+    stop = threading.Event()
+
+    def lane():
+        try:
+            while not stop.is_set():
+                with index_lock:
+                    i = next(next_index, None)
+                if i is None:
+                    return
+                results[i] = func(items[i])
+        except BaseException:
+            stop.set()
+            raise
+
+    executor = get_region_executor()
+    futures = [
+        executor.submit(contextvars.copy_context().run, lane)
+        for _ in range(workers - 1)
+    ]
+    try:
+        lane()
+    finally:
+        # Wait for the pool lanes even on error, so no lane outlives the call
+        errors = [future.exception() for future in futures]
+    for error in errors:
+        if error is not None:
+            raise error
+    return results
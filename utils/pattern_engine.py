@@ -0,0 +1,119 @@
+# utils/pattern_engine.py
+
+import bisect
+import re
+import threading
+from typing import Any, Dict, List, Sequence, Set
+
+# Joins texts for a batch scan; a non-word character, so \b behaves at each
+# text's edges as it does at the ends of a string
+_BATCH_SEPARATOR = '\n'
+# Patterns that can see past a text's edges; scanned one text at a time
+_CONTEXT_SENSITIVE = re.compile(r'\^|\$|\\[ABZ]|\(\?<?[=!]')
+
+from config import Config
+
+
+class PatternEngine:
+    """
+    Extracts every pattern category (prices, dates, weights, ...) from text.
+
+    Patterns are compiled once when the engine is built instead of being
+    looked up in `re`'s cache on every call. Each category keeps its own
+    non-overlapping matches, exactly as `re.findall` would return them, so a
+    fragment such as "Exp: 12/03/2025" is reported as both expiry and date.
+
+    A batch is scanned once per category over all its texts joined together,
+    instead of once per text and category.
+    """
+
+    def __init__(self, patterns: Dict[str, str], flags: int = re.IGNORECASE):
+        self.patterns = dict(patterns)
+        self.flags = flags
+        self._compiled = [
+            (name, re.compile(pattern, flags))
+            for name, pattern in self.patterns.items()
+        ]
+        self._batchable = {
+            name for name, pattern in self.patterns.items()
+            if not _CONTEXT_SENSITIVE.search(pattern)
+        }
+
+    def extract(self, text: str) -> Dict[str, List[str]]:
+        """Return the matches of every category in `text`."""
+        return {name: regex.findall(text) for name, regex in self._compiled}
+
+    def extract_batch(self, texts: Sequence[str]) -> List[Dict[str, List[str]]]:
+        """
+        Extract patterns from many texts, returning one result dict per text,
+        equal to calling extract() on each.
+
+        Each category is scanned once over the texts joined by newlines and
+        its matches are mapped back to their text by offset. Texts a match
+        runs into or out of are scanned again on their own, since the joined
+        scan resumes after such a match rather than at the text's start.
+        """
+        if len(texts) < 2:
+            return [self.extract(text) for text in texts]
+
+        joined = _BATCH_SEPARATOR.join(texts)
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + len(_BATCH_SEPARATOR)
+
+        results: List[Dict[str, List[Any]]] = [{} for _ in texts]
+        for name, regex in self._compiled:
+            if name not in self._batchable:
+                for result, text in zip(results, texts):
+                    result[name] = regex.findall(text)
+                continue
+
+            found: List[List[Any]] = [[] for _ in texts]
+            rescan: Set[int] = set()
+            for match in regex.finditer(joined):
+                start, end = match.span()
+                index = bisect.bisect_right(starts, start) - 1
+                if end <= starts[index] + len(texts[index]):
+                    found[index].append(_findall_value(match, regex.groups))
+                else:
+                    last = bisect.bisect_right(starts, end - 1) - 1
+                    rescan.update(range(index, last + 1))
+            for index in rescan:
+                found[index] = regex.findall(texts[index])
+            for result, matches in zip(results, found):
+                result[name] = matches
+        return results
+
+
+def _findall_value(match: re.Match, groups: int) -> Any:
+    """What re.findall reports for a match: the text, its group or all groups."""
+    if groups == 0:
+        return match.group(0)
+    if groups == 1:
+        return match.group(1) or ''
+    return tuple(group or '' for group in match.groups())
+
+
+_default_engine = None
+_default_source = None  # The Config dict the shared engine was compiled from
+_default_lock = threading.Lock()
+
+
+def get_pattern_engine() -> PatternEngine:
+    """
+    Return the engine compiled from Config.EXTRACTION_PATTERNS, recompiling
+    only when the configured patterns change. Only the dict's identity is
+    checked on each call, so assign a new dict to change patterns at runtime.
+    """
+    global _default_engine, _default_source
+    patterns = Config.EXTRACTION_PATTERNS
+    engine = _default_engine
+    if engine is None or _default_source is not patterns:
+        with _default_lock:
+            if _default_engine is None or _default_source is not patterns:
+                _default_engine = PatternEngine(patterns)
+                _default_source = patterns
+            engine = _default_engine
+    return engine
@@ -0,0 +1,514 @@
+# utils/pipeline.py
+
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from config import Config
+from utils.data_export import export_to_json, export_words_to_csv
+from utils.ocr_extraction import extract_text_from_image, filter_text
+from utils.preprocessing import (
+    ImageTransform,
+    apply_preprocessing_mode,
+    auto_rotate_image,
+    decode_image,
+    resize_for_text,
+    to_denoised_grey,
+)
+from utils.profiling import (
+    activate_profile,
+    finish_profile,
+    span,
+    start_profile,
+    track_array,
+)
+from utils.result_cache import cache_key, get_result_cache
+from utils.text_regions import consolidate_regions, detect_text_regions
+from utils.tiling import detect_text_regions_tiled, should_tile
+
+ImageSource = Union[str, Tuple[str, bytes]]
+
+# Keys of a finished record returned to callers; the rest are intermediates
+RESULT_KEYS = (
+    'filename',
+    'status',
+    'product_info',
+    'cached',
+    'elapsed_seconds',
+    'profile',
+)
+
+
+def default_settings() -> Dict[str, Any]:
+    """Pipeline settings taken from the configuration defaults."""
+    return {
+        'preprocessing_mode': Config.PREPROCESSING_CONFIG['default_mode'],
+        'resize_width': Config.PREPROCESSING_CONFIG['resize_width'],
+        'denoise': Config.PREPROCESSING_CONFIG['denoise'],
+        'min_confidence': Config.OCR_CONFIG['min_confidence'],
+        'tiled': None,  # None tiles only images above TILING_CONFIG['min_pixels']
+        'export_words': False,  # Also write word-level results to CSV in export_dir
+        # Record stage timings (None = PROFILING_CONFIG['enabled'])
+        'profile': None
+    }
+
+
+def source_name(source: ImageSource) -> str:
+    """File name of an image path or a (filename, bytes) upload."""
+    return os.path.basename(source if isinstance(source, str) else source[0])
+
+
+def new_record(source: ImageSource) -> Dict[str, Any]:
+    """Start the per-image record that flows through the stages."""
+    return {
+        'filename': source_name(source),
+        'source': source,
+        'status': 'processing',
+        'complete': False
+    }
+
+
+# Stage functions. Each takes the record and settings and updates the record
+# in place; arrays no later stage needs are dropped to keep memory flat.
+
+def read_stage(record: Dict[str, Any], settings: Dict[str, Any]):
+    """Read the image bytes once; the same bytes are hashed and decoded."""
+    source = record.pop('source')
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            record['data'] = f.read()
+    else:
+        record['data'] = source[1]
+
+
+def cache_lookup_stage(record: Dict[str, Any], settings: Dict[str, Any]):
+    """
+    Serve the OCR results of identical images with identical settings from the
+    result cache. Only texts and confidences are cached; the filter stage
+    classifies them again, so keyword and confidence changes always apply.
+    """
+    result_cache = get_result_cache()
+    if result_cache is None:
+        return
+    record['cache_key'] = cache_key(record['data'], settings)
+    cached = result_cache.get(record['cache_key'])
+    if cached is None:
+        record['cached'] = False
+        return
+    record.update({
+        'status': cached['status'],
+        'extracted_texts': cached.get('extracted_texts', []),
+        'confidence_scores': cached.get('confidence_scores', []),
+        'product_info': None,
+        'cached': True,
+        'complete': True
+    })
+    del record['data']
+
+
+def decode_stage(record: Dict[str, Any], settings: Dict[str, Any]):
+    record['original'] = record['image'] = track_array(decode_image(record.pop('data')))
+
+
+def resize_stage(record: Dict[str, Any], settings: Dict[str, Any]):
+    """
+    Shrink to the working resolution first, so rotation and denoising run on fewer
+    pixels.
+    """
+    if should_tile(record['image'], settings.get('tiled')):
+        # Very large images skip the whole-image stages and are handled tile by tile
+        record['tiled'] = True
+        del record['image']
+        return
+    record['transform'] = ImageTransform(record['image'].shape)
+    record['image'] = resize_for_text(
+        record['image'], settings.get('resize_width') or None, record['transform']
+    )
+
+
+def rotate_stage(record: Dict[str, Any], settings: Dict[str, Any]):
+    if record.get('tiled'):
+        return
+    with span('rotate'):
+        record['image'] = track_array(
+            auto_rotate_image(record['image'], transform=record['transform'])
+        )
+
+
+def denoise_stage(record: Dict[str, Any], settings: Dict[str, Any]):
+    if record.get('tiled'):
+        return
+    record['denoise_report'] = {}
+    record['grey'] = to_denoised_grey(
+        record.pop('image'), settings.get('denoise', True), record['denoise_report']
+    )
+
+
+def threshold_stage(record: Dict[str, Any], settings: Dict[str, Any]):
+    if record.get('tiled'):
+        return
+    grey = record.pop('grey')
+    # At full size the denoised image doubles as the OCR variant
+    if settings.get('denoise', True) and record['transform'].is_identity():
+        record['denoised'] = grey
+    with span('threshold'):
+        record['binary'] = apply_preprocessing_mode(
+            grey, settings['preprocessing_mode']
+        )
+    # Some modes upscale small images
+    record['transform'].match_size(grey.shape, record['binary'].shape)
+
+
+def regions_stage(record: Dict[str, Any], settings: Dict[str, Any]):
+    """
+    Detect and merge text regions, mapped back to original-image coordinates
+    for OCR; tiled images are thresholded and searched tile by tile here. In
+    text_optimised mode an image without regions is read as a
+    single whole-image region instead of giving up.
+    """
+    if record.get('tiled'):
+        regions, record['tiling'] = detect_text_regions_tiled(
+            record['original'],
+            settings['preprocessing_mode'],
+            settings.get('denoise', True),
+        )
+        regions, record['region_stats'] = consolidate_regions(regions)
+    else:
+        binary = record['binary'] if record.get('keep_images') else record.pop('binary')
+        regions, record['region_stats'] = consolidate_regions(
+            detect_text_regions(binary)
+        )
+        regions = record['transform'].to_original(regions)
+    if not regions and settings['preprocessing_mode'] == 'text_optimised':
+        height, width = record['original'].shape[:2]
+        regions = [(0, 0, width, height)]
+    record['regions'] = regions
+
+    if not regions:
+        record.pop('denoised', None)
+        record.update({
+            'status': 'no_text_detected',
+            'extracted_texts': [],
+            'confidence_scores': [],
+            'product_info': None,
+            'complete': True
+        })
+        if not record.get('keep_images'):
+            del record['original']
+
+
+def ocr_stage(record: Dict[str, Any], settings: Dict[str, Any]):
+    original = (
+        record['original'] if record.get('keep_images') else record.pop('original')
+    )
+    record['ocr_report'] = {}
+    # Tiled images are read region by region, never as full-size variants
+    record['words'] = extract_text_from_image(
+        original,
+        record['regions'],
+        report=record['ocr_report'],
+        denoised=record.pop('denoised', None),
+        as_table=True,
+        full_page=not record.get('tiled'),
+    )
+    record['extracted_texts'], record['confidence_scores'] = record['words'].to_lists()
+
+
+def filter_stage(record: Dict[str, Any], settings: Dict[str, Any]):
+    """Classify the OCR texts, for cache hits as well as fresh results."""
+    if record['status'] not in ('processing', 'success'):
+        return
+    record['product_info'] = filter_text(
+        record['extracted_texts'],
+        record['confidence_scores'],
+        min_confidence=settings['min_confidence'],
+    )
+    record['status'] = 'success'
+    record['complete'] = True
+
+
+def cache_store_stage(record: Dict[str, Any], settings: Dict[str, Any]):
+    """Store freshly computed results under the key from cache_lookup_stage."""
+    result_cache = get_result_cache()
+    if result_cache is None or record.get('cached') or 'cache_key' not in record:
+        return
+    result_cache.put(record['cache_key'], {
+        'status': record['status'],
+        'extracted_texts': record['extracted_texts'],
+        'confidence_scores': [float(score) for score in record['confidence_scores']]
+    })
+
+
+def export_stage(record: Dict[str, Any], settings: Dict[str, Any]):
+    """
+    Write product info as JSON to settings['export_dir'] when it is set, and
+    the word-level results as CSV too with settings['export_words'].
+    """
+    export_dir = settings.get('export_dir')
+    if export_dir and record.get('product_info') is not None:
+        record['export_path'] = export_to_json(
+            record['filename'], record['product_info'], export_dir
+        )
+        if settings.get('export_words') and record.get('words') is not None:
+            record['words_export_path'] = export_words_to_csv(
+                record['filename'], record['words'], export_dir
+            )
+
+
+class Stage:
+    """
+    One named pipeline step. `workers` threads run it concurrently when the
+    pipeline streams; `finalise` stages also run on records already complete
+    (cache hits, images without text).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any], Dict[str, Any]], None],
+        workers: int = 1,
+        finalise: bool = False,
+    ):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.finalise = finalise
+
+    def applies_to(self, record: Dict[str, Any]) -> bool:
+        """Failed records skip every stage; complete ones only run finalise stages."""
+        return not record['status'].startswith('error') and (
+            self.finalise or not record['complete']
+        )
+
+    def __call__(
+        self, record: Dict[str, Any], settings: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Run the stage on a record, capturing errors in its status."""
+        if not self.applies_to(record):
+            return record
+        try:
+            with activate_profile(record.get('profile')):
+                self.func(record, settings)
+        except Exception as e:
+            record['status'] = f"error: {str(e)}"
+            record['complete'] = True
+            logging.error(
+                f"Error in {self.name} stage for {record['filename']}: {str(e)}"
+            )
+        return record
+
+
+def default_stages(stage_workers: Optional[Dict[str, int]] = None) -> List[Stage]:
+    """The full extraction flow, with per-stage concurrency from PIPELINE_CONFIG."""
+    workers = {
+        **Config.PIPELINE_CONFIG.get('stage_workers', {}),
+        **(stage_workers or {}),
+    }
+    steps = [
+        ('read', read_stage, False),
+        ('cache_lookup', cache_lookup_stage, False),
+        ('decode', decode_stage, False),
+        ('resize', resize_stage, False),
+        ('rotate', rotate_stage, False),
+        ('denoise', denoise_stage, False),
+        ('threshold', threshold_stage, False),
+        ('regions', regions_stage, False),
+        ('ocr', ocr_stage, False),
+        ('filter', filter_stage, True),
+        ('cache_store', cache_store_stage, True),
+        ('export', export_stage, True),
+    ]
+    return [
+        Stage(name, func, workers.get(name, 1), finalise)
+        for name, func, finalise in steps
+    ]
+
+
+_STOP = object()
+
+
+class Pipeline:
+    """
+    Streams images through the extraction stages.
+
+    Every stage runs on its own worker threads (OpenCV and Tesseract release
+    the GIL), connected by bounded queues so a slow stage pushes back on the
+    ones before it. At most `max_in_flight` images are inside the pipeline at
+    any time, so an unbounded stream of images is processed in constant memory.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[Dict[str, Any]] = None,
+        stages: Optional[List[Stage]] = None,
+        queue_size: Optional[int] = None,
+        max_in_flight: Optional[int] = None
+    ):
+        pipeline_config = Config.PIPELINE_CONFIG
+        self.settings = {**default_settings(), **(settings or {})}
+        self.stages = stages or default_stages()
+        self.queue_size = queue_size or pipeline_config.get('queue_size') or 2
+        self.max_in_flight = (
+            max_in_flight or pipeline_config.get('max_in_flight')
+            or sum(stage.workers for stage in self.stages) + self.queue_size
+        )
+
+    def _start(
+        self, source: ImageSource, keep_intermediate: bool = False
+    ) -> Dict[str, Any]:
+        record = new_record(source)
+        record['keep_images'] = keep_intermediate
+        record['started'] = time.perf_counter()
+        record['profile'] = start_profile(
+            record['filename'], self.settings.get('profile')
+        )
+        return record
+
+    def _finish(
+        self, record: Dict[str, Any], keep_intermediate: bool = False
+    ) -> Dict[str, Any]:
+        record['elapsed_seconds'] = round(
+            time.perf_counter() - record.pop('started'), 3
+        )
+        profile = record.pop('profile', None)
+        finish_profile(profile)
+        if profile is not None:
+            record['profile'] = profile.to_dict()
+        if keep_intermediate:
+            return record
+        return {key: record[key] for key in RESULT_KEYS if record.get(key) is not None}
+
+    def process(
+        self,
+        source: ImageSource,
+        on_stage: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        keep_intermediate: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Run one image through every stage on the calling thread. `on_stage`
+        is called after each stage that ran with its name and the record,
+        e.g. to drive a progress bar. With `keep_intermediate` the whole record,
+        including texts, regions and reports, is returned.
+        """
+        record = self._start(source, keep_intermediate)
+        for stage in self.stages:
+            if not stage.applies_to(record):
+                continue
+            stage(record, self.settings)
+            if on_stage is not None:
+                on_stage(stage.name, record)
+        return self._finish(record, keep_intermediate)
+
+    def run(
+        self, sources: Iterable[ImageSource], ordered: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream results for `sources`, in input order unless `ordered` is False.
+        Stops the workers if the consumer stops iterating early.
+        """
+        stop = threading.Event()
+        slots = threading.Semaphore(self.max_in_flight)
+        queues: List[queue.Queue] = [
+            queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)
+        ]
+        feed_error = []
+
+        def put(target: queue.Queue, item) -> bool:
+            while not stop.is_set():
+                try:
+                    target.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def feed():
+            try:
+                for index, source in enumerate(sources):
+                    while not slots.acquire(timeout=0.1):
+                        if stop.is_set():
+                            return
+                    if not put(queues[0], (index, self._start(source))):
+                        return
+            except Exception as e:
+                feed_error.append(e)
+            finally:
+                put(queues[0], _STOP)
+
+        def work(
+            stage: Stage,
+            inbox: queue.Queue,
+            outbox: queue.Queue,
+            remaining: List[int],
+            lock: threading.Lock,
+        ):
+            while not stop.is_set():
+                try:
+                    item = inbox.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is _STOP:
+                    # Let sibling workers see the stop marker; the last one forwards it
+                    inbox.put(item)
+                    with lock:
+                        remaining[0] -= 1
+                        last = remaining[0] == 0
+                    if last:
+                        put(outbox, _STOP)
+                    return
+                index, record = item
+                put(outbox, (index, stage(record, self.settings)))
+
+        threads = [threading.Thread(target=feed, daemon=True)]
+        for position, stage in enumerate(self.stages):
+            remaining, lock = [stage.workers], threading.Lock()
+            for _ in range(stage.workers):
+                threads.append(
+                    threading.Thread(
+                        target=work,
+                        args=(
+                            stage,
+                            queues[position],
+                            queues[position + 1],
+                            remaining,
+                            lock,
+                        ),
+                        daemon=True,
+                    )
+                )
+        for thread in threads:
+            thread.start()
+
+        pending = {}
+        next_index = 0
+        try:
+            while True:
+                item = queues[-1].get()
+                if item is _STOP:
+                    break
+                index, record = item
+                if not ordered:
+                    slots.release()
+                    yield self._finish(record)
+                    continue
+                pending[index] = record
+                while next_index in pending:
+                    slots.release()
+                    yield self._finish(pending.pop(next_index))
+                    next_index += 1
+            if feed_error:
+                raise feed_error[0]
+        finally:
+            stop.set()
+
+
+def run_pipeline(
+    sources: Iterable[ImageSource],
+    settings: Optional[Dict[str, Any]] = None,
+    ordered: bool = True
+) -> Iterator[Dict[str, Any]]:
+    """Stream extraction results for `sources` with the default stages."""
+    return Pipeline(settings=settings).run(sources, ordered=ordered)
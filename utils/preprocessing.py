@@ -2,44 +2,339 @@
 
 import cv2
 import numpy as np
-from typing import Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional, Union
 from scipy import ndimage
 import math
+import time
+from config import Config
+from utils.profiling import count, span, track_array
+
+Region = Tuple[int, int, int, int]
+
+
+def decode_image(
+    image_data: Union[bytes, bytearray, memoryview, np.ndarray],
+) -> np.ndarray:
+    """
+    Decode encoded image bytes (e.g. an upload buffer) straight from memory.
+    Already-decoded arrays are returned unchanged.
+    """
+    if isinstance(image_data, np.ndarray) and image_data.ndim >= 2:
+        return image_data
+
+    buffer = np.frombuffer(image_data, dtype=np.uint8)
+    with span('decode'):
+        image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode image data")
+    return image
 
 def preprocess_image(
     image_path: str,
     preprocessing_mode: str = "adaptive_threshold",
     resize_width: Optional[int] = None,
-    denoise: bool = True
-) -> Tuple[np.ndarray, np.ndarray]:
+    denoise: Union[bool, str] = True,
+    return_transform: bool = False,
+) -> Union[
+    Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray, "ImageTransform"]
+]:
     """
     Preprocess the image for better OCR results with multiple preprocessing options.
-    Returns both processed image and the original image.
+    Returns both processed image and the original image (and, with
+    `return_transform`, the mapping between them; see preprocess_image_data).
     """
-    image = cv2.imread(image_path)
+    with span('decode'):
+        image = cv2.imread(image_path)
     if image is None:
         raise ValueError(f"Could not load image from path: {image_path}")
 
-    # Make a copy of the original
-    original_image = image.copy()
+    # The freshly loaded array is ours, so it can serve as the original as-is
+    return preprocess_image_data(
+        image,
+        preprocessing_mode,
+        resize_width,
+        denoise,
+        copy_original=False,
+        return_transform=return_transform,
+    )
+
+
+def preprocess_image_data(
+    image_data: Union[bytes, bytearray, memoryview, np.ndarray],
+    preprocessing_mode: str = "adaptive_threshold",
+    resize_width: Optional[int] = None,
+    denoise: Union[bool, str] = True,
+    copy_original: bool = True,
+    return_transform: bool = False,
+) -> Union[
+    Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray, "ImageTransform"]
+]:
+    """
+    Preprocess an in-memory image, given as encoded bytes or a decoded BGR array.
+    Returns both processed image and the original image. Preprocessing never
+    modifies its input, so with `copy_original=False` the returned original
+    is the input array itself rather than a defensive copy.
+
+    The image is scaled to a working resolution first (see resize_for_text),
+    so rotation and denoising never run at full size. The processed image is
+    therefore usually smaller than the original; with `return_transform` an
+    ImageTransform is returned as well, whose to_original() maps regions found
+    on the processed image back onto the original for cropping.
+    """
+    image = track_array(decode_image(image_data))
+
+    # Bytes are decoded into a new array, so only caller-owned arrays need copying
+    if copy_original and image is image_data:
+        original_image = image.copy()
+    else:
+        original_image = image
+
+    transform = ImageTransform(image.shape)
+    working = resize_for_text(image, resize_width, transform)
 
     # Auto-rotate image if needed
-    rotated_image = auto_rotate_image(image)
-    
-    # Resize if specified or if image is too large
-    if resize_width or rotated_image.shape[1] > 2000:
-        resize_width = resize_width or 1920
-        aspect_ratio = rotated_image.shape[0] / rotated_image.shape[1]
-        resize_height = int(resize_width * aspect_ratio)
-        rotated_image = cv2.resize(rotated_image, (resize_width, resize_height), interpolation=cv2.INTER_AREA)
+    with span('rotate'):
+        working = track_array(auto_rotate_image(working, transform=transform))
+
+    grey = to_denoised_grey(working, denoise)
+
+    with span('threshold'):
+        binary = apply_preprocessing_mode(grey, preprocessing_mode)
+    transform.match_size(grey.shape, binary.shape)
+
+    if return_transform:
+        return binary, original_image, transform
+    return binary, original_image
+
+
+class ImageTransform:
+    """
+    Maps coordinates on a working copy of an image (scaled, rotated or
+    upscaled by a thresholding mode) back to the original image, so regions
+    found on the working copy can crop the full-resolution original.
+    """
+
+    def __init__(self, original_shape: Tuple[int, ...]):
+        self.original_shape = tuple(original_shape[:2])
+        # Original -> working, in homogeneous coordinates
+        self.matrix = np.eye(3)
 
-    # Convert to greyscale
-    grey = cv2.cvtColor(rotated_image, cv2.COLOR_BGR2GRAY)
+    def scale(
+        self, factor_x: float, factor_y: Optional[float] = None
+    ) -> "ImageTransform":
+        """Record a resize applied after the steps so far."""
+        factor_y = factor_x if factor_y is None else factor_y
+        self.matrix = np.diag([factor_x, factor_y, 1.0]) @ self.matrix
+        return self
 
-    # Denoise if requested
-    if denoise:
-        grey = cv2.fastNlMeansDenoising(grey)
+    def match_size(
+        self, before: Tuple[int, ...], after: Tuple[int, ...]
+    ) -> "ImageTransform":
+        """Record a resize from shape `before` to shape `after`, if there was one."""
+        if tuple(before[:2]) != tuple(after[:2]):
+            self.scale(after[1] / before[1], after[0] / before[0])
+        return self
+
+    def affine(self, matrix: np.ndarray) -> "ImageTransform":
+        """Record a 2x3 affine warp, e.g. a rotation, applied after the steps so far."""
+        self.matrix = np.vstack([matrix, [0.0, 0.0, 1.0]]) @ self.matrix
+        return self
+
+    def is_identity(self) -> bool:
+        return np.allclose(self.matrix, np.eye(3))
+
+    def to_original(self, regions: List[Region]) -> List[Region]:
+        """
+        Map (x, y, w, h) regions on the working copy to the bounding boxes of
+        their corners in the original, clipped to the image.
+        """
+        if not regions or self.is_identity():
+            return list(regions)
+
+        boxes = np.asarray(regions, dtype=np.float64)
+        x1, y1 = boxes[:, 0], boxes[:, 1]
+        x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+        corners_x = np.stack([x1, x2, x1, x2])
+        corners_y = np.stack([y1, y1, y2, y2])
+
+        inverse = np.linalg.inv(self.matrix)
+        mapped_x = inverse[0, 0] * corners_x + inverse[0, 1] * corners_y + inverse[0, 2]
+        mapped_y = inverse[1, 0] * corners_x + inverse[1, 1] * corners_y + inverse[1, 2]
+
+        height, width = self.original_shape
+        left = np.clip(np.floor(mapped_x.min(axis=0)), 0, width).astype(int)
+        top = np.clip(np.floor(mapped_y.min(axis=0)), 0, height).astype(int)
+        right = np.clip(np.ceil(mapped_x.max(axis=0)), 0, width).astype(int)
+        bottom = np.clip(np.ceil(mapped_y.max(axis=0)), 0, height).astype(int)
+
+        return [
+            (int(l), int(t), int(r - l), int(b - t))
+            for l, t, r, b in zip(left, top, right, bottom) if r > l and b > t
+        ]
+
+
+def estimate_text_height(
+    image: np.ndarray, max_dimension: Optional[int] = None
+) -> Optional[float]:
+    """
+    Estimate the typical character height, in original pixels, as the median
+    height of character-sized connected components on a downscaled copy.
+    Returns None when too few plausible characters are found.
+    """
+    grey = downscale_grey(
+        image, max_dimension or Config.PREPROCESSING_CONFIG['skew_max_dimension']
+    )
+    factor = image.shape[0] / grey.shape[0]
+
+    _, binary = cv2.threshold(grey, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    # Text is the minority of pixels; flip for light text on a dark background
+    if cv2.countNonZero(binary) > binary.size // 2:
+        binary = cv2.bitwise_not(binary)
+
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    plausible = (
+        (heights >= 3)
+        & (heights <= grey.shape[0] / 4)
+        & (widths <= heights * 4)
+        & (areas >= 6)
+    )
+    if np.count_nonzero(plausible) < 10:
+        return None
+    return float(np.median(heights[plausible]) * factor)
+
+
+def plan_working_scale(image: np.ndarray, resize_width: Optional[int] = None) -> float:
+    """
+    Pick the scale of the working copy that text is detected on: small enough
+    that characters are about `target_text_height` pixels tall and the width
+    is at most `resize_width` (1920 for images wider than 2000 if unset), but
+    never upscaled or narrower than `min_working_width`. Only the working copy
+    is scaled; OCR still crops the original.
+    """
+    config = Config.PREPROCESSING_CONFIG
+    width = image.shape[1]
+
+    scale = 1.0
+    if resize_width:
+        scale = min(scale, resize_width / width)
+    elif width > 2000:
+        scale = min(scale, 1920 / width)
+
+    if config.get('plan_resolution', True):
+        with span('plan'):
+            text_height = estimate_text_height(image)
+        if text_height:
+            scale = min(scale, config['target_text_height'] / text_height)
+
+    min_width = min(width, config['min_working_width'])
+    return float(max(scale, min_width / width))
+
+def resize_for_text(
+    image: np.ndarray,
+    resize_width: Optional[int] = None,
+    transform: Optional[ImageTransform] = None
+) -> np.ndarray:
+    """
+    Downscale to the planned working resolution, recording the resize in `transform`.
+    """
+    scale = plan_working_scale(image, resize_width)
+    if scale >= 1.0:
+        return image
+    height, width = image.shape[:2]
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    with span('resize'):
+        resized = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    if transform is not None:
+        transform.match_size(image.shape, resized.shape)
+    return resized
 
+def to_denoised_grey(
+    image: np.ndarray,
+    denoise: Union[bool, str] = True,
+    report: Optional[Dict[str, Any]] = None
+) -> np.ndarray:
+    """
+    Convert a BGR image to greyscale and denoise it. `denoise=True` picks the
+    tier from the measured noise (see denoise_image); a tier name forces it.
+    """
+    grey = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+    tier = 'auto' if denoise is True else (denoise or 'none')
+    with span('denoise'):
+        return denoise_image(grey, tier, report)
+
+# Laplacian-difference kernel: cancels smooth image content, leaving noise (Immerkaer,
+# 1996)
+_NOISE_KERNEL = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+
+DENOISE_TIERS = ('none', 'median', 'bilateral', 'nlm')
+
+def estimate_noise(grey: np.ndarray, step: int = 2) -> float:
+    """
+    Estimate the standard deviation of the noise in a greyscale image. The
+    median absolute filter response over every `step`-th pixel is used, so
+    text edges, which are a minority of pixels, do not inflate it.
+    """
+    response = cv2.filter2D(grey, cv2.CV_32F, _NOISE_KERNEL)
+    sample = np.abs(response[1:-1:step, 1:-1:step])
+    if sample.size == 0:
+        return 0.0
+    # The kernel's L2 norm is 6; 0.6745 converts a median absolute deviation to sigma
+    return float(np.median(sample)) / (0.6745 * 6.0)
+
+def choose_denoise_tier(noise_sigma: float) -> str:
+    """Cheapest denoising tier whose noise ceiling is above `noise_sigma`."""
+    thresholds = Config.PREPROCESSING_CONFIG['denoise_thresholds']
+    for tier in DENOISE_TIERS[:-1]:
+        if noise_sigma < thresholds[tier]:
+            return tier
+    return 'nlm'
+
+def denoise_image(
+    grey: np.ndarray,
+    tier: str = 'auto',
+    report: Optional[Dict[str, Any]] = None
+) -> np.ndarray:
+    """
+    Denoise a greyscale image with the given tier: none, median, bilateral or
+    nlm (non-local means). With 'auto' the tier is chosen from the measured
+    noise level, so clean images skip the expensive non-local means pass.
+    The tier, noise estimate and time taken are written to `report`.
+    """
+    started = time.perf_counter()
+    noise_sigma = None
+    if tier == 'auto':
+        noise_sigma = estimate_noise(grey)
+        tier = choose_denoise_tier(noise_sigma)
+
+    if tier == 'none':
+        denoised = grey
+    elif tier == 'median':
+        denoised = cv2.medianBlur(grey, 3)
+    elif tier == 'bilateral':
+        denoised = cv2.bilateralFilter(grey, 5, 50, 50)
+    elif tier == 'nlm':
+        # Filter strength follows the measured noise when there is a measurement
+        strength = (
+            3.0 if noise_sigma is None else float(min(max(noise_sigma, 3.0), 15.0))
+        )
+        denoised = cv2.fastNlMeansDenoising(grey, None, strength)
+    else:
+        raise ValueError(f"Unknown denoise tier: {tier}")
+
+    count(f'denoise_{tier}')
+    if report is not None:
+        report.update({
+            'tier': tier,
+            'noise_sigma': round(noise_sigma, 3) if noise_sigma is not None else None,
+            'seconds': round(time.perf_counter() - started, 6)
+        })
+    return denoised
+
+def apply_preprocessing_mode(grey: np.ndarray, preprocessing_mode: str) -> np.ndarray:
+    """Apply the thresholding technique selected by `preprocessing_mode`."""
     # Apply selected preprocessing mode
     if preprocessing_mode == "adaptive_threshold":
         binary = apply_adaptive_threshold(grey)
@@ -63,7 +358,7 @@ def preprocess_image(
         # Default to simple binary threshold
         _, binary = cv2.threshold(grey, 127, 255, cv2.THRESH_BINARY)
 
-    return binary, original_image
+    return binary
 
 def apply_adaptive_threshold(grey: np.ndarray) -> np.ndarray:
     """Apply adaptive thresholding - good for varying lighting conditions."""
@@ -142,33 +437,110 @@ def apply_text_optimised_preprocessing(grey: np.ndarray) -> np.ndarray:
     
     return binary
 
-def auto_rotate_image(image: np.ndarray) -> np.ndarray:
-    """Automatically rotate image to correct orientation using text detection."""
-    grey = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    
-    # Detect edges
-    edges = cv2.Canny(grey, 50, 150, apertureSize=3)
-    
-    # Detect lines
-    lines = cv2.HoughLines(edges, 1, np.pi/180, 100)
-    
-    if lines is not None:
-        angles = []
-        for rho, theta in lines[:, 0]:
-            angle = np.degrees(theta) - 90
-            if -45 < angle < 45:  # Only consider small rotations
-                angles.append(angle)
-        
-        if angles:
-            median_angle = np.median(angles)
-            if abs(median_angle) > 0.5:  # Only rotate if angle is significant
-                return rotate_image(image, median_angle)
-    
-    return image
+def downscale_grey(image: np.ndarray, max_dimension: int) -> np.ndarray:
+    """
+    Greyscale copy of the image, shrunk so its longer side is at most `max_dimension`.
+    """
+    # Shrink before converting, so no full-size greyscale copy is made
+    scale = max_dimension / max(image.shape[:2])
+    if scale < 1:
+        size = (
+            max(1, int(image.shape[1] * scale)),
+            max(1, int(image.shape[0] * scale)),
+        )
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
 
-def rotate_image(image: np.ndarray, angle: float) -> np.ndarray:
-    """Rotate image by specified angle."""
-    (h, w) = image.shape[:2]
+def estimate_skew(
+    image: np.ndarray,
+    max_dimension: Optional[int] = None,
+    max_lines: Optional[int] = None
+) -> Tuple[float, float]:
+    """
+    Estimate how far text lines are tilted from horizontal, in degrees, on a
+    downscaled copy of the image. Characters are closed into line blobs whose
+    edges are found with HoughLinesP; the longest `max_lines` segments vote,
+    weighted by length. Returns the angle and a confidence from 0 to 1: the
+    share of the vote within a degree of the angle, reduced when only a few
+    segments were found.
+    """
+    config = Config.PREPROCESSING_CONFIG
+    grey = downscale_grey(image, max_dimension or config['skew_max_dimension'])
+    max_lines = max_lines or config['skew_max_lines']
+
+    _, binary = cv2.threshold(grey, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    width = grey.shape[1]
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, width // 60), 1))
+    edges = cv2.Canny(
+        cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel), 50, 150, apertureSize=3
+    )
+
+    min_length = max(20, width // 12)
+    lines = cv2.HoughLinesP(
+        edges, 1, np.pi / 360, threshold=max(20, min_length // 2),
+        minLineLength=min_length, maxLineGap=max(5, min_length // 4)
+    )
+    if lines is None:
+        return 0.0, 0.0
+
+    segments = lines.reshape(-1, 4).astype(np.float64)
+    dx = segments[:, 2] - segments[:, 0]
+    dy = segments[:, 3] - segments[:, 1]
+    lengths = np.hypot(dx, dy)
+    angles = (np.degrees(np.arctan2(dy, dx)) + 90) % 180 - 90
+
+    # Only consider small rotations, and only the longest segments
+    near_horizontal = np.abs(angles) < 45
+    angles, lengths = angles[near_horizontal], lengths[near_horizontal]
+    if len(angles) == 0:
+        return 0.0, 0.0
+    longest = np.argsort(-lengths, kind='stable')[:max_lines]
+    angles, lengths = angles[longest], lengths[longest]
+
+    # Length-weighted median angle
+    order = np.argsort(angles, kind='stable')
+    cumulative = np.cumsum(lengths[order])
+    angle = float(angles[order][np.searchsorted(cumulative, cumulative[-1] / 2)])
+
+    agreement = lengths[np.abs(angles - angle) <= 1.0].sum() / lengths.sum()
+    confidence = float(agreement * min(1.0, len(angles) / 4))
+    return angle, confidence
+
+def auto_rotate_image(
+    image: np.ndarray,
+    min_confidence: Optional[float] = None,
+    transform: Optional[ImageTransform] = None
+) -> np.ndarray:
+    """
+    Automatically rotate image to correct orientation using text detection.
+    The skew is estimated on a downscaled copy and applied to the full image
+    once; uncertain estimates (below `min_confidence`) leave it unrotated.
+    A rotation is recorded in `transform` when one is given.
+    """
+    if min_confidence is None:
+        min_confidence = Config.PREPROCESSING_CONFIG['skew_min_confidence']
+
+    angle, confidence = estimate_skew(image)
+    if (
+        confidence < min_confidence or abs(angle) <= 0.5
+    ):  # Only rotate if angle is significant
+        return image
+    matrix, size = rotation_matrix(image.shape, angle)
+    if transform is not None:
+        transform.affine(matrix)
+    return cv2.warpAffine(
+        image, matrix, size, flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE
+    )
+
+
+def rotation_matrix(
+    shape: Tuple[int, ...], angle: float
+) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """
+    Affine matrix rotating an image of `shape` by `angle` without cropping, and the
+    output size.
+    """
+    (h, w) = shape[:2]
     centre = (w // 2, h // 2)
     M = cv2.getRotationMatrix2D(centre, angle, 1.0)
     
@@ -182,34 +554,36 @@ def rotate_image(image: np.ndarray, angle: float) -> np.ndarray:
     M[0, 2] += (new_w / 2) - centre[0]
     M[1, 2] += (new_h / 2) - centre[1]
     
-    return cv2.warpAffine(image, M, (new_w, new_h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
+    return M, (new_w, new_h)
+
+
+def rotate_image(image: np.ndarray, angle: float) -> np.ndarray:
+    """Rotate image by specified angle."""
+    M, size = rotation_matrix(image.shape, angle)
+    return cv2.warpAffine(
+        image, M, size, flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE
+    )
 
 def deskew_image(image: np.ndarray) -> np.ndarray:
     """
     Deskew the image to correct for any rotation.
     """
-    # Convert to greyscale if not already
-    if len(image.shape) == 3:
-        grey = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    else:
-        grey = image.copy()
+    # Measure on a downscaled copy; the angle is the same at any scale
+    grey = downscale_grey(image, Config.PREPROCESSING_CONFIG['skew_max_dimension'])
     
     # Apply threshold to get binary image
     _, binary = cv2.threshold(grey, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
     
-    # Find all non-zero pixels
-    coords = np.column_stack(np.where(binary > 0))
+    # Find all non-zero pixels as (x, y) points
+    coords = cv2.findNonZero(binary)
     
-    if len(coords) == 0:
+    if coords is None:
         return image
     
-    # Calculate the skew angle
+    # Calculate the skew angle. OpenCV versions report minAreaRect angles in
+    # different ranges, but always modulo 90 degrees of the true edge angle
     angle = cv2.minAreaRect(coords)[-1]
-    
-    if angle < -45:
-        angle = -(90 + angle)
-    else:
-        angle = -angle
+    angle = (angle + 45) % 90 - 45
     
     # Skip small angles
     if abs(angle) < 0.5:
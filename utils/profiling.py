@@ -0,0 +1,260 @@
+# utils/profiling.py
+
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import numpy as np
+
+from config import Config
+
+logger = logging.getLogger("product_extractor.profiling")
+
+# Profile of the image currently being processed in this context, if any
+_current_profile: "contextvars.ContextVar[Optional[ImageProfile]]" = (
+    contextvars.ContextVar("current_profile", default=None)
+)
+
+
+class ImageProfile:
+    """Wall time per stage, counters and peak array size for one image."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.counters: Dict[str, int] = {}
+        self.peak_array_bytes = 0
+        self.started = time.perf_counter()
+        self.total_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add_time(self, stage: str, seconds: float):
+        with self._lock:
+            entry = self.stages.setdefault(stage, {'seconds': 0.0, 'calls': 0})
+            entry['seconds'] += seconds
+            entry['calls'] += 1
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def track_array(self, array: np.ndarray):
+        nbytes = getattr(array, 'nbytes', 0)
+        with self._lock:
+            if nbytes > self.peak_array_bytes:
+                self.peak_array_bytes = nbytes
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'image': self.name,
+                'total_seconds': round(self.total_seconds, 6),
+                'stages': {
+                    stage: {
+                        'seconds': round(entry['seconds'], 6),
+                        'calls': entry['calls'],
+                    }
+                    for stage, entry in self.stages.items()
+                },
+                'counters': dict(self.counters),
+                'peak_array_bytes': self.peak_array_bytes,
+            }
+
+
+class MetricsRegistry:
+    """Aggregates finished image profiles for a Prometheus-style text dump."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.images = 0
+            self.total_seconds = 0.0
+            self.stage_seconds = {}
+            self.stage_calls = {}
+            self.counters = {}
+            self.peak_array_bytes = 0
+
+    def record(self, profile: ImageProfile):
+        self.record_dict(profile.to_dict())
+
+    def record_dict(self, data: Dict[str, Any]):
+        """
+        Add a profile given as ImageProfile.to_dict() output, e.g. from a worker
+        process.
+        """
+        with self._lock:
+            self.images += 1
+            self.total_seconds += data['total_seconds']
+            for stage, entry in data['stages'].items():
+                self.stage_seconds[stage] = (
+                    self.stage_seconds.get(stage, 0.0) + entry['seconds']
+                )
+                self.stage_calls[stage] = (
+                    self.stage_calls.get(stage, 0) + entry['calls']
+                )
+            for name, value in data['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            self.peak_array_bytes = max(self.peak_array_bytes, data['peak_array_bytes'])
+
+    def to_prometheus(self, prefix: str = "product_extractor") -> str:
+        """Render the aggregated metrics in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                f"# TYPE {prefix}_images_total counter",
+                f"{prefix}_images_total {self.images}",
+                f"# TYPE {prefix}_image_seconds_total counter",
+                f"{prefix}_image_seconds_total {self.total_seconds:.6f}",
+                f"# TYPE {prefix}_stage_seconds_total counter",
+            ]
+            for stage, seconds in sorted(self.stage_seconds.items()):
+                lines.append(
+                    f'{prefix}_stage_seconds_total{{stage="{stage}"}} {seconds:.6f}'
+                )
+            lines.append(f"# TYPE {prefix}_stage_calls_total counter")
+            for stage, calls in sorted(self.stage_calls.items()):
+                lines.append(f'{prefix}_stage_calls_total{{stage="{stage}"}} {calls}')
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                lines.append(f"{prefix}_{name}_total {value}")
+            lines.append(f"# TYPE {prefix}_peak_array_bytes gauge")
+            lines.append(f"{prefix}_peak_array_bytes {self.peak_array_bytes}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+
+def profiling_enabled() -> bool:
+    return bool(Config.PROFILING_CONFIG.get('enabled'))
+
+
+def start_profile(name: str, enabled: Optional[bool] = None) -> Optional[ImageProfile]:
+    """Create a profile for one image, or None when profiling is disabled."""
+    if not (profiling_enabled() if enabled is None else enabled):
+        return None
+    return ImageProfile(name)
+
+
+def finish_profile(profile: Optional[ImageProfile]):
+    """Stop the clock on a profile, add it to METRICS and log it if configured."""
+    if profile is None:
+        return
+    profile.total_seconds = time.perf_counter() - profile.started
+    METRICS.record(profile)
+    if Config.PROFILING_CONFIG.get('log_profiles'):
+        logger.info(json.dumps(profile.to_dict()))
+
+
+@contextmanager
+def activate_profile(
+    profile: Optional[ImageProfile],
+) -> Iterator[Optional[ImageProfile]]:
+    """
+    Make an existing profile the active one for the block, e.g. while one
+    pipeline stage of that image runs on a worker thread.
+    """
+    if profile is None:
+        yield None
+        return
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+@contextmanager
+def profile_image(
+    name: str, enabled: Optional[bool] = None
+) -> Iterator[Optional[ImageProfile]]:
+    """
+    Collect a profile for everything run inside the block. Yields None when
+    profiling is disabled, in which case every span below is a no-op.
+    """
+    profile = start_profile(name, enabled)
+    try:
+        with activate_profile(profile):
+            yield profile
+    finally:
+        finish_profile(profile)
+
+
+def current_profile() -> Optional[ImageProfile]:
+    return _current_profile.get()
+
+
+class _Span:
+    """Times one stage of the active profile."""
+
+    __slots__ = ('profile', 'stage', 'started')
+
+    def __init__(self, profile: ImageProfile, stage: str):
+        self.profile = profile
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profile.add_time(self.stage, time.perf_counter() - self.started)
+
+
+class _NullSpan:
+    """Shared do-nothing span used when no profile is active."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(stage: str):
+    """Context manager timing a pipeline stage; free when profiling is off."""
+    profile = _current_profile.get()
+    if profile is None:
+        return _NULL_SPAN
+    return _Span(profile, stage)
+
+
+def timed(stage: str) -> Callable:
+    """Decorator form of span()."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = _current_profile.get()
+            if profile is None:
+                return func(*args, **kwargs)
+            with _Span(profile, stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name: str, amount: int = 1):
+    """Increment a per-image counter such as OCR calls or regions."""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.count(name, amount)
+
+
+def track_array(array: np.ndarray) -> np.ndarray:
+    """Record an intermediate array's size for the peak-bytes metric and return it."""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.track_array(array)
+    return array
@@ -0,0 +1,231 @@
+# utils/result_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config import Config
+from utils.keyword_index import index_cache_path
+from utils.ocr_backend import get_ocr_backend
+
+# Bump when a change to the pipeline makes previously cached results stale
+PIPELINE_VERSION = "9"
+
+# Settings that change the OCR result and therefore the cache key. Classification
+# (min_confidence, keywords, dictionaries) is re-run on every hit instead.
+CACHE_KEY_SETTINGS = ('preprocessing_mode', 'resize_width', 'denoise', 'tiled')
+
+# Config sections that shape the OCR result, hashed into every key; the keys
+# listed below only change speed, storage or classification
+CACHE_KEY_CONFIG = (
+    'OCR_CONFIG', 'PREPROCESSING_CONFIG', 'REGION_CONFIG', 'TEXT_GATE_CONFIG',
+    'TILING_CONFIG'
+)
+CACHE_KEY_IGNORED = {
+    'min_confidence', 'backend', 'strategy_stats_path', 'max_cached_variants',
+    'region_workers', 'max_ocr_threads'
+}
+
+
+def engine_version() -> str:
+    """Version string of the OCR engine and pipeline, part of every cache key."""
+    return f"{get_ocr_backend().version()}/pipeline-{PIPELINE_VERSION}"
+
+
+def keyword_fingerprint() -> Optional[str]:
+    """
+    Fingerprint of the keywords the OCR strategy search consults to accept a
+    region early, since they can change which text is read. None when early
+    acceptance is off.
+    """
+    keyword_config = Config.KEYWORD_CONFIG
+    threshold = Config.OCR_CONFIG.get('keyword_accept_confidence')
+    if threshold is None or not keyword_config.get('fuzzy_matching'):
+        return None
+    relevant = {
+        'threshold': threshold,
+        'keywords': {
+            category: sorted(words) for category, words in Config.KEYWORDS.items()
+        },
+        'fuzzy': [
+            keyword_config.get('fuzzy_max_distance', 1),
+            keyword_config.get('fuzzy_min_length', 5),
+        ],
+    }
+    if keyword_config.get('fuzzy_dictionaries') and keyword_config.get('dictionaries'):
+        # Changes with the dictionaries' paths, sizes and modification times
+        relevant['dictionaries'] = index_cache_path(keyword_config['dictionaries'], '')
+    return hashlib.sha256(
+        json.dumps(relevant, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+
+
+def config_fingerprint() -> str:
+    """
+    Fingerprint of the OCR, preprocessing, region, gate and tiling settings,
+    so changing any of them misses the cache instead of serving stale texts.
+    """
+    relevant = {
+        section: {
+            name: value for name, value in getattr(Config, section).items()
+            if name not in CACHE_KEY_IGNORED
+        }
+        for section in CACHE_KEY_CONFIG
+    }
+    return hashlib.sha256(
+        json.dumps(relevant, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+
+
+def cache_key(
+    image_bytes: bytes, settings: Dict[str, Any], version: Optional[str] = None
+) -> str:
+    """
+    Content-addressed key: hash of the image bytes plus the settings, config
+    and keywords that affect OCR.
+    """
+    relevant = {name: settings.get(name) for name in CACHE_KEY_SETTINGS}
+    relevant['engine_version'] = version or engine_version()
+    relevant['config'] = config_fingerprint()
+    relevant['keywords'] = keyword_fingerprint()
+
+    digest = hashlib.sha256()
+    digest.update(bytes(image_bytes))
+    digest.update(json.dumps(relevant, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    SQLite-backed store of extraction results with size-based LRU eviction.
+    Safe to share between threads; several processes may open the same file.
+    """
+
+    def __init__(self, path: str, max_bytes: Optional[int] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS results_last_access "
+                "ON results (last_access)"
+            )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored result for a key, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE results SET last_access = ? WHERE key = ?",
+                    (time.time(), key),
+                )
+            self.hits += 1
+        result: Dict[str, Any] = json.loads(row[0])
+        return result
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """
+        Store a result, evicting least recently used entries beyond the size limit.
+        """
+        blob = json.dumps(value, ensure_ascii=False).encode('utf-8')
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time()),
+            )
+            if self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Delete the oldest entries until the total size fits the limit."""
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM results ORDER BY last_access ASC"
+        )
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM results WHERE key = ?", stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this instance plus the current store size."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+            'size_bytes': size
+        }
+
+    def clear(self):
+        """Remove every stored result."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM results")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_pid = None
+_default_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Return the process-wide result cache, or None when caching is disabled."""
+    global _default_cache, _default_pid
+    cache_config = Config.CACHE_CONFIG
+    if not cache_config.get('enabled'):
+        return None
+    # SQLite connections must not be shared with forked worker processes
+    def stale() -> bool:
+        return (
+            _default_cache is None or _default_pid != os.getpid()
+            or _default_cache.path != cache_config['path']
+        )
+
+    if stale():
+        with _default_lock:
+            if stale():
+                _default_pid = os.getpid()
+                max_size_mb = cache_config.get('max_size_mb')
+                _default_cache = ResultCache(
+                    cache_config['path'],
+                    max_bytes=int(max_size_mb * 1024 * 1024) if max_size_mb else None
+                )
+    return _default_cache
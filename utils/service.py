@@ -0,0 +1,525 @@
+# utils/service.py
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from config import Config
+from utils.pipeline import Pipeline
+from utils.profiling import METRICS
+
+logger = logging.getLogger("product_extractor.service")
+
+BatchProcessor = Callable[[List[Tuple[str, bytes]]], Iterable[Dict[str, Any]]]
+# A queued request: its (filename, bytes) source and the future its result goes to
+QueuedRequest = Tuple[Tuple[str, bytes], "asyncio.Future[Dict[str, Any]]"]
+
+
+class ServiceOverloaded(Exception):
+    """Raised when a request arrives while the queue is at its depth limit."""
+
+
+class HTTPError(Exception):
+    """A request that should be answered with an error status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class LatencyTracker:
+    """Latencies of the most recent requests, for p50/p95 reporting."""
+
+    def __init__(self, window: int = 1024):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Nearest-rank percentile of the recorded latencies, or None if empty."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(1, math.ceil(percent / 100.0 * len(ordered)))
+        return ordered[rank - 1]
+
+    def summary(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            'samples': len(self._samples),
+            'p50_seconds': round(p50, 6) if p50 is not None else None,
+            'p95_seconds': round(p95, 6) if p95 is not None else None
+        }
+
+
+class ExtractionService:
+    """
+    Coalesces concurrent extraction requests into micro-batches.
+
+    Requests wait in a bounded queue; one that arrives when the queue is full
+    is rejected straight away rather than piling up latency. A batch is
+    collected when a worker slot is free: the first request waits up to
+    `batch_wait_ms` for others to join, up to `max_batch_size`. Each batch is
+    streamed through the extraction pipeline on a worker thread, so its
+    images overlap across stages, and every request is answered as soon as
+    its own result is ready. Must be started and used on one event loop.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[Dict[str, Any]] = None,
+        process_batch: Optional[BatchProcessor] = None,
+        max_batch_size: Optional[int] = None,
+        batch_wait_ms: Optional[float] = None,
+        batch_workers: Optional[int] = None,
+        max_queue_depth: Optional[int] = None,
+        request_timeout: Optional[float] = None
+    ):
+        service_config = Config.SERVICE_CONFIG
+        self.max_batch_size = max(1, max_batch_size or service_config['max_batch_size'])
+        self.batch_wait = (
+            batch_wait_ms
+            if batch_wait_ms is not None
+            else service_config['batch_wait_ms']
+        ) / 1000.0
+        self.batch_workers = max(1, batch_workers or service_config['batch_workers'])
+        self.max_queue_depth = max(
+            1, max_queue_depth or service_config['max_queue_depth']
+        )
+        self.request_timeout = (
+            request_timeout or service_config['request_timeout_seconds']
+        )
+
+        self.pipeline = Pipeline(settings=settings)
+        self.process_batch = process_batch or self._run_pipeline
+        self.latency = LatencyTracker(service_config['latency_window'])
+        self.counts = {
+            'requests': 0,
+            'rejected': 0,
+            'timeouts': 0,
+            'batches': 0,
+            'batched_requests': 0,
+        }
+
+        # Created by start(), on the event loop the service runs on
+        self._queue: "asyncio.Queue[QueuedRequest]"
+        self._slots: asyncio.Semaphore
+        self._executor: ThreadPoolExecutor
+        self._batcher: Optional["asyncio.Task[None]"] = None
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    def _run_pipeline(self, batch: List[Tuple[str, bytes]]) -> Iterable[Dict[str, Any]]:
+        return self.pipeline.run(batch, ordered=True)
+
+    async def start(self):
+        self._queue = asyncio.Queue(self.max_queue_depth)
+        self._slots = asyncio.Semaphore(self.batch_workers)
+        self._executor = ThreadPoolExecutor(
+            self.batch_workers, thread_name_prefix='extract-batch'
+        )
+        self._batcher = asyncio.create_task(self._collect_batches())
+
+    async def close(self):
+        """Stop batching, finish batches already running and fail queued requests."""
+        if self._batcher is None:
+            return
+        self._batcher.cancel()
+        try:
+            await self._batcher
+        except asyncio.CancelledError:
+            pass
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(ServiceOverloaded("Service is shutting down"))
+        self._executor.shutdown(wait=True)
+        self._batcher = None
+
+    async def __aenter__(self) -> "ExtractionService":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def submit(self, filename: str, data: bytes) -> Dict[str, Any]:
+        """
+        Queue one image and wait for its result. Raises ServiceOverloaded when
+        the queue is full and asyncio.TimeoutError after `request_timeout`.
+        """
+        if self._batcher is None:
+            raise RuntimeError("Service has not been started")
+        started = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait(((filename, data), future))
+        except asyncio.QueueFull:
+            self.counts['rejected'] += 1
+            raise ServiceOverloaded(
+                f"Queue depth limit of {self.max_queue_depth} reached"
+            )
+        self.counts['requests'] += 1
+
+        try:
+            # A cancelled future is dropped from its batch if it was not dispatched yet
+            return await asyncio.wait_for(future, self.request_timeout)
+        except asyncio.TimeoutError:
+            self.counts['timeouts'] += 1
+            raise
+        finally:
+            self.latency.add(time.perf_counter() - started)
+
+    async def _collect_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Waiting for a free slot first lets requests accumulate into larger batches
+            # under load
+            await self._slots.acquire()
+            try:
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self.batch_wait
+                while len(batch) < self.max_batch_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(
+                            await asyncio.wait_for(self._queue.get(), remaining)
+                        )
+                    except asyncio.TimeoutError:
+                        break
+            except BaseException:
+                self._slots.release()
+                raise
+
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: List[QueuedRequest]):
+        loop = asyncio.get_running_loop()
+        sources = [source for source, _ in batch]
+        futures = [future for _, future in batch]
+
+        def resolve(future: asyncio.Future, result: Dict[str, Any]):
+            if not future.done():
+                future.set_result(result)
+
+        def run():
+            for future, result in zip(futures, self.process_batch(sources)):
+                loop.call_soon_threadsafe(resolve, future, result)
+
+        error: Exception
+        try:
+            await loop.run_in_executor(self._executor, run)
+            self.counts['batches'] += 1
+            self.counts['batched_requests'] += len(batch)
+            error = RuntimeError("No result was produced for this image")
+        except Exception as e:
+            logger.error(f"Batch of {len(batch)} images failed: {str(e)}")
+            error = e
+        finally:
+            self._slots.release()
+
+        # Results resolved by run() were scheduled before the executor finished
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+
+    def stats(self) -> Dict[str, Any]:
+        """Request counts, queue depth, mean batch size and latency percentiles."""
+        batches = self.counts['batches']
+        return {
+            **self.counts,
+            'queue_depth': self._queue.qsize() if self._batcher is not None else 0,
+            'max_queue_depth': self.max_queue_depth,
+            'mean_batch_size': (
+                round(self.counts['batched_requests'] / batches, 3) if batches else 0.0
+            ),
+            'latency': self.latency.summary(),
+        }
+
+    def to_prometheus(self, prefix: str = "product_extractor") -> str:
+        """Service counters and latency percentiles in the Prometheus text format."""
+        stats = self.stats()
+        lines = []
+        for name in ('requests', 'rejected', 'timeouts', 'batches'):
+            lines.append(f"# TYPE {prefix}_service_{name}_total counter")
+            lines.append(f"{prefix}_service_{name}_total {stats[name]}")
+        lines.append(f"# TYPE {prefix}_service_queue_depth gauge")
+        lines.append(f"{prefix}_service_queue_depth {stats['queue_depth']}")
+        lines.append(f"# TYPE {prefix}_service_latency_seconds gauge")
+        for quantile, key in (('0.5', 'p50_seconds'), ('0.95', 'p95_seconds')):
+            value = stats['latency'][key]
+            if value is not None:
+                lines.append(
+                    f'{prefix}_service_latency_seconds'
+                    f'{{quantile="{quantile}"}} {value:.6f}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+# Minimal HTTP/1.1 front end, so the service needs nothing beyond the standard library
+
+
+async def read_request(
+    reader: asyncio.StreamReader, max_body_bytes: int
+) -> Optional[Dict[str, Any]]:
+    """Read one request; None when the client closed the connection."""
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    parts = request_line.decode('latin-1').split()
+    if len(parts) != 3:
+        raise HTTPError(400, "Malformed request line")
+    method, target, version = parts
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get('content-length') or 0)
+    except ValueError:
+        raise HTTPError(400, "Invalid Content-Length")
+    if length > max_body_bytes:
+        raise HTTPError(413, f"Image larger than {max_body_bytes} bytes")
+
+    url = urlsplit(target)
+    return {
+        'method': method.upper(),
+        'path': url.path,
+        'query': {key: values[-1] for key, values in parse_qs(url.query).items()},
+        'headers': headers,
+        'keep_alive': headers.get('connection', '').lower() != 'close'
+        and version != 'HTTP/1.0',
+        'body': await reader.readexactly(length) if length else b'',
+    }
+
+
+def encode_response(
+    status: int,
+    payload: Any,
+    keep_alive: bool = True,
+    headers: Optional[Dict[str, str]] = None
+) -> bytes:
+    """Serialise a JSON (or plain text, for str payloads) HTTP response."""
+    if isinstance(payload, str):
+        body, content_type = payload.encode('utf-8'), 'text/plain; version=0.0.4'
+    else:
+        body, content_type = (
+            json.dumps(payload, ensure_ascii=False).encode('utf-8'),
+            'application/json',
+        )
+    lines = [
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}"
+    ]
+    lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + body
+
+
+async def route(
+    service: ExtractionService, request: Dict[str, Any]
+) -> Tuple[int, Any, Dict[str, str]]:
+    """Answer one request with (status, payload, extra headers)."""
+    method, path = request['method'], request['path']
+
+    if path == '/extract':
+        if method != 'POST':
+            raise HTTPError(405, "Use POST with the image bytes as the request body")
+        if not request['body']:
+            raise HTTPError(400, "Empty request body")
+        filename = (
+            request['query'].get('filename')
+            or request['headers'].get('x-filename')
+            or 'upload'
+        )
+        started = time.perf_counter()
+        try:
+            result = await service.submit(filename, request['body'])
+        except ServiceOverloaded as e:
+            return 503, {'error': str(e)}, {'Retry-After': '1'}
+        except asyncio.TimeoutError:
+            return 504, {'error': "Extraction timed out"}, {}
+        result = {**result, 'latency_seconds': round(time.perf_counter() - started, 6)}
+        return (422 if result['status'].startswith('error') else 200), result, {}
+
+    if method != 'GET':
+        raise HTTPError(405, f"{method} is not supported on {path}")
+    if path == '/health':
+        return 200, {'status': 'ok'}, {}
+    if path == '/stats':
+        return 200, service.stats(), {}
+    if path == '/metrics':
+        return 200, service.to_prometheus() + METRICS.to_prometheus(), {}
+    raise HTTPError(404, f"No route for {path}")
+
+
+async def handle_connection(
+    service: ExtractionService,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    max_body_bytes: Optional[int] = None
+):
+    """Serve requests on one keep-alive connection until the client is done."""
+    if max_body_bytes is None:
+        max_body_bytes = Config.UI_CONFIG['max_file_size_mb'] * 1024 * 1024
+    try:
+        while True:
+            try:
+                request = await read_request(reader, max_body_bytes)
+            except HTTPError as e:
+                # The rest of the request was not read, so the connection cannot be
+                # reused
+                writer.write(
+                    encode_response(e.status, {'error': e.message}, keep_alive=False)
+                )
+                await writer.drain()
+                break
+            if request is None:
+                break
+
+            try:
+                status, payload, headers = await route(service, request)
+            except HTTPError as e:
+                status, payload, headers = e.status, {'error': e.message}, {}
+            except Exception as e:
+                logger.error(
+                    f"Error handling {request['method']} {request['path']}: {str(e)}"
+                )
+                status, payload, headers = 500, {'error': str(e)}, {}
+
+            writer.write(
+                encode_response(status, payload, request['keep_alive'], headers)
+            )
+            await writer.drain()
+            if not request['keep_alive']:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_http_server(
+    service: ExtractionService,
+    host: Optional[str] = None,
+    port: Optional[int] = None
+) -> asyncio.Server:
+    """
+    Listen for HTTP requests for an already started service (port 0 picks a free port).
+    """
+    service_config = Config.SERVICE_CONFIG
+
+    async def on_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await handle_connection(service, reader, writer)
+
+    return await asyncio.start_server(
+        on_connection,
+        host or service_config['host'],
+        service_config['port'] if port is None else port
+    )
+
+
+async def serve(
+    host: Optional[str] = None, port: Optional[int] = None, **service_options
+):
+    """Run the extraction service until cancelled."""
+    async with ExtractionService(**service_options) as service:
+        server = await start_http_server(service, host, port)
+        address = server.sockets[0].getsockname()
+        logger.info(f"Extraction service listening on http://{address[0]}:{address[1]}")
+        async with server:
+            await server.serve_forever()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command-line options for the HTTP service."""
+    service_config = Config.SERVICE_CONFIG
+    parser = argparse.ArgumentParser(
+        prog='product-extractor-service',
+        description='Serve product information extraction over HTTP '
+        '(POST image bytes to /extract).',
+    )
+    parser.add_argument('--host', default=service_config['host'])
+    parser.add_argument('--port', type=int, default=service_config['port'])
+    parser.add_argument(
+        '--mode',
+        default=Config.PREPROCESSING_CONFIG['default_mode'],
+        help='Preprocessing mode',
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=service_config['max_batch_size'],
+        help='Max requests per batch',
+    )
+    parser.add_argument(
+        '--batch-wait-ms',
+        type=float,
+        default=service_config['batch_wait_ms'],
+        help='How long a request waits for others to join its batch',
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=service_config['batch_workers'],
+        help='Batches processed at once',
+    )
+    parser.add_argument(
+        '--max-queue',
+        type=int,
+        default=service_config['max_queue_depth'],
+        help='Queued requests before new ones are rejected with 503',
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for the product-extractor-service console script."""
+    logging.basicConfig(level=logging.INFO)
+    args = build_parser().parse_args(argv)
+    try:
+        asyncio.run(serve(
+            args.host,
+            args.port,
+            settings={'preprocessing_mode': args.mode},
+            max_batch_size=args.batch_size,
+            batch_wait_ms=args.batch_wait_ms,
+            batch_workers=args.workers,
+            max_queue_depth=args.max_queue
+        ))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,379 @@
+# utils/strategy_scheduler.py
+
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import (
+    Any, Callable, Dict, Iterator, List, Literal, Optional, Tuple, Union, overload
+)
+
+import numpy as np
+
+from config import Config
+
+try:
+    import fcntl
+    _HAS_FLOCK = True
+except ImportError:  # pragma: no cover - not available on Windows
+    _HAS_FLOCK = False
+
+# Preprocessing variants tried for each region, in their original order
+PREPROCESSING_STRATEGIES = ['enhanced', 'grey', 'text_detection']
+
+# Page segmentation modes tried for each region, in their original order
+REGION_PSM_MODES = [6, 8, 7, 11, 13]
+
+Strategy = Tuple[str, int]
+
+
+def default_strategies() -> List[Strategy]:
+    """Return every (preprocessing, PSM) pair in the exhaustive search order."""
+    return [
+        (name, psm) for name in PREPROCESSING_STRATEGIES for psm in REGION_PSM_MODES
+    ]
+
+
+def strategy_key(strategy: Strategy) -> str:
+    """Serialise a strategy for the persisted statistics file."""
+    return f"{strategy[0]}:{strategy[1]}"
+
+
+def read_stats(path: str) -> Dict[str, Dict[str, int]]:
+    """Read a statistics file, treating a missing or unreadable one as empty."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(stored, dict):
+        return {}
+    return {
+        key: {
+            'wins': int(counts.get('wins', 0)),
+            'trials': int(counts.get('trials', 0)),
+        }
+        for key, counts in stored.items()
+        if isinstance(counts, dict)
+    }
+
+
+# Serialises saves between threads; the lock file does the same between processes
+_save_lock = threading.Lock()
+
+
+@contextmanager
+def _stats_file_lock(path: str) -> Iterator[None]:
+    """Hold an exclusive lock on `path` for a read-merge-write cycle."""
+    with _save_lock, open(f"{path}.lock", 'a') as lock_file:
+        if _HAS_FLOCK:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if _HAS_FLOCK:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class StrategyScheduler:
+    """
+    Orders (preprocessing, PSM) strategies by their historical win-rate and
+    keeps the statistics on disk so the ordering adapts to the image mix.
+    """
+
+    def __init__(
+        self,
+        strategies: Optional[List[Strategy]] = None,
+        confidence_target: Optional[float] = None,
+        max_calls_per_image: Optional[int] = None,
+        time_budget: Optional[float] = None,
+        stats_path: Optional[str] = None
+    ):
+        ocr_config = Config.OCR_CONFIG
+        self.strategies = strategies or default_strategies()
+        self.confidence_target = (
+            confidence_target
+            if confidence_target is not None
+            else ocr_config.get('confidence_target', 85.0)
+        )
+        self.max_calls_per_image = (
+            max_calls_per_image
+            if max_calls_per_image is not None
+            else ocr_config.get('max_calls_per_image')
+        )
+        self.time_budget = (
+            time_budget
+            if time_budget is not None
+            else ocr_config.get('time_budget_seconds')
+        )
+        self.stats_path = stats_path
+        self.stats = {
+            strategy_key(s): {'wins': 0, 'trials': 0} for s in self.strategies
+        }
+        # Counts as last read from or written to disk; the rest is this process's own
+        self._persisted = {key: dict(counts) for key, counts in self.stats.items()}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Load persisted win-rate statistics, ignoring unreadable files."""
+        if not self.stats_path:
+            return
+        stored = read_stats(self.stats_path)
+        with self._lock:
+            for key, counts in stored.items():
+                if key in self.stats:
+                    self.stats[key] = dict(counts)
+            self._persisted = {key: dict(counts) for key, counts in self.stats.items()}
+
+    def save(self):
+        """
+        Merge this scheduler's new counts into the statistics file and write
+        it atomically. Other threads and processes saving to the same file add
+        their counts rather than overwrite them.
+        """
+        if not self.stats_path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.stats_path))
+        os.makedirs(directory, exist_ok=True)
+        with _stats_file_lock(self.stats_path):
+            stored = read_stats(self.stats_path)
+            with self._lock:
+                for key, counts in self.stats.items():
+                    base = stored.setdefault(key, {'wins': 0, 'trials': 0})
+                    for field in ('wins', 'trials'):
+                        base[field] += counts[field] - self._persisted[key][field]
+                    self.stats[key] = dict(base)
+                self._persisted = {
+                    key: dict(counts) for key, counts in self.stats.items()
+                }
+            snapshot = json.dumps(stored, indent=2)
+
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(snapshot)
+                os.replace(tmp_path, self.stats_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+    def win_rate(self, strategy: Strategy) -> float:
+        """Laplace-smoothed win-rate, so untried strategies still get explored."""
+        counts = self.stats[strategy_key(strategy)]
+        return (counts['wins'] + 1) / (counts['trials'] + 2)
+
+    def ordered_strategies(self) -> List[Strategy]:
+        """Return strategies by descending win-rate, ties keeping the default order."""
+        with self._lock:
+            return sorted(self.strategies, key=lambda s: -self.win_rate(s))
+
+    def record_region(self, tried: List[Strategy], winner: Optional[Strategy]):
+        """Update statistics with the strategies tried on one region and the winner."""
+        with self._lock:
+            for strategy in tried:
+                self.stats[strategy_key(strategy)]['trials'] += 1
+            if winner is not None:
+                self.stats[strategy_key(winner)]['wins'] += 1
+
+    def begin_image(self) -> "StrategyRun":
+        """Start the per-image search with a fresh call and time budget."""
+        return StrategyRun(self)
+
+
+class StrategyRun:
+    """Per-image strategy search with early exit and a call/time budget."""
+
+    def __init__(self, scheduler: StrategyScheduler):
+        self.scheduler = scheduler
+        self.order = scheduler.ordered_strategies()
+        self.started = time.perf_counter()
+        self.calls = 0
+        self.regions_searched = 0
+        self.regions_skipped = 0
+        self.regions_gated = 0
+        self.regions_reused = 0
+        self.early_exits = 0
+        self._lock = threading.Lock()
+
+    def exhausted(self) -> bool:
+        """Return True once the per-image call or time budget is spent."""
+        max_calls = self.scheduler.max_calls_per_image
+        if max_calls and self.calls >= max_calls:
+            return True
+        time_budget = self.scheduler.time_budget
+        if time_budget and time.perf_counter() - self.started >= time_budget:
+            return True
+        return False
+
+    def skip_region(self):
+        """Count a region that was not searched because the budget ran out."""
+        with self._lock:
+            self.regions_skipped += 1
+
+    def gate_regions(self, gated: int):
+        """Count regions the text gate dropped before any OCR call."""
+        with self._lock:
+            self.regions_gated += gated
+
+    def reuse_region(self):
+        """Count a region answered from words already read, without OCR."""
+        with self._lock:
+            self.regions_reused += 1
+
+    def _take_call(self) -> bool:
+        """Reserve one OCR call against the budget."""
+        with self._lock:
+            if self.exhausted():
+                return False
+            self.calls += 1
+            return True
+
+    @overload
+    def search_region(
+        self,
+        get_variant: Callable[[str], np.ndarray],
+        run_ocr: Callable[[np.ndarray, int], Tuple[str, float]],
+        accept: Optional[Callable[[str, float], bool]] = ...,
+        with_strategy: Literal[False] = ...,
+    ) -> Tuple[str, float]: ...
+
+    @overload
+    def search_region(
+        self,
+        get_variant: Callable[[str], np.ndarray],
+        run_ocr: Callable[[np.ndarray, int], Tuple[str, float]],
+        accept: Optional[Callable[[str, float], bool]],
+        with_strategy: Literal[True],
+    ) -> Tuple[str, float, Optional[str]]: ...
+
+    @overload
+    def search_region(
+        self,
+        get_variant: Callable[[str], np.ndarray],
+        run_ocr: Callable[[np.ndarray, int], Tuple[str, float]],
+        accept: Optional[Callable[[str, float], bool]] = ...,
+        *,
+        with_strategy: Literal[True],
+    ) -> Tuple[str, float, Optional[str]]: ...
+
+    def search_region(
+        self,
+        get_variant: Callable[[str], np.ndarray],
+        run_ocr: Callable[[np.ndarray, int], Tuple[str, float]],
+        accept: Optional[Callable[[str, float], bool]] = None,
+        with_strategy: bool = False
+    ) -> Union[Tuple[str, float], Tuple[str, float, Optional[str]]]:
+        """
+        Try strategies on one region in win-rate order and return the best
+        (text, confidence), plus the winning strategy's key if `with_strategy`.
+        Stops as soon as the confidence target is met or `accept` approves a
+        result, or when the image budget runs out.
+        """
+        best_text = ""
+        best_confidence = 0.0
+        winner = None
+        tried = []
+        variants = {}
+        failed = set()
+        exhausted = False
+
+        for strategy in self.order:
+            name, psm = strategy
+            if name in failed:
+                continue
+
+            if name not in variants:
+                try:
+                    variants[name] = get_variant(name)
+                except Exception:
+                    failed.add(name)
+                    continue
+
+            if not self._take_call():
+                exhausted = True
+                break
+
+            try:
+                text, confidence = run_ocr(variants[name], psm)
+            except Exception:
+                failed.add(name)
+                continue
+            tried.append(strategy)
+
+            if confidence > best_confidence and len(text) > 2:
+                best_text = text
+                best_confidence = confidence
+                winner = strategy
+
+                if confidence >= self.scheduler.confidence_target or (
+                    accept and accept(text, confidence)
+                ):
+                    with self._lock:
+                        self.early_exits += 1
+                    break
+
+        with self._lock:
+            if tried:
+                self.regions_searched += 1
+            elif exhausted:
+                self.regions_skipped += 1
+        self.scheduler.record_region(tried, winner)
+
+        if with_strategy:
+            return (
+                best_text,
+                best_confidence,
+                strategy_key(winner) if winner is not None else None,
+            )
+        return best_text, best_confidence
+
+    def report(self) -> Dict[str, Any]:
+        """Summarise the search, including calls saved against the exhaustive search."""
+        regions = (
+            self.regions_searched
+            + self.regions_skipped
+            + self.regions_gated
+            + self.regions_reused
+        )
+        exhaustive_calls = regions * len(self.scheduler.strategies)
+        return {
+            'ocr_calls': self.calls,
+            'exhaustive_calls': exhaustive_calls,
+            'calls_saved': exhaustive_calls - self.calls,
+            'regions_searched': self.regions_searched,
+            'regions_skipped': self.regions_skipped,
+            'regions_gated': self.regions_gated,
+            'ocr_calls_pruned': self.regions_gated * len(self.scheduler.strategies),
+            'regions_reused': self.regions_reused,
+            'early_exits': self.early_exits,
+            'budget_exhausted': self.exhausted(),
+            'search_seconds': time.perf_counter() - self.started
+        }
+
+    def finish(self) -> Dict[str, Any]:
+        """Persist the updated statistics and return the search report."""
+        self.scheduler.save()
+        return self.report()
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def get_strategy_scheduler() -> StrategyScheduler:
+    """
+    Return the process-wide scheduler backed by
+    Config.OCR_CONFIG['strategy_stats_path'].
+    """
+    global _default_scheduler
+    if _default_scheduler is None:
+        with _default_lock:
+            if _default_scheduler is None:
+                _default_scheduler = StrategyScheduler(
+                    stats_path=Config.OCR_CONFIG.get('strategy_stats_path')
+                )
+    return _default_scheduler
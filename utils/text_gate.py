@@ -0,0 +1,170 @@
+# utils/text_gate.py
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import Config
+from utils.profiling import count, timed
+
+Region = Tuple[int, int, int, int]
+
+
+def _ramp(value: float, low: float, high: float) -> float:
+    """
+    0 at or below `low`, 1 at or above `high`, linear in between (reversed if low >
+    high).
+    """
+    if low == high:
+        return float(value >= high)
+    return float(np.clip((value - low) / (high - low), 0.0, 1.0))
+
+
+def region_features(
+    grey_roi: np.ndarray, max_pixels: Optional[int] = None
+) -> Dict[str, float]:
+    """
+    Cheap text-presence features of a greyscale region: contrast, edge
+    density, aspect ratio, ink share, connected-component counts and stroke-width
+    statistics. Large regions are sampled down to about `max_pixels` first.
+    """
+    max_pixels = max_pixels or Config.TEXT_GATE_CONFIG['max_pixels']
+    height, width = grey_roi.shape[:2]
+    scale = min(1.0, (max_pixels / float(height * width)) ** 0.5)
+    if scale < 1.0:
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        grey_roi = cv2.resize(grey_roi, size, interpolation=cv2.INTER_AREA)
+
+    _, binary = cv2.threshold(grey_roi, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # Crops are padded, so their border is mostly background, whichever the polarity
+    border = np.concatenate((binary[0], binary[-1], binary[:, 0], binary[:, -1]))
+    if np.count_nonzero(border) > border.size // 2:
+        binary = cv2.bitwise_not(binary)
+
+    features = {
+        'contrast': float(grey_roi.std()),
+        'edge_density': cv2.countNonZero(cv2.Canny(grey_roi, 50, 150))
+        / float(grey_roi.size),
+        'aspect_ratio': width / float(height),
+        'ink_fraction': cv2.countNonZero(binary) / float(binary.size),
+        'components': 0,
+        'char_fraction': 0.0,
+        'bar_fraction': 0.0,
+        'stroke_ratio': 0.0,
+        'stroke_variation': 0.0,
+    }
+
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    visible = stats[1:, cv2.CC_STAT_AREA] >= 4
+    heights = stats[1:, cv2.CC_STAT_HEIGHT][visible]
+    widths = stats[1:, cv2.CC_STAT_WIDTH][visible]
+    if len(heights) == 0:
+        return features
+
+    # Sizes are judged against the typical component, so multi-line blocks work too
+    typical_height = float(np.median(heights))
+    char_like = (
+        (heights >= 4)
+        & (heights >= 0.5 * typical_height)
+        & (heights <= 2.0 * typical_height)
+        & (widths <= 3 * heights)
+    )
+    bar_like = (heights >= 5 * widths) & (heights >= 0.8 * typical_height)
+
+    # Stroke widths from distance-transform ridges (twice the distance to the
+    # background)
+    distance = cv2.distanceTransform(binary, cv2.DIST_L2, 3)
+    ridges = (distance >= cv2.dilate(distance, np.ones((3, 3), np.uint8))) & (
+        binary > 0
+    )
+    strokes = 2.0 * distance[ridges]
+
+    features.update(
+        {
+            'components': int(len(heights)),
+            'char_fraction': float(np.count_nonzero(char_like)) / len(heights),
+            'bar_fraction': float(np.count_nonzero(bar_like)) / len(heights),
+            'stroke_ratio': (
+                float(np.median(strokes)) / typical_height if strokes.size else 0.0
+            ),
+            'stroke_variation': (
+                float(strokes.std() / strokes.mean()) if strokes.size else 0.0
+            ),
+        }
+    )
+    return features
+
+
+def text_score(features: Dict[str, float]) -> float:
+    """
+    Likelihood-style score from 0 to 1 that a region holds text: the weakest
+    of several soft checks, each 1 for typical printed text and falling to 0
+    for flat areas, textures, barcodes, glare and solid logos.
+    """
+    if features['components'] == 0:
+        return 0.0
+    checks = (
+        _ramp(features['contrast'], 12.0, 25.0),  # Flat areas and glare
+        _ramp(features['char_fraction'], 0.15, 0.4),  # Textures, noise
+        # Noise splits evenly, text ink is sparse
+        _ramp(features['ink_fraction'], 0.5, 0.4),
+        _ramp(features['edge_density'], 0.45, 0.3),  # Fine textures
+        # Barcodes
+        (
+            _ramp(features['bar_fraction'], 0.6, 0.3)
+            if features['components'] >= 6 else 1.0
+        ),
+        _ramp(features['stroke_ratio'], 0.6, 0.45),  # Solid shapes, logos, glare
+        _ramp(features['stroke_ratio'], 0.05, 0.1),  # Hairline weaves and bars
+        _ramp(features['stroke_variation'], 1.0, 0.6),  # Irregular strokes
+        _ramp(features['aspect_ratio'], 0.1, 0.2),  # Tall slivers
+    )
+    return min(checks)
+
+
+@timed('text_gate')
+def gate_regions(
+    grey: np.ndarray,
+    regions: List[Region],
+    min_score: Optional[float] = None,
+    padding: int = 10
+) -> Tuple[List[Region], Dict[str, Any]]:
+    """
+    Drop regions unlikely to contain text before they reach OCR. `grey` may
+    also be the colour image, in which case only the crops are converted.
+    `min_score` trades recall for speed: lower keeps more regions (0 keeps
+    all). Regions covering at least half the image are always kept, since
+    they are usually a whole-image fallback. Returns the kept regions and the
+    gate's report.
+    """
+    gate_config = Config.TEXT_GATE_CONFIG
+    if min_score is None:
+        min_score = (
+            gate_config['min_score'] if gate_config.get('enabled', True) else 0.0
+        )
+
+    report = {'regions_checked': len(regions), 'regions_gated': 0}
+    if min_score <= 0 or not regions:
+        return list(regions), report
+
+    image_height, image_width = grey.shape[:2]
+    image_area = float(image_height * image_width)
+    kept = []
+    for region in regions:
+        x, y, w, h = region
+        if w * h >= 0.5 * image_area:
+            kept.append(region)
+            continue
+        # Judge the same padded crop that OCR would see
+        roi = grey[max(0, y - padding):min(image_height, y + h + padding),
+                   max(0, x - padding):min(image_width, x + w + padding)]
+        if roi.ndim == 3:
+            roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+        if roi.size and text_score(region_features(roi)) >= min_score:
+            kept.append(region)
+        else:
+            report['regions_gated'] += 1
+
+    count('regions_gated', report['regions_gated'])
+    return kept, report
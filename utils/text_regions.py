@@ -0,0 +1,256 @@
+# utils/text_regions.py
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import Config
+from utils.profiling import timed
+
+Region = Tuple[int, int, int, int]
+
+
+@timed('region_detection')
+def detect_text_regions(
+    processed_image: np.ndarray, min_area: Optional[float] = None
+) -> List[Region]:
+    """
+    Find bounding boxes of external contours in a binary image.
+    """
+    if min_area is None:
+        min_area = Config.REGION_CONFIG['min_area']
+    contours, _ = cv2.findContours(
+        processed_image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
+    )
+    regions = []
+    for contour in contours:
+        if cv2.contourArea(contour) > min_area:
+            x, y, w, h = cv2.boundingRect(contour)
+            regions.append((x, y, w, h))
+    return regions
+
+
+class _UnionFind:
+    """Disjoint sets over region indices."""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> bool:
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i == root_j:
+            return False
+        self.parent[root_j] = root_i
+        return True
+
+
+def _grid_buckets(
+    boxes: np.ndarray, cell_size: int
+) -> Dict[Tuple[int, int], List[int]]:
+    """Bucket boxes (x1, y1, x2, y2) into every grid cell they touch."""
+    buckets = defaultdict(list)
+    cells = boxes // cell_size
+    for index, (cx1, cy1, cx2, cy2) in enumerate(cells.tolist()):
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                buckets[(cx, cy)].append(index)
+    return buckets
+
+
+def _candidate_pairs(boxes: np.ndarray, cell_size: int) -> Iterable[Tuple[int, int]]:
+    """Yield each pair of boxes sharing at least one grid cell, once."""
+    seen = set()
+    for members in _grid_buckets(boxes, cell_size).values():
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                pair = (members[a], members[b])
+                if pair not in seen:
+                    seen.add(pair)
+                    yield pair
+
+
+def _cell_size(boxes: np.ndarray) -> int:
+    """Pick a grid cell size from the typical box height."""
+    heights = boxes[:, 3] - boxes[:, 1]
+    return max(16, int(np.median(heights)) * 2)
+
+
+def _should_merge(
+    a: np.ndarray, b: np.ndarray, gap_x: float, gap_y: float, min_overlap: float
+) -> bool:
+    """
+    Boxes merge if they overlap, or sit within the gap and overlap enough on the other
+    axis.
+    """
+    ax1, ay1, ax2, ay2 = a
+    bx1, by1, bx2, by2 = b
+
+    overlap_x = min(ax2, bx2) - max(ax1, bx1)
+    overlap_y = min(ay2, by2) - max(ay1, by1)
+    if overlap_x > 0 and overlap_y > 0:
+        return True
+
+    # Same line: horizontally adjacent with enough vertical overlap
+    min_height = min(ay2 - ay1, by2 - by1)
+    if -overlap_x <= gap_x and min_height > 0 and overlap_y >= min_overlap * min_height:
+        return True
+
+    # Same block: vertically adjacent with enough horizontal overlap
+    min_width = min(ax2 - ax1, bx2 - bx1)
+    if (
+        gap_y > 0
+        and -overlap_y <= gap_y
+        and min_width > 0
+        and overlap_x >= min_overlap * min_width
+    ):
+        return True
+
+    return False
+
+
+def _merge_pass(
+    boxes: np.ndarray, gap_x: float, gap_y: float, min_overlap: float
+) -> np.ndarray:
+    """Merge connected boxes once, using grid bucketing to find neighbours."""
+    # Expand boxes by the allowed gaps so neighbours land in shared cells
+    expanded = boxes + np.array([-gap_x, -gap_y, gap_x, gap_y])
+    expanded = np.maximum(expanded, 0).astype(np.int64)
+
+    groups = _UnionFind(len(boxes))
+    for i, j in _candidate_pairs(expanded, _cell_size(boxes)):
+        if groups.find(i) != groups.find(j) and _should_merge(
+            boxes[i], boxes[j], gap_x, gap_y, min_overlap
+        ):
+            groups.union(i, j)
+
+    roots = np.array([groups.find(i) for i in range(len(boxes))])
+    merged = []
+    for root in np.unique(roots):
+        members = boxes[roots == root]
+        merged.append(
+            [
+                members[:, 0].min(),
+                members[:, 1].min(),
+                members[:, 2].max(),
+                members[:, 3].max(),
+            ]
+        )
+    return np.array(merged, dtype=np.int64)
+
+
+def _drop_contained(boxes: np.ndarray) -> np.ndarray:
+    """Remove boxes that lie entirely inside another box."""
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    order = np.argsort(-areas, kind='stable')
+    boxes = boxes[order]
+
+    keep = np.ones(len(boxes), dtype=bool)
+    for i, j in _candidate_pairs(boxes, _cell_size(boxes)):
+        # Larger boxes come first, so only j can be inside i
+        if not keep[i] or not keep[j]:
+            continue
+        if (boxes[i, 0] <= boxes[j, 0] and boxes[i, 1] <= boxes[j, 1]
+                and boxes[i, 2] >= boxes[j, 2] and boxes[i, 3] >= boxes[j, 3]):
+            keep[j] = False
+    return boxes[keep]
+
+
+def merge_seam_regions(
+    regions: List[Region], seam_flags: List[bool], duplicate_overlap: float = 0.8
+) -> List[Region]:
+    """
+    Join the pieces of regions split by tile seams and drop duplicates seen by
+    two overlapping tiles. Overlapping boxes are merged when either touches a
+    seam, or when they cover mostly the same area; other boxes are untouched,
+    so region consolidation sees the same input as for an untiled image.
+    """
+    if len(regions) < 2:
+        return list(regions)
+
+    boxes = np.array([(x, y, x + w, y + h) for (x, y, w, h) in regions], dtype=np.int64)
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    groups = _UnionFind(len(boxes))
+    for i, j in _candidate_pairs(boxes, _cell_size(boxes)):
+        overlap_x = min(boxes[i, 2], boxes[j, 2]) - max(boxes[i, 0], boxes[j, 0])
+        overlap_y = min(boxes[i, 3], boxes[j, 3]) - max(boxes[i, 1], boxes[j, 1])
+        if overlap_x <= 0 or overlap_y <= 0:
+            continue
+        duplicate = overlap_x * overlap_y >= duplicate_overlap * min(areas[i], areas[j])
+        if seam_flags[i] or seam_flags[j] or duplicate:
+            groups.union(i, j)
+
+    roots = np.array([groups.find(i) for i in range(len(boxes))])
+    merged = []
+    for root in np.unique(roots):
+        members = boxes[roots == root]
+        x1, y1 = members[:, 0].min(), members[:, 1].min()
+        x2, y2 = members[:, 2].max(), members[:, 3].max()
+        merged.append((int(x1), int(y1), int(x2 - x1), int(y2 - y1)))
+    return merged
+
+
+@timed('region_consolidation')
+def consolidate_regions(
+    regions: List[Region],
+    merge_mode: Optional[str] = None,
+    gap_ratio: Optional[float] = None,
+    min_overlap: Optional[float] = None,
+    max_passes: int = 3
+) -> Tuple[List[Region], Dict[str, Any]]:
+    """
+    Merge overlapping and adjacent boxes into text lines ("lines") or lines
+    and paragraphs ("blocks"), and drop boxes contained in others. Neighbours
+    are found through grid bucketing rather than checking every pair.
+    Returns the consolidated regions in reading order and the before/after counts.
+    """
+    region_config = Config.REGION_CONFIG
+    merge_mode = merge_mode or region_config['merge_mode']
+    gap_ratio = gap_ratio if gap_ratio is not None else region_config['gap_ratio']
+    min_overlap = (
+        min_overlap if min_overlap is not None else region_config['min_overlap']
+    )
+
+    stats = {
+        'regions_before': len(regions),
+        'regions_after': len(regions),
+        'merge_mode': merge_mode,
+    }
+    if not regions or merge_mode == 'none':
+        return list(regions), stats
+
+    boxes = np.array([(x, y, x + w, y + h) for (x, y, w, h) in regions], dtype=np.int64)
+
+    if merge_mode in ('lines', 'blocks'):
+        # Gaps scale with the typical character height
+        char_height = float(np.median(boxes[:, 3] - boxes[:, 1]))
+        gap_x = gap_ratio * char_height
+        gap_y = 0.5 * char_height if merge_mode == 'blocks' else 0.0
+
+        for _ in range(max_passes):
+            merged = _merge_pass(boxes, gap_x, gap_y, min_overlap)
+            converged = len(merged) == len(boxes)
+            boxes = merged
+            if converged:
+                break
+    elif merge_mode != 'contained':
+        raise ValueError(f"Unknown merge mode: {merge_mode}")
+
+    boxes = _drop_contained(boxes)
+
+    # Reading order: top to bottom, then left to right
+    order = np.lexsort((boxes[:, 0], boxes[:, 1]))
+    consolidated = [
+        (int(x1), int(y1), int(x2 - x1), int(y2 - y1))
+        for x1, y1, x2, y2 in boxes[order]
+    ]
+
+    stats['regions_after'] = len(consolidated)
+    return consolidated, stats
@@ -0,0 +1,139 @@
+# utils/tiling.py
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from config import Config
+from utils.preprocessing import (
+    ImageTransform, apply_preprocessing_mode, estimate_text_height, to_denoised_grey
+)
+from utils.profiling import count, span, track_array
+from utils.text_regions import Region, detect_text_regions, merge_seam_regions
+
+Tile = Tuple[int, int, int, int]
+
+
+def should_tile(image: np.ndarray, tiled: Optional[bool] = None) -> bool:
+    """
+    Tile when asked to, or by default when the image exceeds
+    TILING_CONFIG['min_pixels'].
+    """
+    if tiled is not None:
+        return tiled
+    min_pixels = Config.TILING_CONFIG.get('min_pixels')
+    return bool(min_pixels) and image.shape[0] * image.shape[1] >= min_pixels
+
+
+def tile_grid(length: int, tile: int, overlap: int) -> List[int]:
+    """
+    Start offsets covering `length` with tiles of `tile` overlapping by at least
+    `overlap`.
+    """
+    if length <= tile:
+        return [0]
+    step = max(1, tile - overlap)
+    starts = list(range(0, length - tile, step))
+    starts.append(length - tile)
+    return starts
+
+
+def iter_tiles(shape: Tuple[int, ...], tile_size: int, overlap: int) -> Iterator[Tile]:
+    """Yield overlapping (x, y, w, h) tiles covering an image of `shape`, row by row."""
+    height, width = shape[:2]
+    for y in tile_grid(height, tile_size, overlap):
+        for x in tile_grid(width, tile_size, overlap):
+            yield x, y, min(tile_size, width - x), min(tile_size, height - y)
+
+
+def process_tile(
+    tile: np.ndarray,
+    scale: float,
+    preprocessing_mode: str,
+    denoise: Union[bool, str] = True
+) -> List[Region]:
+    """
+    Downscale, denoise and threshold one tile and return its text regions in
+    tile coordinates. Only tile-sized arrays are created.
+    """
+    transform = ImageTransform(tile.shape)
+    working = tile
+    if scale < 1.0:
+        size = (
+            max(1, round(tile.shape[1] * scale)),
+            max(1, round(tile.shape[0] * scale)),
+        )
+        working = cv2.resize(tile, size, interpolation=cv2.INTER_AREA)
+        transform.match_size(tile.shape, working.shape)
+
+    grey = track_array(to_denoised_grey(working, denoise))
+    del working
+    binary = track_array(apply_preprocessing_mode(grey, preprocessing_mode))
+    transform.match_size(grey.shape, binary.shape)
+    del grey
+
+    return transform.to_original(detect_text_regions(binary))
+
+
+def detect_text_regions_tiled(
+    image: np.ndarray,
+    preprocessing_mode: str = "adaptive_threshold",
+    denoise: Union[bool, str] = True,
+    tile_size: Optional[int] = None,
+    overlap: Optional[int] = None
+) -> Tuple[List[Region], Dict[str, Any]]:
+    """
+    Find text regions in a very large image tile by tile, returning them in
+    original-image coordinates with tiling statistics.
+
+    The working scale is planned once from the estimated text height, and
+    each overlapping tile is a view of the image that is scaled, denoised and
+    thresholded on its own, so intermediate arrays never exceed `tile_size`
+    pixels square (in working pixels) whatever the image size. Deskewing is
+    not applied in tiled mode.
+    """
+    tiling_config = Config.TILING_CONFIG
+    tile_size = tile_size or tiling_config['tile_size']
+    overlap = overlap if overlap is not None else tiling_config['overlap']
+
+    with span('plan'):
+        text_height = estimate_text_height(image)
+    target = Config.PREPROCESSING_CONFIG['target_text_height']
+    scale = min(1.0, target / text_height) if text_height else 1.0
+
+    # Tile and overlap sizes are given at working resolution
+    source_tile = max(1, int(tile_size / scale))
+    source_overlap = int(overlap / scale)
+    height, width = image.shape[:2]
+    # Rounding while scaling can leave a cut-off region a pixel or two short of the edge
+    margin = max(1, int(round(2 / scale)))
+
+    regions, seam_flags = [], []
+    stats: Dict[str, Any] = {
+        'tiles': 0,
+        'scale': round(scale, 4),
+        'tile_size': tile_size,
+    }
+    with span('tiles'):
+        for x, y, w, h in iter_tiles(image.shape, source_tile, source_overlap):
+            stats['tiles'] += 1
+            # Slicing gives a view, so no tile of the original is copied
+            for rx, ry, rw, rh in process_tile(
+                image[y : y + h, x : x + w], scale, preprocessing_mode, denoise
+            ):
+                # Touching an edge that is inside the image means the region may be cut
+                # off
+                seam = (
+                    (rx <= margin and x > 0) or (ry <= margin and y > 0)
+                    or (rx + rw >= w - margin and x + w < width)
+                    or (ry + rh >= h - margin and y + h < height)
+                )
+                regions.append((x + rx, y + ry, rw, rh))
+                seam_flags.append(seam)
+    count('tiles', stats['tiles'])
+
+    merged = merge_seam_regions(regions, seam_flags)
+    stats['regions_before_seam_merge'] = len(regions)
+    stats['regions_after_seam_merge'] = len(merged)
+    return merged, stats
@@ -0,0 +1,100 @@
+# utils/variant_cache.py
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from config import Config
+from utils.profiling import span, track_array
+
+# A builder maps the source image to a variant, or is a (base variant, function)
+# pair when it refines another variant, e.g. thresholding the denoised image
+VariantBuilder = Union[
+    Callable[[np.ndarray], np.ndarray], Tuple[str, Callable[[np.ndarray], np.ndarray]]
+]
+
+
+class PreprocessingVariantCache:
+    """
+    Computes each preprocessing variant of an image once, at full resolution,
+    and hands out regions as zero-copy numpy slices of the cached arrays.
+
+    At most `max_variants` full-size variants are held at once; the least
+    recently used one is dropped (and rebuilt on demand) beyond that. Use it
+    as a context manager so the arrays are freed when the image is finished.
+    Variants built on another variant share its work, and a variant computed
+    elsewhere can be handed in with put().
+    """
+
+    def __init__(
+        self,
+        image: np.ndarray,
+        builders: Dict[str, VariantBuilder],
+        max_variants: Optional[int] = None
+    ):
+        self.image = image
+        self.builders = builders
+        self.max_variants = (
+            max_variants or Config.OCR_CONFIG.get('max_cached_variants', len(builders))
+        )
+        self._variants: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.builds = 0
+
+    def get(self, name: str) -> np.ndarray:
+        """Return the full-resolution variant, building it on first use."""
+        with self._lock:
+            variant = self._variants.get(name)
+            if variant is not None:
+                self._variants.move_to_end(name)
+                return variant
+
+            builder = self.builders[name]
+            if isinstance(builder, tuple):
+                base, builder = builder
+                source = self.get(base)
+            else:
+                source = self.image
+            with span(f'variant_{name}'):
+                variant = track_array(builder(source))
+            self.builds += 1
+            self._store(name, variant)
+            return variant
+
+    def put(self, name: str, variant: np.ndarray):
+        """Use an already computed full-resolution variant instead of building it."""
+        with self._lock:
+            self._store(name, variant)
+
+    def _store(self, name: str, variant: np.ndarray):
+        if variant.shape[:2] != self.image.shape[:2]:
+            raise ValueError(f"Variant '{name}' changed the image size")
+        self._variants[name] = variant
+        self._variants.move_to_end(name)
+        while len(self._variants) > self.max_variants:
+            self._variants.popitem(last=False)
+
+    def roi(
+        self, name: str, x_start: int, y_start: int, x_end: int, y_end: int
+    ) -> np.ndarray:
+        """Return a view of the cached variant for the given region."""
+        return self.get(name)[y_start:y_end, x_start:x_end]
+
+    def nbytes(self) -> int:
+        """Total size of the variants currently held."""
+        with self._lock:
+            return sum(variant.nbytes for variant in self._variants.values())
+
+    def clear(self):
+        """Drop every cached variant and the reference to the source image."""
+        with self._lock:
+            self._variants.clear()
+        self.image = None
+
+    def __enter__(self) -> "PreprocessingVariantCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.clear()
@@ -0,0 +1,132 @@
+# utils/word_index.py
+
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from config import Config
+from utils.word_table import WordTable
+
+Region = Tuple[int, int, int, int]
+
+
+class WordIndex:
+    """
+    Spatial index over the word boxes of one OCR pass, so regions inside an
+    already-recognised image can reuse its words instead of being OCR'd again.
+
+    Words are bucketed into a uniform grid of `cell_size` pixel cells, so a
+    region query only looks at the words near it. Takes a WordTable or
+    word-level results in pytesseract's DICT layout; words without text or
+    with non-positive confidence are dropped.
+    """
+
+    def __init__(
+        self, data: Union[Dict[str, List[Any]], WordTable], cell_size: int = 64
+    ):
+        self.cell_size = cell_size
+        words = data if isinstance(data, WordTable) else WordTable.from_word_data(data)
+        self.texts = words.texts
+        self.boxes = words.boxes.astype(np.int64)
+        self.confidences = words.confidences.astype(np.float64)
+
+        self._cells = defaultdict(list)
+        for i, box in enumerate(self.boxes):
+            for cell in self._cells_for(box):
+                self._cells[cell].append(i)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def _cells_for(self, region) -> List[Tuple[int, int]]:
+        """Grid cells a region touches."""
+        x, y, w, h = region
+        size = self.cell_size
+        return [
+            (cx, cy)
+            for cy in range(y // size, (y + max(h, 1) - 1) // size + 1)
+            for cx in range(x // size, (x + max(w, 1) - 1) // size + 1)
+        ]
+
+    def words_in(self, region: Region) -> List[int]:
+        """Indices of the words whose centre lies inside `region`."""
+        candidates = sorted(
+            {i for cell in self._cells_for(region) for i in self._cells.get(cell, ())}
+        )
+        if not candidates:
+            return []
+        x, y, w, h = region
+        boxes = self.boxes[candidates]
+        centre_x = boxes[:, 0] + boxes[:, 2] / 2.0
+        centre_y = boxes[:, 1] + boxes[:, 3] / 2.0
+        inside = (
+            (centre_x >= x) & (centre_x < x + w) & (centre_y >= y) & (centre_y < y + h)
+        )
+        return [candidates[i] for i in np.flatnonzero(inside)]
+
+    def reading_order(self, words: List[int]) -> List[int]:
+        """Sort words into lines top to bottom, each line left to right."""
+        lines: List[Tuple[float, int, List[int]]] = []  # (centre, height, words)
+        for i in sorted(words, key=lambda i: self.boxes[i][1]):
+            _, top, _, height = self.boxes[i]
+            centre = top + height / 2.0
+            if lines and abs(centre - lines[-1][0]) <= lines[-1][1] / 2.0:
+                lines[-1][2].append(i)
+            else:
+                lines.append((centre, height, [i]))
+        return [
+            i
+            for _, _, line in lines
+            for i in sorted(line, key=lambda i: self.boxes[i][0])
+        ]
+
+    def lookup(
+        self,
+        region: Region,
+        padding: int = 10,
+        min_confidence: Optional[float] = None,
+        min_coverage: Optional[float] = None
+    ) -> Optional[Tuple[str, float]]:
+        """
+        Return (text, confidence) for a region already covered by confident
+        words, or None when it needs its own OCR: no words were found there,
+        any word inside is below `min_confidence`, or the word boxes cover
+        less than `min_coverage` of the region. Words belong to the region
+        when their centre lies within it, extended by `padding`.
+        """
+        ocr_config = Config.OCR_CONFIG
+        min_confidence = (
+            ocr_config['word_reuse_confidence']
+            if min_confidence is None
+            else min_confidence
+        )
+        min_coverage = (
+            ocr_config['word_reuse_coverage'] if min_coverage is None else min_coverage
+        )
+        if min_coverage is None or not len(self):
+            return None
+
+        x, y, w, h = region
+        words = self.words_in(
+            (x - padding, y - padding, w + 2 * padding, h + 2 * padding)
+        )
+        if not words or self.confidences[words].min() < min_confidence:
+            return None
+
+        covered = np.zeros((h, w), dtype=bool)
+        for left, top, width, height in self.boxes[words]:
+            covered[
+                max(0, top - y) : max(0, top + height - y),
+                max(0, left - x) : max(0, left + width - x),
+            ] = True
+        if covered.mean() < min_coverage:
+            return None
+
+        # Single characters are left out, as in a region's own OCR result
+        kept = [i for i in self.reading_order(words) if len(self.texts[i]) > 1]
+        if not kept:
+            return None
+        return ' '.join(self.texts[i] for i in kept), float(
+            self.confidences[kept].mean()
+        )
@@ -0,0 +1,230 @@
+# utils/word_table.py
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+Region = Tuple[int, int, int, int]
+
+# One row per OCR word or line; text lives in a shared UTF-8 buffer
+WORD_DTYPE = np.dtype([
+    ('left', np.int32),
+    ('top', np.int32),
+    ('width', np.int32),
+    ('height', np.int32),
+    ('confidence', np.float32),
+    ('strategy', np.int16),  # Index into WordTable.strategies, -1 when unknown
+    ('offset', np.int64),  # Start of the text in the buffer, in bytes
+    ('length', np.int32)  # Length of the text in bytes
+])
+
+
+class WordTable:
+    """
+    Columnar container for OCR results: a numpy structured array of boxes,
+    confidences and source strategies, with every text stored once in a
+    single UTF-8 buffer addressed by (offset, length).
+
+    Strategy names are dictionary-encoded in `strategies`. Slicing returns a
+    view of the rows, and filtering copies only the fixed-size rows; both
+    share the text buffer, so large batches never become millions of Python
+    objects until texts are actually read.
+    """
+
+    def __init__(
+        self, records: np.ndarray, buffer: bytes, strategies: Sequence[str] = ()
+    ):
+        self.records = records
+        self.buffer = buffer
+        self.strategies = tuple(strategies)
+
+    @classmethod
+    def empty(cls) -> "WordTable":
+        return cls(np.zeros(0, dtype=WORD_DTYPE), b"")
+
+    @classmethod
+    def from_columns(
+        cls,
+        texts: Sequence[str],
+        confidences: Union[Sequence[float], np.ndarray],
+        boxes: Optional[Union[Sequence[Region], np.ndarray]] = None,
+        strategies: Optional[Sequence[str]] = None
+    ) -> "WordTable":
+        """
+        Build a table from parallel columns; boxes default to zeros, strategies to
+        unknown.
+        """
+        encoded = [text.encode('utf-8') for text in texts]
+        records = np.zeros(len(encoded), dtype=WORD_DTYPE)
+        lengths = np.fromiter(
+            (len(text) for text in encoded), dtype=np.int64, count=len(encoded)
+        )
+        records['length'] = lengths
+        records['offset'] = np.cumsum(lengths) - lengths
+        records['confidence'] = np.asarray(confidences, dtype=np.float32).reshape(-1)
+        if boxes is not None and len(boxes):
+            box_array = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+            for i, field in enumerate(('left', 'top', 'width', 'height')):
+                records[field] = box_array[:, i]
+
+        names: Iterable[Any] = ()
+        if strategies is None:
+            records['strategy'] = -1
+        else:
+            names, codes = np.unique(
+                np.asarray(strategies, dtype=str), return_inverse=True
+            )
+            records['strategy'] = codes
+        return cls(records, b"".join(encoded), [str(name) for name in names])
+
+    @classmethod
+    def from_word_data(
+        cls,
+        data: Dict[str, List[Any]],
+        strategy: Optional[str] = None,
+        min_length: int = 1
+    ) -> "WordTable":
+        """
+        Build a table from word-level OCR results in pytesseract's DICT layout,
+        keeping words of at least `min_length` characters with a positive
+        (whole-number) confidence.
+        """
+        if not len(data.get('text', [])):
+            return cls.empty()
+        texts = np.char.strip(np.asarray(data['text'], dtype=str))
+        confidences = np.asarray(data['conf'], dtype=np.float64)
+        keep = (np.trunc(confidences) > 0) & (
+            np.char.str_len(texts) >= max(min_length, 1)
+        )
+        boxes = np.stack(
+            [
+                np.asarray(data[key], dtype=np.int64)
+                for key in ('left', 'top', 'width', 'height')
+            ],
+            axis=1,
+        )
+        kept = int(keep.sum())
+        return cls.from_columns(
+            texts[keep].tolist(), confidences[keep], boxes[keep],
+            None if strategy is None else [strategy] * kept
+        )
+
+    @classmethod
+    def concat(cls, tables: Iterable["WordTable"]) -> "WordTable":
+        """
+        Join tables into one, merging their text buffers and strategy dictionaries.
+        """
+        tables = list(tables)
+        if not tables:
+            return cls.empty()
+        names = sorted({name for table in tables for name in table.strategies})
+        lookup = {name: code for code, name in enumerate(names)}
+
+        parts, buffers, position = [], [], 0
+        for table in tables:
+            # Compact each table's buffer to the rows it still holds
+            table = table.compact()
+            records = table.records
+            records['offset'] += position
+            if table.strategies:
+                remap = np.array(
+                    [lookup[name] for name in table.strategies] + [-1], dtype=np.int16
+                )
+                records['strategy'] = remap[records['strategy']]
+            parts.append(records)
+            buffers.append(table.buffer)
+            position += len(table.buffer)
+        return cls(np.concatenate(parts), b"".join(buffers), names)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(
+        self, index: Union[int, slice, np.ndarray, Sequence[int]]
+    ) -> "WordTable":
+        """Select rows by slice, boolean mask or indices; the text buffer is shared."""
+        if isinstance(index, (int, np.integer)):
+            index = [index]
+        return WordTable(self.records[index], self.buffer, self.strategies)
+
+    def text(self, i: int) -> str:
+        record = self.records[i]
+        return self.buffer[
+            record['offset'] : record['offset'] + record['length']
+        ].decode('utf-8')
+
+    @property
+    def texts(self) -> List[str]:
+        view = memoryview(self.buffer)
+        return [
+            bytes(view[offset : offset + length]).decode('utf-8')
+            for offset, length in zip(
+                self.records['offset'].tolist(), self.records['length'].tolist()
+            )
+        ]
+
+    @property
+    def confidences(self) -> np.ndarray:
+        return self.records['confidence']
+
+    @property
+    def boxes(self) -> np.ndarray:
+        """(N, 4) array of (left, top, width, height)."""
+        return np.stack(
+            [self.records[field] for field in ('left', 'top', 'width', 'height')],
+            axis=1,
+        )
+
+    @property
+    def strategy_names(self) -> List[Optional[str]]:
+        names = self.strategies
+        return [
+            names[code] if code >= 0 else None
+            for code in self.records['strategy'].tolist()
+        ]
+
+    def filter_confidence(self, min_confidence: float) -> "WordTable":
+        """Rows at or above `min_confidence`."""
+        return self[self.records['confidence'] >= min_confidence]
+
+    def deduplicate(self, min_length: int = 3) -> "WordTable":
+        """
+        Drop repeated texts (case-insensitive, ignoring surrounding space) and
+        texts shorter than `min_length`, keeping the first occurrence in order.
+        """
+        if not len(self):
+            return self
+        keys = np.char.lower(np.char.strip(np.asarray(self.texts, dtype=str)))
+        candidates = np.flatnonzero(np.char.str_len(keys) >= min_length)
+        _, first = np.unique(keys[candidates], return_index=True)
+        return self[candidates[np.sort(first)]]
+
+    def compact(self) -> "WordTable":
+        """Copy of the table whose buffer holds only the texts of its rows."""
+        view = memoryview(self.buffer)
+        encoded = [
+            view[offset : offset + length]
+            for offset, length in zip(
+                self.records['offset'].tolist(), self.records['length'].tolist()
+            )
+        ]
+        records = self.records.copy()
+        lengths = records['length'].astype(np.int64)
+        records['offset'] = np.cumsum(lengths) - lengths
+        return WordTable(records, b"".join(encoded), self.strategies)
+
+    def to_lists(self) -> Tuple[List[str], List[float]]:
+        """(texts, confidences) as plain lists, for callers using parallel lists."""
+        return self.texts, self.records['confidence'].astype(float).tolist()
+
+    def columns(self) -> Dict[str, Any]:
+        """Export-ready columns: numeric ones are views of the records, not copies."""
+        return {
+            'text': self.texts,
+            'confidence': self.records['confidence'],
+            'left': self.records['left'],
+            'top': self.records['top'],
+            'width': self.records['width'],
+            'height': self.records['height'],
+            'strategy': self.strategy_names
+        }